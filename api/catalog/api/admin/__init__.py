@@ -1,7 +1,11 @@
 from django.contrib import admin
+from django.db import transaction
 
 from catalog.api.admin.site import openverse_admin
 from catalog.api.models import (
+    DEINDEXED,
+    MATURE_FILTERED,
+    NO_ACTION,
     PENDING,
     Audio,
     AudioReport,
@@ -33,11 +37,33 @@ class MediaReportAdmin(admin.ModelAdmin):
     list_display_links = ("status",)
     search_fields = ("description", "media_obj__identifier")
     autocomplete_fields = ("media_obj",)
-    actions = None
+    actions = ("mark_mature_filtered", "mark_deindexed", "mark_no_action")
 
     def get_list_display(self, request):
         return self.list_display + self.media_specific_list_display
 
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Reports are kept as a record of moderation decisions.
+        actions.pop("delete_selected", None)
+        return actions
+
+    def _moderate(self, request, queryset, status):
+        count = self.model.moderate(queryset, status)
+        self.message_user(request, f"{count} report(s) marked as {status}.")
+
+    @admin.action(permissions=["change"], description="Mark selected reports as mature")
+    def mark_mature_filtered(self, request, queryset):
+        self._moderate(request, queryset, MATURE_FILTERED)
+
+    @admin.action(permissions=["change"], description="Deindex selected reports")
+    def mark_deindexed(self, request, queryset):
+        self._moderate(request, queryset, DEINDEXED)
+
+    @admin.action(permissions=["change"], description="Close selected reports")
+    def mark_no_action(self, request, queryset):
+        self._moderate(request, queryset, NO_ACTION)
+
     def get_exclude(self, request, obj=None):
         # ``identifier`` cannot be edited on an existing report.
         if request.path.endswith("/change/"):
@@ -90,3 +116,7 @@ class ProviderAdmin(admin.ModelAdmin):
     list_display = ("provider_name", "provider_identifier", "media_type")
     search_fields = ("provider_name", "provider_identifier")
     exclude = ("notes",)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(ContentProvider.invalidate_cache)
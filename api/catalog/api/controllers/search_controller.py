@@ -2,37 +2,52 @@ from __future__ import annotations
 
 import logging as log
 import pprint
-from itertools import accumulate
+from collections.abc import Iterator
+from functools import partial
 from math import ceil
-from typing import Literal
+from typing import Literal, NamedTuple
 
 from django.conf import settings
 from django.core.cache import cache
 from rest_framework.request import Request
 
-from elasticsearch.exceptions import NotFoundError, RequestError
-from elasticsearch_dsl import Q, Search
+from asgiref.sync import sync_to_async
+from elasticsearch.exceptions import NotFoundError, RequestError, TransportError
+from elasticsearch_dsl import MultiSearch, Q, Search
 from elasticsearch_dsl.query import EMPTY_QUERY, MoreLikeThis, Query
 from elasticsearch_dsl.response import Hit, Response
 
 import catalog.api.models as models
 from catalog.api.constants.sorting import INDEXED_ON
 from catalog.api.serializers import media_serializers
-from catalog.api.utils import tallies
-from catalog.api.utils.check_dead_links import check_dead_links
-from catalog.api.utils.dead_link_mask import get_query_hash, get_query_mask
+from catalog.api.utils import local_cache, search_cache, search_cursor, tallies, timing
+from catalog.api.utils.check_dead_links import acheck_dead_links, check_dead_links
+from catalog.api.utils.dead_link_mask import (
+    aget_query_slice,
+    get_query_hash,
+    get_query_slice,
+)
+from catalog.configuration.elasticsearch import get_async_es
 
 
 ELASTICSEARCH_MAX_RESULT_WINDOW = 10000
 SOURCE_CACHE_TIMEOUT = 60 * 20
 FILTER_CACHE_TIMEOUT = 30
 DEAD_LINK_RATIO = 1 / 2
+# Search parameters that do not change the query, only the page of its results
+PAGINATION_PARAMS = {"page", "page_size", "cursor"}
+# Search parameters that match text, as opposed to filtering the media
+TEXT_QUERY_PARAMS = ("q", "creator", "title", "tags")
 THUMBNAIL = "thumbnail"
 URL = "url"
 PROVIDER = "provider"
 DEEP_PAGINATION_ERROR = "Deep pagination is not allowed."
 QUERY_SPECIAL_CHARACTER_ERROR = "Unescaped special characters are not allowed."
 DEFAULT_BOOST = 10000
+CURSOR_KEEP_ALIVE = "2m"
+EXPORT_BATCH_SIZE = 500
+# The number of related documents to cache, leaving room for dead links
+RELATED_CANDIDATES = 20
 
 
 class RankFeature(Query):
@@ -56,7 +71,7 @@ def _unmasked_query_end(page_size, page):
 
 
 def _paginate_with_dead_link_mask(
-    s: Search, page_size: int, page: int
+    query_hash: str, page_size: int, page: int
 ) -> tuple[int, int]:
     """
     Return the start and end of the results slice, given the query, page and page size.
@@ -66,67 +81,52 @@ def _paginate_with_dead_link_mask(
 
     The "branch X" labels are for cross-referencing with the tests.
 
-    :param s: The elasticsearch Search object
+    :param query_hash: The hash of the query, see ``_get_query_hash``.
     :param page_size: How big the page should be.
     :param page: The page number.
     :return: Tuple of start and end.
     """
-    query_hash = get_query_hash(s)
-    query_mask = get_query_mask(query_hash)
-    if not query_mask:  # branch 1
-        start = 0
-        end = _unmasked_query_end(page_size, page)
-    elif page_size * (page - 1) > sum(query_mask):  # branch 2
-        start = len(query_mask)
-        end = _unmasked_query_end(page_size, page)
-    else:  # branch 3
-        # query_mask is a list of 0 and 1 where 0 indicates the result position
-        # for the given query will be an invalid link. If we accumulate a query
-        # mask you end up, at each index, with the number of live results you
-        # will get back when you query that deeply.
-        # We then query for the start and end index _of the results_ in ES based
-        # on the number of results that we think will be valid based on the query mask.
-        # If we're requesting `page=2 page_size=3` and the mask is [0, 1, 0, 1, 0, 1],
-        # then we know that we have to _start_ with at least the sixth result of the
-        # overall query to skip the first page of 3 valid results. The "end" of the
-        # query will then follow the same pattern to reach the number of valid results
-        # required to fill the requested page. If the mask is not deep enough to
-        # account for the entire range, then we follow the typical assumption when
-        # a mask is not available that the end should be `page * page_size / 0.5`
-        # (i.e., double the page size)
-        accu_query_mask = list(accumulate(query_mask))
-        start = 0
-        if page > 1:
-            try:  # branch 3_start_A
-                # find the index at which we can skip N valid results where N = all
-                # the results that would be skipped to arrive at the start of the
-                # requested page
-                # This will effectively be the index at which we have the number of
-                # previous valid results + 1 because we don't want to include the
-                # last valid result from the previous page
-                start = accu_query_mask.index(page_size * (page - 1) + 1)
-            except ValueError:  # branch 3_start_B
-                # Cannot fail because of the check on branch 2 which verifies that
-                # the query mask already includes at least enough masked valid
-                # results to fulfill the requested page size
-                start = accu_query_mask.index(page_size * (page - 1)) + 1
-        # else:  branch 3_start_C
-        # Always start page=1 queries at 0
-
-        if page_size * page > sum(query_mask):  # branch 3_end_A
-            end = _unmasked_query_end(page_size, page)
-        else:  # branch 3_end_B
-            end = accu_query_mask.index(page_size * page) + 1
-    return start, end
+    # The mask is a bitstring in Redis where 0 indicates that the result at that
+    # position for the given query will be an invalid link. If we accumulate the
+    # mask you end up, at each index, with the number of live results you will get
+    # back when you query that deeply.
+    # We then query for the start and end index _of the results_ in ES based on the
+    # number of results that we think will be valid based on the query mask.
+    # If we're requesting `page=2 page_size=3` and the mask is [0, 1, 0, 1, 0, 1],
+    # then we know that we have to _start_ with at least the sixth result of the
+    # overall query to skip the first page of 3 valid results. The "end" of the
+    # query will then follow the same pattern to reach the number of valid results
+    # required to fill the requested page. If the mask is not deep enough to
+    # account for the entire range, then we follow the typical assumption when
+    # a mask is not available that the end should be `page * page_size / 0.5`
+    # (i.e., double the page size).
+    #
+    # branch 1: there is no query mask, start at 0 and use the unmasked end
+    # branch 2: the mask does not cover the previous pages, start at its end
+    # branch 3: the mask covers the previous pages
+    #   3_start_A: start after the last live result of the previous pages
+    #   3_start_B: the mask ends exactly on the previous pages, start at its end
+    #   3_start_C: always start page=1 queries at 0
+    #   3_end_A: the mask does not cover this page, use the unmasked end
+    #   3_end_B: end at the last live result of this page
+    #
+    # The slice is computed inside Redis so that the cost of a request does not
+    # depend on the length of the mask.
+    return get_query_slice(
+        query_hash, page_size, page, _unmasked_query_end(page_size, page)
+    )
 
 
 def _get_query_slice(
-    s: Search, page_size: int, page: int, filter_dead: bool | None = False
+    query_hash: str | None, page_size: int, page: int, filter_dead: bool | None = False
 ) -> tuple[int, int]:
     """Select the start and end of the search results for this query."""
 
     if filter_dead:
-        start_slice, end_slice = _paginate_with_dead_link_mask(s, page_size, page)
+        with timing.span("mask_read"):
+            start_slice, end_slice = _paginate_with_dead_link_mask(
+                query_hash, page_size, page
+            )
     else:
         # Paginate search query.
         start_slice = page_size * (page - 1)
@@ -136,6 +136,23 @@ def _get_query_slice(
     return start_slice, end_slice
 
 
+async def _aget_query_slice(
+    query_hash: str | None, page_size: int, page: int, filter_dead: bool | None = False
+) -> tuple[int, int]:
+    """Async variant of ``_get_query_slice``."""
+
+    if not filter_dead:
+        return _get_query_slice(query_hash, page_size, page, filter_dead)
+
+    with timing.span("mask_read"):
+        start_slice, end_slice = await aget_query_slice(
+            query_hash, page_size, page, _unmasked_query_end(page_size, page)
+        )
+    if start_slice + end_slice > ELASTICSEARCH_MAX_RESULT_WINDOW:
+        raise ValueError(DEEP_PAGINATION_ERROR)
+    return start_slice, end_slice
+
+
 def _quote_escape(query_string):
     """Ignore any unmatched quotes in the query supplied by the user."""
 
@@ -147,7 +164,7 @@ def _quote_escape(query_string):
 
 
 def _post_process_results(
-    s, start, end, page_size, search_results, request, filter_dead
+    s, query_hash, start, end, page_size, search_results, request, filter_dead
 ) -> list[Hit] | None:
     """
     Perform some steps on results fetched from the backend.
@@ -159,6 +176,8 @@ def _post_process_results(
     Keeps making new query requests until it is able to fill the page size.
 
     :param s: The Elasticsearch Search object.
+    :param query_hash: The hash of the query, see ``_get_query_hash``; only used
+    if ``filter_dead`` is set.
     :param start: The start of the result slice.
     :param end: The end of the result slice.
     :param search_results: The Elasticsearch response object containing search
@@ -168,16 +187,9 @@ def _post_process_results(
     :param filter_dead: Whether images should be validated.
     :return: List of results.
     """
-    results = []
-    to_validate = []
-    for res in search_results:
-        if hasattr(res.meta, "highlight"):
-            res.fields_matched = dir(res.meta.highlight)
-        to_validate.append(res.url)
-        results.append(res)
+    results, to_validate = _collect_results(search_results)
 
     if filter_dead:
-        query_hash = get_query_hash(s)
         check_dead_links(query_hash, start, results, to_validate)
 
         if len(results) == 0:
@@ -211,15 +223,117 @@ def _post_process_results(
                 return results
 
             s = s[start:end]
-            search_response = s.execute()
+            timing.count("es", backfills=1)
+            search_response = _execute(s)
 
             return _post_process_results(
-                s, start, end, page_size, search_response, request, filter_dead
+                s,
+                query_hash,
+                start,
+                end,
+                page_size,
+                search_response,
+                request,
+                filter_dead,
             )
 
     return results[:page_size]
 
 
+async def _apost_process_results(
+    s, query_hash, start, end, page_size, search_results, request, filter_dead
+) -> list[Hit] | None:
+    """Async variant of ``_post_process_results``."""
+
+    results, to_validate = _collect_results(search_results)
+
+    if filter_dead:
+        await acheck_dead_links(query_hash, start, results, to_validate)
+
+        if len(results) == 0:
+            return None
+
+        if len(results) < page_size:
+            # See ``_post_process_results`` for how the query grows.
+            end += int(end / 2)
+            if start + end > ELASTICSEARCH_MAX_RESULT_WINDOW:
+                return results
+
+            s = s[start:end]
+            timing.count("es", backfills=1)
+            search_response = await _aexecute(s)
+
+            return await _apost_process_results(
+                s,
+                query_hash,
+                start,
+                end,
+                page_size,
+                search_response,
+                request,
+                filter_dead,
+            )
+
+    return results[:page_size]
+
+
+def _set_fields_matched(hit: Hit) -> None:
+    """Set the fields matched by the query, from highlighting or named queries."""
+
+    if hasattr(hit.meta, "highlight"):
+        hit.fields_matched = dir(hit.meta.highlight)
+    elif hasattr(hit.meta, "matched_queries"):
+        hit.fields_matched = sorted(hit.meta.matched_queries)
+
+
+def _collect_results(search_results: Response) -> tuple[list[Hit], list[str]]:
+    """Get the hits of the response, and the URLs to validate, in the same order."""
+
+    results = []
+    to_validate = []
+    for res in search_results:
+        _set_fields_matched(res)
+        to_validate.append(res.url)
+        results.append(res)
+    return results, to_validate
+
+
+def _record_took(response: Response):
+    """Time the search in Elasticsearch, as opposed to the round trip to it."""
+
+    if isinstance(took := getattr(response, "took", None), int):
+        timing.add("es_took", took / 1000)
+
+
+def _execute(s: Search) -> Response:
+    """
+    Execute the search, timing it as the ``es`` stage of the request.
+
+    :param s: The paginated ``Search`` object.
+    :return: The Elasticsearch response.
+    """
+    with timing.span("es"):
+        response = s.execute()
+    _record_took(response)
+    return response
+
+
+async def _aexecute(s: Search) -> Response:
+    """
+    Execute the search with the async Elasticsearch client, like ``Search.execute``.
+
+    :param s: The paginated ``Search`` object.
+    :return: The Elasticsearch response.
+    """
+    with timing.span("es"):
+        raw_response = await get_async_es().search(
+            index=s._index, body=s.to_dict(), **s._params
+        )
+    response = Response(s, raw_response)
+    _record_took(response)
+    return response
+
+
 def _apply_filter(
     s: Search,
     search_params: media_serializers.MediaSearchRequestSerializer,
@@ -255,23 +369,61 @@ def _apply_filter(
     return s
 
 
+def get_content_providers() -> list[models.ContentProvider]:
+    """Get all the content providers, cached in each process and in Redis."""
+
+    return local_cache.get_or_set(
+        models.ContentProvider.cache_key,
+        lambda: list(models.ContentProvider.objects.all()),
+        timeout=FILTER_CACHE_TIMEOUT,
+    )
+
+
 def _exclude_filtered(s: Search):
     """Hide data sources from the catalog dynamically."""
 
-    filter_cache_key = "filtered_providers"
-    filtered_providers = cache.get(key=filter_cache_key)
-    if not filtered_providers:
-        filtered_providers = models.ContentProvider.objects.filter(
-            filter_content=True
-        ).values("provider_identifier")
-        cache.set(
-            key=filter_cache_key, timeout=FILTER_CACHE_TIMEOUT, value=filtered_providers
-        )
-    to_exclude = [f["provider_identifier"] for f in filtered_providers]
+    to_exclude = [
+        provider.provider_identifier
+        for provider in get_content_providers()
+        if provider.filter_content
+    ]
     s = s.exclude("terms", provider=to_exclude)
     return s
 
 
+def _get_query_hash(params: dict, index: str) -> str:
+    """
+    Hash a query for its dead link mask, from the parameters it is built from.
+
+    This is much cheaper than serializing and hashing the ``Search`` object, and is
+    computed once per request. The hidden data sources are included, as they change
+    the results of the query.
+
+    :param params: The parameters that determine the query, excluding pagination.
+    :param index: The resolved Elasticsearch index to search.
+    :return: The hash of the query.
+    """
+    excluded_providers = sorted(
+        provider.provider_identifier
+        for provider in get_content_providers()
+        if provider.filter_content
+    )
+    return get_query_hash(params | {"excluded_providers": excluded_providers}, index)
+
+
+def _get_search_query_hash(
+    search_params: media_serializers.MediaSearchRequestSerializer, index: str
+) -> str:
+    """Hash the query of the search parameters, see ``_get_query_hash``."""
+
+    params = {
+        key: value
+        for key, value in search_params.data.items()
+        if key not in PAGINATION_PARAMS
+    }
+    return _get_query_hash(params, index)
+
+
 def _exclude_sensitive_by_param(s: Search, search_params):
     if not search_params.validated_data["include_sensitive_results"]:
         s = s.exclude("term", mature=True)
@@ -294,36 +446,45 @@ def _resolve_index(
     return index
 
 
-def search(
+def _is_filter_only(
     search_params: media_serializers.MediaSearchRequestSerializer,
-    index: Literal["image", "audio"],
-    page_size: int,
-    ip: int,
-    request: Request,
-    filter_dead: bool,
-    page: int = 1,
-) -> tuple[list[Hit], int, int]:
+) -> bool:
+    """Whether the search only filters the media, without matching any text."""
+
+    return not any(param in search_params.data for param in TEXT_QUERY_PARAMS)
+
+
+def _get_field_queries(base_query_kwargs: dict) -> list[Query]:
     """
-    Perform a ranked paginated search from the set of keywords and, optionally, filters.
+    Get a named query for each of the fields searched by the ``q`` parameter.
 
-    :param search_params: Search parameters. See
-     :class: `ImageSearchQueryStringSerializer`.
-    :param index: The Elasticsearch index to search (e.g. 'image')
-    :param page_size: The number of results to return per page.
-    :param ip: The user's hashed IP. Hashed IPs are used to anonymously but
-    uniquely identify users exclusively for ensuring query consistency across
-    Elasticsearch shards.
-    :param request: Django's request object.
-    :param filter_dead: Whether dead links should be removed.
-    :param page: The results page number.
-    :return: Tuple with a List of Hits from elasticsearch, the total count of
-    pages, and number of results.
+    The queries do not change the score, but Elasticsearch reports the names of the
+    queries that match each hit, which is much cheaper than highlighting the fields.
+
+    :param base_query_kwargs: The arguments of the query for the ``q`` parameter.
+    :return: The named queries, one per field.
     """
-    index = _resolve_index(index, search_params)
+    field_queries = []
+    for field in base_query_kwargs["fields"]:
+        kwargs = base_query_kwargs | {"fields": [field], "_name": field, "boost": 0}
+        # Like highlighting, report the fields matching any of the terms.
+        kwargs.pop("default_operator")
+        field_queries.append(Q("simple_query_string", **kwargs))
+    return field_queries
 
-    search_client = Search(index=index)
 
-    s = search_client
+def _build_search(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: str,
+) -> Search:
+    """
+    Build the unpaginated query for the search parameters.
+
+    :param search_params: Search parameters, see ``search``.
+    :param index: The resolved Elasticsearch index to search.
+    :return: The ``Search`` object for the query, filters and sorting.
+    """
+    s = Search(index=index)
     # Apply term filters. Each tuple pairs a filter's parameter name in the API
     # with its corresponding field in Elasticsearch. "None" means that the
     # names are identical.
@@ -353,6 +514,13 @@ def search(
     s = _exclude_sensitive_by_param(s, search_params)
     s = _exclude_filtered(s)
 
+    # The filters above are in the filter context of the query, so that they do not
+    # take part in scoring and can be cached by Elasticsearch. The clauses below
+    # score the results and are added next to the filters, in a single bool query.
+    must = []
+    should = []
+    named_queries = settings.ENABLE_NAMED_QUERIES
+
     # Search either by generic multimatch or by "advanced search" with
     # individual field-level queries specified.
     search_fields = ["tags.name", "title", "description"]
@@ -367,29 +535,40 @@ def search(
         if '"' in query:
             base_query_kwargs["quote_field_suffix"] = ".exact"
 
-        s = s.query(
-            "simple_query_string",
-            **base_query_kwargs,
-        )
+        must.append(Q("simple_query_string", **base_query_kwargs))
         # Boost exact matches on the title
         quotes_stripped = query.replace('"', "")
-        exact_match_boost = Q(
-            "simple_query_string",
-            fields=["title"],
-            query=f"{quotes_stripped}",
-            boost=10000,
+        should.append(
+            Q(
+                "simple_query_string",
+                fields=["title"],
+                query=f"{quotes_stripped}",
+                boost=10000,
+            )
         )
-        s = search_client.query(Q("bool", must=s.query, should=exact_match_boost))
+        if named_queries:
+            should.extend(_get_field_queries(base_query_kwargs))
     else:
         if "creator" in search_params.data:
             creator = _quote_escape(search_params.data["creator"])
-            s = s.query("simple_query_string", query=creator, fields=["creator"])
+            must.append(Q("simple_query_string", query=creator, fields=["creator"]))
         if "title" in search_params.data:
             title = _quote_escape(search_params.data["title"])
-            s = s.query("simple_query_string", query=title, fields=["title"])
+            title_kwargs = {"_name": "title"} if named_queries else {}
+            must.append(
+                Q("simple_query_string", query=title, fields=["title"], **title_kwargs)
+            )
         if "tags" in search_params.data:
             tags = _quote_escape(search_params.data["tags"])
-            s = s.query("simple_query_string", fields=["tags.name"], query=tags)
+            tags_kwargs = {"_name": "tags.name"} if named_queries else {}
+            must.append(
+                Q(
+                    "simple_query_string",
+                    fields=["tags.name"],
+                    query=tags,
+                    **tags_kwargs,
+                )
+            )
 
     if settings.USE_RANK_FEATURES:
         feature_boost = {"standardized_popularity": DEFAULT_BOOST}
@@ -398,48 +577,209 @@ def search(
                 search_params.data["unstable__authority_boost"] * DEFAULT_BOOST
             )
 
-        rank_queries = []
         for field, boost in feature_boost.items():
-            rank_queries.append(Q("rank_feature", field=field, boost=boost))
-        s = search_client.query(
-            Q("bool", must=s.query or EMPTY_QUERY, should=rank_queries)
-        )
+            should.append(Q("rank_feature", field=field, boost=boost))
+        # Without a required clause, only the documents with rank features match.
+        must = must or [EMPTY_QUERY]
+
+    if must or should:
+        s = s.query(Q("bool", must=must, should=should))
 
     # Use highlighting to determine which fields contribute to the selection of
-    # top results.
-    s = s.highlight(*search_fields)
-    s = s.highlight_options(order="score")
+    # top results. Filter-only searches match no terms to highlight.
+    if not named_queries and not _is_filter_only(search_params):
+        s = s.highlight(*search_fields)
+        s = s.highlight_options(order="score")
     s.extra(track_scores=True)
-    # Route users to the same Elasticsearch worker node to reduce
-    # pagination inconsistencies and increase cache hits.
-    s = s.params(preference=str(ip), request_timeout=7)
 
     # Sort by new
     if search_params.validated_data["sort_by"] == INDEXED_ON:
         s = s.sort({"created_on": {"order": search_params.validated_data["sort_dir"]}})
 
+    return s
+
+
+def _prepare_search(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: str,
+    page_size: int,
+    ip: int,
+    filter_dead: bool,
+    page: int,
+) -> tuple[Search, str | None, int, int]:
+    """
+    Build the paginated query for a page of search results.
+
+    See ``search`` for a description of the parameters; ``index`` must already be
+    resolved.
+
+    :return: Tuple with the ``Search`` object, the hash of the query if dead links
+    are filtered, and the start and end of its slice.
+    """
+    s, query_hash = _build_hashed_search(search_params, index, ip, filter_dead)
+
     # Paginate
-    start, end = _get_query_slice(s, page_size, page, filter_dead)
+    start, end = _get_query_slice(query_hash, page_size, page, filter_dead)
+    s = s[start:end]
+    return s, query_hash, start, end
+
+
+async def _aprepare_search(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: str,
+    page_size: int,
+    ip: int,
+    filter_dead: bool,
+    page: int,
+) -> tuple[Search, str | None, int, int]:
+    """Async variant of ``_prepare_search``."""
+
+    # Building the query reads the hidden data sources from the cache or the DB.
+    s, query_hash = await sync_to_async(_build_hashed_search)(
+        search_params, index, ip, filter_dead
+    )
+
+    start, end = await _aget_query_slice(query_hash, page_size, page, filter_dead)
     s = s[start:end]
+    return s, query_hash, start, end
+
+
+def _build_hashed_search(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: str,
+    ip: int,
+    filter_dead: bool,
+) -> tuple[Search, str | None]:
+    """Build the unpaginated query, and its hash if dead links are filtered."""
+
+    with timing.span("query_build"):
+        s = _build_search(search_params, index)
+        # Route users to the same Elasticsearch worker node to reduce
+        # pagination inconsistencies and increase cache hits.
+        s = s.params(preference=str(ip))
+        # Filter-only searches, like browsing a source, are shared by many users.
+        if settings.ENABLE_ES_REQUEST_CACHE and _is_filter_only(search_params):
+            s = s.params(request_cache=True)
+
+        query_hash = (
+            _get_search_query_hash(search_params, index) if filter_dead else None
+        )
+    return s, query_hash
+
+
+def _process_search_response(
+    s: Search,
+    query_hash: str | None,
+    start: int,
+    end: int,
+    page_size: int,
+    page: int,
+    search_response: Response,
+    request: Request,
+    filter_dead: bool,
+) -> tuple[list[Hit] | None, int, int]:
+    """
+    Post-process the hits of a page of search results.
+
+    :return: Tuple with a List of Hits from elasticsearch (or ``None``), the total
+    count of pages, and number of results.
+    """
+    results = _post_process_results(
+        s, query_hash, start, end, page_size, search_response, request, filter_dead
+    )
+
+    result_count, page_count = _get_result_and_page_count(
+        search_response, results, page_size, page
+    )
+
+    return results, page_count, result_count
+
+
+def _execute_search(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: str,
+    page_size: int,
+    ip: int,
+    request: Request,
+    filter_dead: bool,
+    page: int,
+) -> tuple[list[Hit] | None, int, int]:
+    """
+    Build the query, execute it against Elasticsearch and post-process the hits.
+
+    See ``search`` for a description of the parameters; ``index`` must already be
+    resolved.
+
+    :return: Tuple with a List of Hits from elasticsearch (or ``None``), the total
+    count of pages, and number of results.
+    """
+    s, query_hash, start, end = _prepare_search(
+        search_params, index, page_size, ip, filter_dead, page
+    )
+    s = s.params(request_timeout=7)
     try:
         if settings.VERBOSE_ES_RESPONSE:
             log.info(pprint.pprint(s.to_dict()))
 
-        search_response = s.execute()
+        search_response = _execute(s)
 
         if settings.VERBOSE_ES_RESPONSE:
             log.info(pprint.pprint(search_response.to_dict()))
     except RequestError as e:
         raise ValueError(e)
 
-    results = _post_process_results(
-        s, start, end, page_size, search_response, request, filter_dead
+    return _process_search_response(
+        s,
+        query_hash,
+        start,
+        end,
+        page_size,
+        page,
+        search_response,
+        request,
+        filter_dead,
+    )
+
+
+async def _aexecute_search(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: str,
+    page_size: int,
+    ip: int,
+    request: Request,
+    filter_dead: bool,
+    page: int,
+) -> tuple[list[Hit] | None, int, int]:
+    """Async variant of ``_execute_search``."""
+
+    s, query_hash, start, end = await _aprepare_search(
+        search_params, index, page_size, ip, filter_dead, page
+    )
+    s = s.params(request_timeout=7)
+    try:
+        search_response = await _aexecute(s)
+    except RequestError as e:
+        raise ValueError(e)
+
+    results = await _apost_process_results(
+        s, query_hash, start, end, page_size, search_response, request, filter_dead
     )
 
     result_count, page_count = _get_result_and_page_count(
         search_response, results, page_size, page
     )
 
+    return results, page_count, result_count
+
+
+def _tally_results(results: list[Hit] | None, index: str, page_size: int, page: int):
+    if results_to_tally := _get_results_to_tally(results, page_size, page):
+        tallies.count_provider_occurrences(results_to_tally, index)
+
+
+def _get_results_to_tally(
+    results: list[Hit] | None, page_size: int, page: int
+) -> list[Hit]:
     results_to_tally = results or []
     max_result_depth = page * page_size
     if max_result_depth <= 80:
@@ -466,40 +806,401 @@ def search(
         # place we can actually conceivably measure relevancy down the
         # line, it is the only sensible, controlled space we can use to
         # check things like provider density for a set of queries.
-        tallies.count_provider_occurrences(results_to_tally, index)
+        return results_to_tally
+    return []
+
+
+def search(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: Literal["image", "audio"],
+    page_size: int,
+    ip: int,
+    request: Request,
+    filter_dead: bool,
+    page: int = 1,
+) -> tuple[list[Hit], int, int]:
+    """
+    Perform a ranked paginated search from the set of keywords and, optionally, filters.
+
+    When ``ENABLE_SEARCH_RESULT_CACHE`` is set, pages of results are cached by their
+    normalized search parameters, see ``catalog.api.utils.search_cache``.
+
+    :param search_params: Search parameters. See
+     :class: `ImageSearchQueryStringSerializer`.
+    :param index: The Elasticsearch index to search (e.g. 'image')
+    :param page_size: The number of results to return per page.
+    :param ip: The user's hashed IP. Hashed IPs are used to anonymously but
+    uniquely identify users exclusively for ensuring query consistency across
+    Elasticsearch shards.
+    :param request: Django's request object.
+    :param filter_dead: Whether dead links should be removed.
+    :param page: The results page number.
+    :return: Tuple with a List of Hits from elasticsearch, the total count of
+    pages, and number of results.
+    """
+    index = _resolve_index(index, search_params)
+
+    execute = partial(
+        _execute_search,
+        search_params,
+        index,
+        page_size,
+        ip,
+        request,
+        filter_dead,
+        page,
+    )
+    if settings.ENABLE_SEARCH_RESULT_CACHE:
+        cache_key = search_cache.get_cache_key(
+            search_params, index, page_size, page, filter_dead
+        )
+        results, page_count, result_count = search_cache.get_or_compute(
+            cache_key, execute
+        )
+    else:
+        results, page_count, result_count = execute()
+
+    _tally_results(results, index, page_size, page)
 
     return results or [], page_count, result_count
 
 
-def related_media(uuid, index, request, filter_dead):
-    """Given a UUID, find related search results."""
+async def asearch(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: Literal["image", "audio"],
+    page_size: int,
+    ip: int,
+    request: Request,
+    filter_dead: bool,
+    page: int = 1,
+) -> tuple[list[Hit], int, int]:
+    """
+    Async variant of ``search``, see ``search`` for the parameters.
+
+    Elasticsearch, Redis and the providers of the results are queried without
+    blocking the event loop. The search result cache is not used.
+    """
+    index = _resolve_index(index, search_params)
+
+    results, page_count, result_count = await _aexecute_search(
+        search_params,
+        index,
+        page_size,
+        ip,
+        request,
+        filter_dead,
+        page,
+    )
+
+    if results_to_tally := _get_results_to_tally(results, page_size, page):
+        await tallies.acount_provider_occurrences(results_to_tally, index)
+
+    return results or [], page_count, result_count
+
+
+class SearchSpec(NamedTuple):
+    """The arguments of ``search`` for one of the searches of ``search_many``."""
+
+    search_params: media_serializers.MediaSearchRequestSerializer
+    index: Literal["image", "audio"]
+    page_size: int
+    filter_dead: bool
+    page: int = 1
+
+
+def search_many(
+    specs: list[SearchSpec],
+    ip: int,
+    request: Request,
+) -> list[tuple[list[Hit], int, int]]:
+    """
+    Perform several searches with a single Elasticsearch multi search request.
+
+    The first page of hits of every search is fetched in one round trip. Only
+    searches that lost too many results to dead links make further requests, to
+    backfill their page. The search result cache is not used.
+
+    :param specs: The parameters of the searches, see ``search``.
+    :param ip: The user's hashed IP, see ``search``.
+    :param request: Django's request object.
+    :return: For each search, in the same order as ``specs``, a tuple with a List of
+    Hits from elasticsearch, the total count of pages, and number of results.
+    """
+    multi_search = MultiSearch().params(request_timeout=7)
+    prepared = []
+    for spec in specs:
+        index = _resolve_index(spec.index, spec.search_params)
+        s, query_hash, start, end = _prepare_search(
+            spec.search_params, index, spec.page_size, ip, spec.filter_dead, spec.page
+        )
+        multi_search = multi_search.add(s)
+        prepared.append((index, s, query_hash, start, end))
+
+    try:
+        with timing.span("es"):
+            search_responses = multi_search.execute()
+    except TransportError as e:
+        raise ValueError(e)
+
+    out = []
+    for spec, (index, s, query_hash, start, end), search_response in zip(
+        specs, prepared, search_responses
+    ):
+        results, page_count, result_count = _process_search_response(
+            s,
+            query_hash,
+            start,
+            end,
+            spec.page_size,
+            spec.page,
+            search_response,
+            request,
+            spec.filter_dead,
+        )
+        _tally_results(results, index, spec.page_size, spec.page)
+        out.append((results or [], page_count, result_count))
+    return out
+
+
+def _build_point_in_time_search(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: str,
+) -> Search:
+    # Searches with a point in time must not name the index.
+    s = _build_search(search_params, index).index()
+    if search_params.validated_data["sort_by"] != INDEXED_ON:
+        s = s.sort("_score")
+    return s
+
+
+def _get_hits_with_fields_matched(search_response: Response) -> list[Hit]:
+    results = []
+    for res in search_response:
+        _set_fields_matched(res)
+        results.append(res)
+    return results
+
 
-    search_client = Search(index=index)
+def _execute_search_after(
+    s: Search, pit_id: str, search_after: list | None, size: int
+) -> Response:
+    s = s.extra(pit={"id": pit_id, "keep_alive": CURSOR_KEEP_ALIVE}, size=size)
+    if search_after is not None:
+        s = s.extra(search_after=search_after)
+    s = s.params(request_timeout=7)
+    return s.execute()
 
-    # Convert UUID to sequential ID.
-    item = search_client
-    item = item.query("match", identifier=uuid)
-    _id = item.execute().hits[0].id
 
-    s = search_client
+def search_with_cursor(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: Literal["image", "audio"],
+    page_size: int,
+) -> tuple[list[Hit], int, str | None]:
+    """
+    Fetch the page of results after the cursor of the search parameters.
+
+    Instead of ``from`` and ``size``, pages are fetched from a point in time of the
+    index with ``search_after``, so every page costs the same to Elasticsearch, no
+    matter how deep. The point in time is opened for the first page and closed
+    once the results are exhausted. Dead links are not filtered.
+
+    :param search_params: Search parameters, including the ``cursor``.
+    :param index: The Elasticsearch index to search (e.g. 'image')
+    :param page_size: The number of results to return per page.
+    :return: Tuple with a List of Hits from elasticsearch, the total number of
+    results, and the cursor for the next page, if there is one.
+    """
+    index = _resolve_index(index, search_params)
+    params_hash = search_cursor.get_params_hash(search_params.initial_data)
+
+    if cursor := search_params.validated_data["cursor"]:
+        state = search_cursor.loads(cursor, params_hash)
+        pit_id, search_after = state["pit"], state["search_after"]
+    else:
+        pit = settings.ES.open_point_in_time(index=index, keep_alive=CURSOR_KEEP_ALIVE)
+        pit_id, search_after = pit["id"], None
+
+    s = _build_point_in_time_search(search_params, index)
+    try:
+        search_response = _execute_search_after(s, pit_id, search_after, page_size)
+    except NotFoundError:
+        raise search_cursor.InvalidCursor("The cursor has expired.")
+    except RequestError as e:
+        raise ValueError(e)
+
+    results = _get_hits_with_fields_matched(search_response)
+
+    # Elasticsearch may return a new ID for the point in time, to use from now on.
+    pit_id = search_response.to_dict().get("pit_id", pit_id)
+    if len(results) < page_size:
+        settings.ES.close_point_in_time(body={"id": pit_id})
+        next_cursor = None
+    else:
+        next_cursor = search_cursor.dumps(
+            pit_id, list(results[-1].meta.sort), params_hash
+        )
+
+    return results, search_response.hits.total.value, next_cursor
+
+
+def export(
+    search_params: media_serializers.MediaSearchRequestSerializer,
+    index: Literal["image", "audio"],
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[list[Hit]]:
+    """
+    Iterate over all the results of the search parameters, in batches.
+
+    Like ``search_with_cursor``, the results are read from a point in time with
+    ``search_after``, which is closed once the iteration stops. Dead links are not
+    filtered.
+
+    :param search_params: Search parameters, see ``search``.
+    :param index: The Elasticsearch index to search (e.g. 'image')
+    :param batch_size: The number of results to fetch from Elasticsearch at a time.
+    :return: An iterator over lists of Hits from elasticsearch.
+    """
+    index = _resolve_index(index, search_params)
+    s = _build_point_in_time_search(search_params, index)
+    pit = settings.ES.open_point_in_time(index=index, keep_alive=CURSOR_KEEP_ALIVE)
+    pit_id, search_after = pit["id"], None
+    try:
+        while True:
+            try:
+                search_response = _execute_search_after(
+                    s, pit_id, search_after, batch_size
+                )
+            except RequestError as e:
+                raise ValueError(e)
+            pit_id = search_response.to_dict().get("pit_id", pit_id)
+
+            results = _get_hits_with_fields_matched(search_response)
+            if results:
+                yield results
+            if len(results) < batch_size:
+                return
+            search_after = list(results[-1].meta.sort)
+    finally:
+        settings.ES.close_point_in_time(body={"id": pit_id})
+
+
+def _build_related_search(document_id, index) -> Search:
+    s = Search(index=index)
     s = s.query(
         MoreLikeThis(
             fields=["tags.name", "title", "creator"],
-            like={"_index": index, "_id": _id},
+            like={"_index": index, "_id": document_id},
             min_term_freq=1,
             max_query_terms=50,
         )
     )
+    return _filter_related_search(s)
+
+
+def _filter_related_search(s: Search) -> Search:
     # Never show mature content in recommendations.
     s = s.exclude("term", mature=True)
     s = _exclude_filtered(s)
+    # The related media of an item are the same for all users.
+    if settings.ENABLE_ES_REQUEST_CACHE:
+        s = s.params(request_cache=True)
+    return s
+
+
+def _search_related_documents(
+    document_id, index
+) -> tuple[dict[str, Hit], tuple[list[str], int]]:
+    """
+    Get the documents most similar to the given one.
+
+    Uses the IDs precomputed by the ingestion server for the document, if any, and
+    otherwise the results of a ``MoreLikeThis`` query. The precomputed IDs, the
+    documents they point to and the ``MoreLikeThis`` results are all fetched in one
+    multi search, so that this takes a single round trip either way, like the
+    related media query without the cache.
+
+    :return: Tuple with the related documents by ID, and a tuple with the IDs of the
+    related documents, best match first, and the total number of related documents.
+    """
+    precomputed = Search(index=index).filter("ids", values=[document_id])
+    precomputed = precomputed.source(["related"])[:1]
+    # A terms lookup reads the IDs from the ``related`` field of the document. The
+    # ingestion server stores as many IDs as there are related candidates.
+    lookup = Search(index=index).filter(
+        "terms", _id={"index": index, "id": str(document_id), "path": "related"}
+    )
+    lookup = _filter_related_search(lookup)[:RELATED_CANDIDATES]
+    more_like_this = _build_related_search(document_id, index)[:RELATED_CANDIDATES]
+
+    multi_search = MultiSearch().add(precomputed).add(lookup).add(more_like_this)
+    document_response, lookup_response, related_response = multi_search.execute()
+
+    documents = document_response.hits
+    if related := documents and documents[0].to_dict().get("related"):
+        return {hit.meta.id: hit for hit in lookup_response}, (related, len(related))
+
+    hits = {hit.meta.id: hit for hit in related_response}
+    return hits, (list(hits), related_response.hits.total.value)
+
+
+def _get_related_documents(related_ids, index) -> dict[str, Hit]:
+    if not related_ids:
+        return {}
+
+    s = Search(index=index).filter("ids", values=related_ids)
+    # Items may have been marked as mature or filtered since being cached.
+    s = _filter_related_search(s)[: len(related_ids)]
+    return {hit.meta.id: hit for hit in s.execute()}
+
+
+def _cached_related_media(document_id, index, filter_dead):
+    page_size = 10
+
+    key = f"related_media:{search_cache.get_index_generation(index)}:{document_id}"
+    cached = cache.get(key)
+    if cached is None:
+        hits, cached = _search_related_documents(document_id, index)
+        cache.set(key, cached, timeout=settings.RELATED_MEDIA_CACHE_TTL)
+    else:
+        hits = _get_related_documents(cached[0], index)
+    related_ids, result_count = cached
+    results = [hits[_id] for _id in related_ids if _id in hits]
+    if not results:
+        return [], 0
+
+    if filter_dead:
+        query_hash = _get_query_hash({"related_ids": related_ids}, index)
+        check_dead_links(query_hash, 0, results, [res.url for res in results])
+
+    results = results[:page_size]
+    if len(results) < page_size:
+        result_count = len(results)
+    return results, result_count
+
+
+def related_media(document_id, index, request, filter_dead):
+    """
+    Find the search results related to a media item.
+
+    When ``ENABLE_RELATED_MEDIA_CACHE`` is set, the IDs of the related documents are
+    cached until the index is refreshed, and only the documents themselves are
+    fetched from Elasticsearch.
+
+    :param document_id: The Elasticsearch ID of the media item, which is the ID of
+    its DB row.
+    """
+
+    if settings.ENABLE_RELATED_MEDIA_CACHE:
+        return _cached_related_media(document_id, index, filter_dead)
+
+    s, query_hash = _build_hashed_related_search(document_id, index, filter_dead)
     page_size = 10
     page = 1
-    start, end = _get_query_slice(s, page_size, page, filter_dead)
+    start, end = _get_query_slice(query_hash, page_size, page, filter_dead)
     s = s[start:end]
-    response = s.execute()
+    response = _execute(s)
     results = _post_process_results(
-        s, start, end, page_size, response, request, filter_dead
+        s, query_hash, start, end, page_size, response, request, filter_dead
     )
 
     result_count, _ = _get_result_and_page_count(response, results, page_size, page)
@@ -507,6 +1208,49 @@ def related_media(uuid, index, request, filter_dead):
     return results or [], result_count
 
 
+async def arelated_media(document_id, index, request, filter_dead):
+    """
+    Async variant of ``related_media``.
+
+    When ``ENABLE_RELATED_MEDIA_CACHE`` is set, the related media are fetched with
+    the sync clients, in a thread.
+    """
+
+    if settings.ENABLE_RELATED_MEDIA_CACHE:
+        return await sync_to_async(_cached_related_media)(
+            document_id, index, filter_dead
+        )
+
+    s, query_hash = await sync_to_async(_build_hashed_related_search)(
+        document_id, index, filter_dead
+    )
+    page_size = 10
+    page = 1
+    start, end = await _aget_query_slice(query_hash, page_size, page, filter_dead)
+    s = s[start:end]
+    response = await _aexecute(s)
+    results = await _apost_process_results(
+        s, query_hash, start, end, page_size, response, request, filter_dead
+    )
+
+    result_count, _ = _get_result_and_page_count(response, results, page_size, page)
+
+    return results or [], result_count
+
+
+def _build_hashed_related_search(
+    document_id, index, filter_dead
+) -> tuple[Search, str | None]:
+    """Build the related media query, and its hash if dead links are filtered."""
+
+    with timing.span("query_build"):
+        s = _build_related_search(document_id, index)
+        query_hash = (
+            _get_query_hash({"related_to": document_id}, index) if filter_dead else None
+        )
+    return s, query_hash
+
+
 def get_sources(index):
     """
     Given an index, find all available data sources and return their counts.
@@ -515,6 +1259,9 @@ def get_sources(index):
     :return: A dictionary mapping sources to the count of their images.`
     """
     source_cache_name = "sources-" + index
+    if (sources := local_cache.get(source_cache_name)) is not None:
+        return sources
+
     cache_fetch_failed = False
     try:
         sources = cache.get(key=source_cache_name)
@@ -547,6 +1294,7 @@ def get_sources(index):
             buckets = [{"key": "none_found", "doc_count": 0}]
         sources = {result["key"]: result["doc_count"] for result in buckets}
         cache.set(key=source_cache_name, timeout=SOURCE_CACHE_TIMEOUT, value=sources)
+    local_cache.set(source_cache_name, sources)
     return sources
 
 
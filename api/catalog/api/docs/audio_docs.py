@@ -16,6 +16,7 @@ from catalog.api.examples import (
     audio_stats_200_example,
     audio_stats_curl,
     audio_waveform_200_example,
+    audio_waveform_202_example,
     audio_waveform_404_example,
     audio_waveform_curl,
 )
@@ -23,6 +24,7 @@ from catalog.api.serializers.audio_serializers import (
     AudioReportRequestSerializer,
     AudioSearchRequestSerializer,
     AudioSerializer,
+    AudioWaveformPendingSerializer,
     AudioWaveformSerializer,
 )
 from catalog.api.serializers.error_serializers import (
@@ -112,7 +114,18 @@ thumbnail = extend_schema(
 waveform = custom_extend_schema(
     res={
         200: (AudioWaveformSerializer, audio_waveform_200_example),
+        202: (AudioWaveformPendingSerializer, audio_waveform_202_example),
         404: (NotFoundErrorSerializer, audio_waveform_404_example),
     },
     eg=[audio_waveform_curl],
 )
+
+export = extend_schema(
+    parameters=[AudioSearchRequestSerializer],
+    responses={
+        200: OpenApiResponse(
+            description="All the search results, as newline-delimited JSON. "
+            "Requires authentication."
+        )
+    },
+)
@@ -122,3 +122,13 @@ oembed = custom_extend_schema(
 watermark = custom_extend_schema(
     deprecated=True,
 )
+
+export = extend_schema(
+    parameters=[ImageSearchRequestSerializer],
+    responses={
+        200: OpenApiResponse(
+            description="All the search results, as newline-delimited JSON. "
+            "Requires authentication."
+        )
+    },
+)
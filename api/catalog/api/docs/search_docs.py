@@ -0,0 +1,20 @@
+from catalog.api.docs.base_docs import custom_extend_schema
+from catalog.api.serializers.error_serializers import (
+    InputErrorSerializer,
+    InternalServerErrorSerializer,
+)
+from catalog.api.serializers.search_serializers import (
+    BatchSearchRequestSerializer,
+    BatchSearchResponseSerializer,
+)
+
+
+batch_search = custom_extend_schema(
+    operation_id="batch_search",
+    request=BatchSearchRequestSerializer,
+    res={
+        200: (BatchSearchResponseSerializer, None),
+        400: (InputErrorSerializer, None),
+        500: (InternalServerErrorSerializer, None),
+    },
+)
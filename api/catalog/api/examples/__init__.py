@@ -17,6 +17,7 @@ from catalog.api.examples.audio_responses import (
     audio_search_400_example,
     audio_stats_200_example,
     audio_waveform_200_example,
+    audio_waveform_202_example,
     audio_waveform_404_example,
 )
 from catalog.api.examples.image_requests import (
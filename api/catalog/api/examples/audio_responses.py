@@ -159,6 +159,12 @@ audio_waveform_200_example = {
     }
 }
 
+audio_waveform_202_example = {
+    "application/json": {
+        "detail": "The waveform is being generated, retry after 5 seconds."
+    }
+}
+
 audio_waveform_404_example = {
     "application/json": {"detail": "An internal server error occurred."}
 }
@@ -0,0 +1,43 @@
+from django.utils.decorators import sync_and_async_middleware
+
+from asgiref.sync import iscoroutinefunction
+
+from catalog.api.utils import timing
+
+
+def _finish(request, response, timings: timing.Timings):
+    # Only requests that went through the timed stages, i.e. searches, are reported.
+    if not timings.durations:
+        return
+    timings.finish()
+    response["Server-Timing"] = timings.get_header()
+    if request.resolver_match:
+        timing.record(request.resolver_match.url_name, timings)
+
+
+# Times the stages of search requests, see ``catalog.api.utils.timing``.
+@sync_and_async_middleware
+def server_timing_middleware(get_response):
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            timings, token = timing.start()
+            try:
+                response = await get_response(request)
+            finally:
+                timing.stop(token)
+            _finish(request, response, timings)
+            return response
+
+    else:
+
+        def middleware(request):
+            timings, token = timing.start()
+            try:
+                response = get_response(request)
+            finally:
+                timing.stop(token)
+            _finish(request, response, timings)
+            return response
+
+    return middleware
@@ -3,10 +3,11 @@ import mimetypes
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils.html import format_html
 
 from elasticsearch import Elasticsearch, TransportError
+from elasticsearch.helpers import bulk
 
 from catalog.api.models.base import OpenLedgerModel
 from catalog.api.models.mixins import (
@@ -14,6 +15,7 @@ from catalog.api.models.mixins import (
     IdentifierMixin,
     MediaMixin,
 )
+from catalog.api.utils import hydration
 from catalog.api.utils.attribution import get_attribution_text
 from catalog.api.utils.licenses import get_license_url
 
@@ -246,6 +248,79 @@ class AbstractMediaReport(models.Model):
         if self.status != PENDING:
             same_reports.update(status=self.status)
 
+    @classmethod
+    def moderate(
+        cls, reports: models.QuerySet, status: str, refresh: bool | str = "wait_for"
+    ) -> int:
+        """
+        Apply the same decision to many pending reports.
+
+        This has the effect of saving each report with the new status, but the
+        Elasticsearch documents of all the media items are updated with a single
+        bulk request, instead of refreshing the indexes for every media item.
+
+        :param reports: the reports to moderate; those not pending are skipped
+        :param status: the new status of the reports
+        :param refresh: the ``refresh`` of the bulk request, see
+        ``perform_bulk_index_update``
+        :return: the number of reports moderated
+        """
+        reports = list(reports.filter(status=PENDING))
+        media_items = cls.media_class.objects.in_bulk(
+            {report.media_obj_id for report in reports}, field_name="identifier"
+        )
+        # Reports of media items that no longer exist cannot be moderated.
+        reports = [report for report in reports if report.media_obj_id in media_items]
+        if not reports:
+            return 0
+
+        subreport_class = {
+            MATURE_FILTERED: cls.mature_class,
+            DEINDEXED: cls.deleted_class,
+        }.get(status)
+        subreports = []
+        actions = []
+        if subreport_class:
+            existing = set(
+                subreport_class.objects.filter(
+                    media_obj_id__in=media_items
+                ).values_list("media_obj_id", flat=True)
+            )
+            subreports = [
+                subreport_class(media_obj=media)
+                for identifier, media in media_items.items()
+                if identifier not in existing
+            ]
+        for subreport in subreports:
+            if status == MATURE_FILTERED:
+                actions += subreport._get_index_actions("update", doc={"mature": True})
+            else:
+                actions += subreport._get_index_actions("delete")
+
+        perform_bulk_index_update(actions, refresh)
+
+        # Like ``save``, also close the pending reports of the same media items.
+        same_reports = models.Q(pk__in=[report.pk for report in reports])
+        for report in reports:
+            same_report = models.Q(media_obj_id=report.media_obj_id)
+            if status != DEINDEXED:
+                same_report &= models.Q(reason=report.reason)
+            same_reports |= same_report
+        with transaction.atomic():
+            if subreports:
+                subreport_class.objects.bulk_create(subreports)
+            cls.objects.filter(same_reports, status=PENDING).update(status=status)
+            if status == DEINDEXED:
+                cls.media_class.objects.filter(identifier__in=media_items).delete()
+
+        if subreports:
+            hydration.invalidate_many(
+                cls.media_class,
+                [subreport.media_obj_id for subreport in subreports],
+                subreports[0].indexes,
+            )
+        return len(reports)
+
 
 class PerformIndexUpdateMixin:
     @property
@@ -257,7 +332,8 @@ class PerformIndexUpdateMixin:
         Call ``method`` on the Elasticsearch client.
 
         Automatically handles ``DoesNotExist`` warnings, forces a refresh,
-        and calls the method for origin and filtered indexes.
+        and calls the method for origin and filtered indexes. The cached DB row of
+        the media item, if any, is invalidated.
         """
         logger = parent_logger.getChild("PerformIndexUpdateMixin._perform_index_update")
         es: Elasticsearch = settings.ES
@@ -290,6 +366,48 @@ class PerformIndexUpdateMixin:
                 else:
                     raise e
 
+        hydration.invalidate(self.media_class, self.media_obj_id, self.indexes)
+
+    def _get_index_actions(self, op_type: str, **action_args) -> list[dict]:
+        """
+        Get the actions of ``_perform_index_update`` for the ``_bulk`` API.
+
+        :param op_type: the operation, ``update`` or ``delete``
+        :param action_args: the body of the operation, like the partial ``doc``
+        :return: the actions, one per index
+        """
+        return [
+            {"_op_type": op_type, "_index": index, "_id": self.media_obj.id}
+            | action_args
+            for index in self.indexes
+        ]
+
+
+def perform_bulk_index_update(actions: list[dict], refresh: bool | str = "wait_for"):
+    """
+    Apply the actions of many index updates with the ``_bulk`` API.
+
+    Unlike ``PerformIndexUpdateMixin._perform_index_update``, the indexes are not
+    refreshed for every document; the changes are searchable after the next
+    periodic refresh. Missing documents are logged, other failures are raised.
+
+    :param actions: the actions, see ``PerformIndexUpdateMixin._get_index_actions``
+    :param refresh: ``"wait_for"`` to return once the changes are searchable, or
+    ``False`` to return right away
+    """
+    logger = parent_logger.getChild("perform_bulk_index_update")
+    if not actions:
+        return
+
+    es: Elasticsearch = settings.ES
+    _, not_found = bulk(es, actions, refresh=refresh, ignore_status=(404,))
+    for item in not_found:
+        ((op_type, result),) = item.items()
+        logger.warning(
+            f"Document with _id {result['_id']} not found "
+            f"in {result['_index']} index. No {op_type} performed."
+        )
+
 
 class AbstractDeletedMedia(PerformIndexUpdateMixin, OpenLedgerModel):
     """
@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 
 from catalog.api.constants.media_types import MEDIA_TYPE_CHOICES
 from catalog.api.models.base import OpenLedgerModel
+from catalog.api.utils import local_cache
 
 
 class ContentProvider(models.Model):
@@ -36,6 +37,21 @@ class ContentProvider(models.Model):
     class Meta:
         db_table = "content_provider"
 
+    cache_key = "content_providers"
+    """the key of all the providers in ``local_cache``"""
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        transaction.on_commit(self.invalidate_cache)
+
+    def delete(self, *args, **kwargs):
+        super().delete(*args, **kwargs)
+        transaction.on_commit(self.invalidate_cache)
+
+    @classmethod
+    def invalidate_cache(cls):
+        local_cache.invalidate(cls.cache_key)
+
 
 class Tag(OpenLedgerModel):
     foreign_identifier = models.CharField(max_length=255, blank=True, null=True)
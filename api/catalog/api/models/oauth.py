@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 
 from oauth2_provider.models import AbstractApplication
 
+from catalog.api.utils import local_cache
+from catalog.api.utils.oauth2_helper import get_cache_key
+
 
 class OAuth2Registration(models.Model):
     """Information about API key applicants."""
@@ -39,6 +42,19 @@ class ThrottledApplication(AbstractApplication):
     )
     verified = models.BooleanField(default=False)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        transaction.on_commit(self.invalidate_token_info)
+
+    def invalidate_token_info(self):
+        """
+        Evict the cached information about the access tokens of this application,
+        which includes its rate limit model and verification status.
+        """
+        tokens = self.accesstoken_set.values_list("token", flat=True)
+        if keys := [get_cache_key(token) for token in tokens]:
+            local_cache.invalidate(*keys)
+
 
 class OAuth2Verification(models.Model):
     """
@@ -184,3 +184,9 @@ class AudioWaveformSerializer(serializers.Serializer):
     @staticmethod
     def get_len(obj) -> int:
         return len(obj.get("points", []))
+
+
+class AudioWaveformPendingSerializer(serializers.Serializer):
+    """Returned while the waveform is being generated."""
+
+    detail = serializers.CharField(help_text="The description of the status.")
@@ -1,4 +1,14 @@
+from collections.abc import Callable, Mapping
+from types import SimpleNamespace
+from typing import Any
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.manager import BaseManager
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import Hyperlink
+
+from catalog.api.serializers.fields import SchemableHyperlinkedIdentityField
 
 
 class BaseModelSerializer(serializers.ModelSerializer):
@@ -22,3 +32,148 @@ class BaseModelSerializer(serializers.ModelSerializer):
         if doc := getattr(model_class, field_name).__doc__:
             kwargs.setdefault("help_text", doc)
         return klass, kwargs
+
+
+_PLACEHOLDER_IDENTIFIER = "00000000-0000-4000-8000-000000000000"
+"""an identifier matching ``MediaViewSet.lookup_value_regex``, to build URL templates"""
+
+
+def _compile_field(field: serializers.Field) -> Callable[[Any], Any]:
+    """
+    Build a function equivalent to getting the attribute of a field from an instance
+    and converting it with the field's ``to_representation``, for the field types
+    found in search results.
+
+    :param field: the serializer field
+    :return: a function of the instance returning the representation of the field;
+    it raises ``SkipField`` if the field should be omitted
+    """
+
+    if isinstance(field, SchemableHyperlinkedIdentityField):
+        return _compile_hyperlink(field)
+
+    if isinstance(field, serializers.ListSerializer) and _is_compilable(field.child):
+        child_to_representation = _compile_fields(field.child)
+        get_list = _compile_getter(field)
+
+        def to_representation(instance):
+            if (items := get_list(instance)) is None:
+                return None
+            if isinstance(items, BaseManager):
+                items = items.all()
+            return [child_to_representation(item) for item in items]
+
+        return to_representation
+
+    if _is_compilable(field):
+        convert = _compile_fields(field)
+    elif type(field).to_representation is serializers.CharField.to_representation:
+        convert = str
+    else:
+        convert = field.to_representation
+    get = _compile_getter(field)
+    return lambda instance: (
+        None if (value := get(instance)) is None else convert(value)
+    )
+
+
+def _compile_getter(field: serializers.Field) -> Callable[[Any], Any]:
+    """
+    Build a function equivalent to ``field.get_attribute`` for fields reading a single
+    attribute, which reads it without going through DRF's generic lookup.
+    """
+
+    if len(field.source_attrs) != 1:
+        return field.get_attribute
+
+    attr = field.source_attrs[0]
+
+    def get(instance):
+        try:
+            if isinstance(instance, Mapping):
+                value = instance[attr]
+            else:
+                value = getattr(instance, attr)
+        except (AttributeError, KeyError, ObjectDoesNotExist):
+            # Let DRF apply the field's default or skip the field.
+            return field.get_attribute(instance)
+        if callable(value):
+            return field.get_attribute(instance)
+        return value
+
+    return get
+
+
+def _compile_hyperlink(field: SchemableHyperlinkedIdentityField) -> Callable:
+    """
+    Build a function returning the hyperlink of an instance by substituting its
+    lookup value in a URL resolved once, instead of calling ``reverse`` for each
+    instance.
+    """
+
+    template = None
+
+    def to_representation(instance):
+        nonlocal template
+        if hasattr(instance, "pk") and instance.pk in (None, ""):
+            return None
+        if template is None:
+            placeholder = SimpleNamespace(
+                **{field.lookup_field: _PLACEHOLDER_IDENTIFIER}
+            )
+            template = str(field.to_representation(placeholder)).split(
+                _PLACEHOLDER_IDENTIFIER
+            )
+        lookup_value = str(getattr(instance, field.lookup_field))
+        return Hyperlink(lookup_value.join(template), instance)
+
+    return to_representation
+
+
+def _is_compilable(serializer) -> bool:
+    """Whether the fields of the serializer can be compiled by ``_compile_fields``."""
+
+    return isinstance(serializer, serializers.Serializer) and type(
+        serializer
+    ).to_representation in (
+        serializers.Serializer.to_representation,
+        CompiledSerializerMixin.to_representation,
+    )
+
+
+def _compile_fields(serializer: serializers.Serializer) -> Callable[[Any], dict]:
+    """Build a function equivalent to ``Serializer.to_representation``."""
+
+    compiled = [
+        (field.field_name, _compile_field(field))
+        for field in serializer._readable_fields
+    ]
+
+    def to_representation(instance):
+        output = {}
+        for field_name, to_representation in compiled:
+            try:
+                output[field_name] = to_representation(instance)
+            except SkipField:
+                pass
+        return output
+
+    return to_representation
+
+
+class CompiledSerializerMixin:
+    """
+    Serializes instances with functions built once per serializer from its fields,
+    instead of DRF's generic field by field conversion.
+
+    With ``many=True``, the same serializer converts each item of the list, so that
+    work that only depends on the fields and the request, like resolving the URL
+    of the hyperlinks, is done once per page of results.
+    """
+
+    _compiled_to_representation = None
+
+    def to_representation(self, instance):
+        if self._compiled_to_representation is None:
+            self._compiled_to_representation = _compile_fields(self)
+        return self._compiled_to_representation(instance)
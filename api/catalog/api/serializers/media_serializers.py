@@ -17,8 +17,9 @@ from catalog.api.constants.sorting import (
 )
 from catalog.api.controllers import search_controller
 from catalog.api.models.media import AbstractMedia
-from catalog.api.serializers.base import BaseModelSerializer
+from catalog.api.serializers.base import BaseModelSerializer, CompiledSerializerMixin
 from catalog.api.serializers.fields import SchemableHyperlinkedIdentityField
+from catalog.api.utils import search_cursor
 from catalog.api.utils.help_text import make_comma_separated_help_text
 from catalog.api.utils.licenses import get_license_url
 from catalog.api.utils.url import add_protocol
@@ -68,6 +69,7 @@ class MediaSearchRequestSerializer(serializers.Serializer):
         # "unstable__include_sensitive_results",
         "page_size",
         "page",
+        "cursor",
     ]
     """
     Keep the fields names in sync with the actual fields below as this list is
@@ -193,6 +195,16 @@ class MediaSearchRequestSerializer(serializers.Serializer):
         max_value=settings.MAX_PAGINATION_DEPTH,
         min_value=1,
     )
+    cursor = serializers.CharField(
+        label="cursor",
+        help_text="Walk through all the results instead of a limited number of "
+        "pages. Pass an empty cursor for the first page, then the `next_cursor` "
+        "of the previous page. Cannot be used with `page`. Dead links are not "
+        "filtered. Requires authentication.",
+        required=False,
+        allow_blank=True,
+        default=None,
+    )
 
     def is_request_anonymous(self):
         request = self.context.get("request")
@@ -297,6 +309,26 @@ class MediaSearchRequestSerializer(serializers.Serializer):
     def validate_extension(value):
         return value.lower()
 
+    def validate_cursor(self, value):
+        if value is None:
+            return value
+        if self.is_request_anonymous():
+            raise NotAuthenticated(
+                detail="Cursor pagination requires authentication.",
+            )
+        if "page" in self.initial_data:
+            raise serializers.ValidationError(
+                "`cursor` and `page` must not both be defined."
+            )
+        if value:
+            try:
+                search_cursor.loads(
+                    value, search_cursor.get_params_hash(self.initial_data)
+                )
+            except search_cursor.InvalidCursor as e:
+                raise serializers.ValidationError(str(e))
+        return value
+
     def validate(self, data):
         data = super().validate(data)
         errors = {}
@@ -375,7 +407,7 @@ class TagSerializer(serializers.Serializer):
     )
 
 
-class MediaSerializer(BaseModelSerializer):
+class MediaSerializer(CompiledSerializerMixin, BaseModelSerializer):
     """
     This serializer serializes a single media file.
 
@@ -0,0 +1,42 @@
+from rest_framework import serializers
+
+from catalog.api.constants.media_types import MEDIA_TYPES
+
+
+MAX_BATCH_SEARCHES = 10
+
+
+class SearchSpecSerializer(serializers.Serializer):
+    """One of the searches of a batch search."""
+
+    media_type = serializers.ChoiceField(
+        choices=MEDIA_TYPES,
+        help_text="The type of media to search.",
+    )
+    params = serializers.DictField(
+        default=dict,
+        help_text="The parameters of the search, as accepted in the query string of "
+        "the search endpoint of the media type. `cursor` is not supported.",
+    )
+
+
+class BatchSearchRequestSerializer(serializers.Serializer):
+    """This serializer parses and validates the searches of a batch search."""
+
+    searches = serializers.ListField(
+        child=SearchSpecSerializer(),
+        min_length=1,
+        max_length=MAX_BATCH_SEARCHES,
+        help_text="The searches to perform, at most "
+        f"{MAX_BATCH_SEARCHES} per request.",
+    )
+
+
+class BatchSearchResponseSerializer(serializers.Serializer):
+    """This serializer returns the results of a batch search."""
+
+    results = serializers.ListField(
+        child=serializers.DictField(),
+        help_text="For each search, in the order of the request, the paginated "
+        "response of the search endpoint of its media type.",
+    )
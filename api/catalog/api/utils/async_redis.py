@@ -0,0 +1,31 @@
+"""Async Redis clients, for the views served under ASGI."""
+
+import asyncio
+import weakref
+
+from django.conf import settings
+
+from redis.asyncio import Redis
+
+
+# Connections are bound to the event loop that opened them, so each loop gets its
+# own clients. ASGI servers run a single loop per worker process.
+_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, Redis]
+] = weakref.WeakKeyDictionary()
+
+
+def get_redis_connection(alias: str = "default") -> Redis:
+    """
+    Get the async counterpart of ``django_redis.get_redis_connection``.
+
+    The client connects to the same Redis database as the cache with the given alias
+    and must be used from the running event loop.
+
+    :param alias: the alias of the cache in ``settings.CACHES``
+    :return: the async Redis client
+    """
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    if alias not in clients:
+        clients[alias] = Redis.from_url(settings.CACHES[alias]["LOCATION"])
+    return clients[alias]
@@ -1,19 +1,28 @@
-import asyncio
 import logging
 import time
 
 from django.conf import settings
 
-import aiohttp
 import django_redis
-from asgiref.sync import async_to_sync
 from decouple import config
 from elasticsearch_dsl.response import Hit
 
+from catalog.api.utils import async_redis, timing
+from catalog.api.utils.check_dead_links.link_validator import LinkValidator
 from catalog.api.utils.check_dead_links.provider_status_mappings import (
     provider_status_mappings,
 )
-from catalog.api.utils.dead_link_mask import get_query_mask, save_query_mask
+from catalog.api.utils.check_dead_links.validation_queue import (
+    aenqueue,
+    clear_pending,
+    dequeue,
+    enqueue,
+)
+from catalog.api.utils.dead_link_mask import (
+    asave_query_mask,
+    mark_dead_results,
+    save_query_mask,
+)
 
 
 parent_logger = logging.getLogger(__name__)
@@ -25,74 +34,43 @@ HEADERS = {
 }
 
 
-def _get_cached_statuses(redis, image_urls):
-    cached_statuses = redis.mget([CACHE_PREFIX + url for url in image_urls])
+def _decode_statuses(cached_statuses: list[bytes | None]) -> list[int | None]:
     return [int(b.decode("utf-8")) if b is not None else None for b in cached_statuses]
 
 
-def _get_expiry(status, default):
-    return config(f"LINK_VALIDATION_CACHE_EXPIRY__{status}", default=default, cast=int)
-
-
-async def _head(url: str, session: aiohttp.ClientSession) -> tuple[str, int]:
-    try:
-        async with session.head(url, allow_redirects=False) as response:
-            return url, response.status
-    except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
-        _log_validation_failure(exception)
-        return url, -1
+def _get_cached_statuses(redis, image_urls):
+    cached_statuses = redis.mget([CACHE_PREFIX + url for url in image_urls])
+    return _decode_statuses(cached_statuses)
 
 
-# https://stackoverflow.com/q/55259755
-@async_to_sync
-async def _make_head_requests(urls: list[str]) -> list[tuple[str, int]]:
-    tasks = []
-    timeout = aiohttp.ClientTimeout(total=2)
-    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout) as session:
-        tasks = [asyncio.ensure_future(_head(url, session)) for url in urls]
-        responses = asyncio.gather(*tasks)
-        await responses
-    return responses.result()
+async def _aget_cached_statuses(redis, image_urls):
+    cached_statuses = await redis.mget([CACHE_PREFIX + url for url in image_urls])
+    return _decode_statuses(cached_statuses)
 
 
-def check_dead_links(
-    query_hash: str, start_slice: int, results: list[Hit], image_urls: list[str]
-) -> None:
-    """
-    Make sure images exist before we display them.
-
-    Treat redirects as broken links since most of the time the redirect leads to a
-    generic "not found" placeholder.
-
-    Results are cached in redis and shared amongst all API servers in the
-    cluster.
-    """
-    logger = parent_logger.getChild("check_dead_links")
-    if not image_urls:
-        logger.info("no image urls to validate")
-        return
-
-    logger.debug("starting validation")
-    start_time = time.time()
+def _get_expiry(status, default):
+    return config(f"LINK_VALIDATION_CACHE_EXPIRY__{status}", default=default, cast=int)
 
-    # Pull matching images from the cache.
-    redis = django_redis.get_redis_connection("default")
-    cached_statuses = _get_cached_statuses(redis, image_urls)
-    logger.debug(f"len(cached_statuses)={len(cached_statuses)}")
 
-    # Anything that isn't in the cache needs to be validated via HEAD request.
-    to_verify = {}
-    for idx, url in enumerate(image_urls):
-        if cached_statuses[idx] is None:
-            to_verify[url] = idx
-    logger.debug(f"len(to_verify)={len(to_verify)}")
+# Shared by all the requests handled by this process.
+validator = LinkValidator(
+    HEADERS,
+    timeout=settings.LINK_VALIDATION_TIMEOUT,
+    deadline=settings.LINK_VALIDATION_DEADLINE,
+    max_connections=settings.LINK_VALIDATION_MAX_CONNECTIONS,
+    max_connections_per_host=settings.LINK_VALIDATION_MAX_CONNECTIONS_PER_HOST,
+    breaker_threshold=settings.LINK_VALIDATION_CIRCUIT_BREAKER_THRESHOLD,
+    breaker_cooldown=settings.LINK_VALIDATION_CIRCUIT_BREAKER_COOLDOWN,
+)
 
-    verified = _make_head_requests(to_verify.keys())
 
-    # Cache newly verified image statuses.
-    to_cache = {CACHE_PREFIX + url: status for url, status in verified}
+def _pipe_statuses(pipe, verified: list[tuple[str, int]]):
+    logger = parent_logger.getChild("_pipe_statuses")
+    # Links that were not requested have no status to cache.
+    to_cache = {
+        CACHE_PREFIX + url: status for url, status in verified if status is not None
+    }
 
-    pipe = redis.pipeline()
     if len(to_cache) > 0:
         pipe.mset(to_cache)
 
@@ -107,21 +85,67 @@ def check_dead_links(
         expiry = settings.LINK_VALIDATION_CACHE_EXPIRY_CONFIGURATION[status]
         logger.debug(f"caching status={status} expiry={expiry}")
         pipe.expire(key, expiry)
+    return pipe
+
+
+def _cache_statuses(redis, verified: list[tuple[str, int]]) -> None:
+    _pipe_statuses(redis.pipeline(), verified).execute()
+
 
-    pipe.execute()
+async def _acache_statuses(redis, verified: list[tuple[str, int]]) -> None:
+    await _pipe_statuses(redis.pipeline(), verified).execute()
+
+
+def _get_unverified(image_urls: list[str], cached_statuses: list[int | None]):
+    """Map the links that have no cached status to their index in the results."""
+
+    logger = parent_logger.getChild("check_dead_links")
+    logger.debug(f"len(cached_statuses)={len(cached_statuses)}")
+    # Anything that isn't in the cache needs to be validated via HEAD request.
+    to_verify = {}
+    for idx, url in enumerate(image_urls):
+        if cached_statuses[idx] is None:
+            to_verify[url] = idx
+    logger.debug(f"len(to_verify)={len(to_verify)}")
+    return to_verify
+
+
+def _merge_statuses(cached_statuses, to_verify, verified) -> None:
+    """Merge newly verified results with cached statuses."""
 
-    # Merge newly verified results with cached statuses
     for idx, url in enumerate(to_verify):
         cache_idx = to_verify[url]
         cached_statuses[cache_idx] = verified[idx][1]
 
-    # Create a new dead link mask
+
+def _count_validated(image_urls: list[str], to_verify: dict, to_queue: list) -> None:
+    """Count the links with a cached status, and those fetched or queued instead."""
+
+    timing.count(
+        "link_validation",
+        cached=len(image_urls) - len(to_verify),
+        fetched=len(to_verify) - len(to_queue),
+        queued=len(to_queue),
+    )
+
+
+def _remove_dead_results(
+    results: list[Hit], image_urls: list[str], cached_statuses: list[int | None]
+) -> list[int]:
+    """
+    Delete broken images from the search results, in place.
+
+    :return: the dead link mask of the results, before deletion
+    """
+    logger = parent_logger.getChild("check_dead_links")
     new_mask = [1] * len(results)
 
-    # Delete broken images from the search results response.
     for idx, _ in enumerate(cached_statuses):
         del_idx = len(cached_statuses) - idx - 1
         status = cached_statuses[del_idx]
+        if status is None:
+            # Queued for validation in the background, or not requested.
+            continue
 
         provider = results[del_idx]["provider"]
         status_mapping = provider_status_mappings[provider]
@@ -144,15 +168,65 @@ def check_dead_links(
             del results[del_idx]
             # update the result's position in the mask to indicate it is dead
             new_mask[del_idx] = 0
+    return new_mask
+
+
+def check_dead_links(
+    query_hash: str, start_slice: int, results: list[Hit], image_urls: list[str]
+) -> None:
+    """
+    Make sure images exist before we display them.
+
+    Treat redirects as broken links since most of the time the redirect leads to a
+    generic "not found" placeholder.
+
+    Results are cached in redis and shared amongst all API servers in the
+    cluster.
+
+    If ``ENABLE_BACKGROUND_LINK_VALIDATION`` is set, links without a cached status
+    are queued for ``validate_queued_links`` instead of being requested here.
+    """
+    logger = parent_logger.getChild("check_dead_links")
+    if not image_urls:
+        logger.info("no image urls to validate")
+        return
+
+    logger.debug("starting validation")
+    start_time = time.time()
+
+    with timing.span("link_validation"):
+        # Pull matching images from the cache.
+        redis = django_redis.get_redis_connection("default")
+        cached_statuses = _get_cached_statuses(redis, image_urls)
+        to_verify = _get_unverified(image_urls, cached_statuses)
+
+        to_queue = []
+        if settings.ENABLE_BACKGROUND_LINK_VALIDATION:
+            # Leave the unknown links in the results and let a worker validate them,
+            # so that they are masked out for the next page requested of this query.
+            to_queue = [
+                (idx, url, results[idx]["provider"]) for url, idx in to_verify.items()
+            ]
+        else:
+            verified = validator.validate(
+                [(url, results[idx]["provider"]) for url, idx in to_verify.items()]
+            )
+            _cache_statuses(redis, verified)
+            _merge_statuses(cached_statuses, to_verify, verified)
+        _count_validated(image_urls, to_verify, to_queue)
+
+    new_mask = _remove_dead_results(results, image_urls, cached_statuses)
+
+    # Merge and cache the new mask, keeping the leading part of the mask that
+    # represents results that come before the results we've verified this time
+    # around. Everything after is overwritten with our new results validation mask.
+    with timing.span("mask_write"):
+        save_query_mask(query_hash, new_mask, start_slice)
 
-    # Merge and cache the new mask
-    mask = get_query_mask(query_hash)
-    if mask:
-        # skip the leading part of the mask that represents results that come before
-        # the results we've verified this time around. Overwrite everything after
-        # with our new results validation mask.
-        new_mask = mask[:start_slice] + new_mask
-    save_query_mask(query_hash, new_mask)
+    # Queue only once the mask exists, so that the worker can update it.
+    if to_queue:
+        queued = enqueue(redis, query_hash, start_slice, to_queue)
+        logger.debug(f"queued={queued}")
 
     end_time = time.time()
     logger.debug(
@@ -163,6 +237,82 @@ def check_dead_links(
     )
 
 
-def _log_validation_failure(exception):
-    logger = parent_logger.getChild("_log_validation_failure")
-    logger.warning(f"Failed to validate image! Reason: {exception}")
+async def acheck_dead_links(
+    query_hash: str, start_slice: int, results: list[Hit], image_urls: list[str]
+) -> None:
+    """
+    Async variant of ``check_dead_links``.
+
+    The event loop is free to serve other requests while Redis and the providers of
+    the links respond.
+    """
+    logger = parent_logger.getChild("acheck_dead_links")
+    if not image_urls:
+        logger.info("no image urls to validate")
+        return
+
+    with timing.span("link_validation"):
+        redis = async_redis.get_redis_connection("default")
+        cached_statuses = await _aget_cached_statuses(redis, image_urls)
+        to_verify = _get_unverified(image_urls, cached_statuses)
+
+        to_queue = []
+        if settings.ENABLE_BACKGROUND_LINK_VALIDATION:
+            to_queue = [
+                (idx, url, results[idx]["provider"]) for url, idx in to_verify.items()
+            ]
+        else:
+            verified = await validator.avalidate(
+                [(url, results[idx]["provider"]) for url, idx in to_verify.items()]
+            )
+            await _acache_statuses(redis, verified)
+            _merge_statuses(cached_statuses, to_verify, verified)
+        _count_validated(image_urls, to_verify, to_queue)
+
+    new_mask = _remove_dead_results(results, image_urls, cached_statuses)
+    with timing.span("mask_write"):
+        await asave_query_mask(query_hash, new_mask, start_slice)
+
+    if to_queue:
+        queued = await aenqueue(redis, query_hash, start_slice, to_queue)
+        logger.debug(f"queued={queued}")
+
+
+def validate_queued_links(batch_size: int, timeout: int) -> int:
+    """
+    Validate a batch of links queued by ``check_dead_links``.
+
+    The statuses are cached like those of links validated during the search
+    request, and dead links are marked in the dead link mask of the query that
+    returned them.
+
+    :param batch_size: the maximum number of links to validate
+    :param timeout: the number of seconds to wait for links to be queued
+    :return: the number of links validated
+    """
+    logger = parent_logger.getChild("validate_queued_links")
+    redis = django_redis.get_redis_connection("default")
+    items = dequeue(redis, batch_size, timeout)
+    if not items:
+        return 0
+
+    links = {item["url"]: item["provider"] for item in items}
+    statuses = dict(validator.validate(list(links.items())))
+    _cache_statuses(redis, statuses.items())
+
+    dead_positions = {}
+    for item in items:
+        status = statuses[item["url"]]
+        if status is None:
+            continue
+        status_mapping = provider_status_mappings[item["provider"]]
+        if status in status_mapping.unknown or status in status_mapping.live:
+            continue
+        dead_positions.setdefault(item["query_hash"], []).append(item["position"])
+
+    for query_hash, positions in dead_positions.items():
+        logger.debug(f"query_hash={query_hash} dead_positions={positions}")
+        mark_dead_results(query_hash, positions)
+
+    clear_pending(redis, list(links))
+    return len(links)
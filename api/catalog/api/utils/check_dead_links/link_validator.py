@@ -0,0 +1,226 @@
+"""Pooled link validation shared by all the requests handled by a worker."""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from catalog.api.utils.check_dead_links.provider_status_mappings import (
+    provider_status_mappings,
+)
+
+
+parent_logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Stop sending requests to a host after consecutive failures.
+
+    Once ``cooldown`` seconds have passed, requests are let through again and the
+    circuit opens again on the next failure.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        if self.opened_at is None:
+            return False
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return True
+        self.opened_at = None
+        self.failures = self.threshold - 1
+        return False
+
+    def record(self, failed: bool):
+        if not failed:
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class LinkValidator:
+    """
+    Send HEAD requests through a connection pool that outlives a single search.
+
+    ``aiohttp`` sessions are bound to an event loop, so the validator runs its own
+    loop in a daemon thread and the session, with its keep-alive connections and
+    DNS cache, is reused by every call to ``validate`` made in the process.
+
+    Requests are limited per host, and hosts that rate limit or block requests,
+    according to ``provider_status_mappings``, or do not respond at all are not
+    requested again until their circuit breaker closes.
+    """
+
+    def __init__(
+        self,
+        headers: dict[str, str],
+        timeout: float = 1,
+        deadline: float = 2,
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 60,
+    ):
+        """
+        :param headers: the headers to send with every request
+        :param timeout: the number of seconds to wait to connect to a host and for
+        each read of its response
+        :param deadline: the number of seconds after which ``validate`` gives up on
+        the requests it has not completed
+        :param max_connections: the size of the connection pool
+        :param max_connections_per_host: the number of concurrent requests per host
+        :param breaker_threshold: the number of consecutive failures after which
+        requests to a host are skipped
+        :param breaker_cooldown: the number of seconds during which they are skipped
+        """
+        self.headers = headers
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+        self._session = None
+        self._breakers = {}
+
+    def validate(self, links: list[tuple[str, str]]) -> list[tuple[str, int | None]]:
+        """
+        Request the given links and return their status.
+
+        The status is -1 for links whose host did not respond, and ``None`` for
+        links that were not requested, either because the circuit breaker of their
+        host is open or because the deadline elapsed.
+
+        :param links: tuples of the URL and provider of each link
+        :return: tuples of the URL and status of each link, in the same order
+        """
+        if not links:
+            return []
+        future = asyncio.run_coroutine_threadsafe(
+            self._validate(links), self._get_loop()
+        )
+        return future.result()
+
+    async def avalidate(
+        self, links: list[tuple[str, str]]
+    ) -> list[tuple[str, int | None]]:
+        """
+        Async variant of ``validate``.
+
+        The requests still run on the loop of the validator, to share its
+        connection pool, but the calling loop is not blocked while waiting for them.
+        """
+        if not links:
+            return []
+        future = asyncio.run_coroutine_threadsafe(
+            self._validate(links), self._get_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """Close the pooled connections and stop the event loop."""
+
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                return
+            if self._session is not None:
+                asyncio.run_coroutine_threadsafe(
+                    self._session.close(), self._loop
+                ).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = self._session = None
+            self._breakers = {}
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # The loop thread does not survive forking into a new worker process.
+            if self._loop is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._loop = asyncio.new_event_loop()
+                self._session = None
+                self._breakers = {}
+                threading.Thread(
+                    target=self._loop.run_forever, name="link-validator", daemon=True
+                ).start()
+            return self._loop
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ttl_dns_cache=300,
+            )
+            # Waiting for a connection from the pool does not count towards the
+            # timeout, only the deadline.
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=self.timeout, sock_read=self.timeout
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.headers, timeout=timeout, connector=connector
+            )
+        return self._session
+
+    async def _validate(
+        self, links: list[tuple[str, str]]
+    ) -> list[tuple[str, int | None]]:
+        session = self._get_session()
+        tasks = [
+            asyncio.ensure_future(self._head(session, url, provider))
+            for url, provider in links
+        ]
+        await asyncio.wait(tasks, timeout=self.deadline)
+
+        statuses = []
+        for task, (url, _) in zip(tasks, links):
+            if task.done():
+                statuses.append(task.result())
+            else:
+                task.cancel()
+                statuses.append((url, None))
+        return statuses
+
+    async def _head(
+        self, session: aiohttp.ClientSession, url: str, provider: str
+    ) -> tuple[str, int | None]:
+        logger = parent_logger.getChild("_head")
+        host = urlsplit(url).netloc
+        breaker = self._breakers.setdefault(
+            host, CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        )
+        if breaker.is_open:
+            logger.debug(f"circuit open, skipping url={url}")
+            return url, None
+
+        try:
+            async with session.head(url, allow_redirects=False) as response:
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+            _log_validation_failure(exception)
+            status = -1
+
+        breaker.record(
+            status == -1 or status in provider_status_mappings[provider].unknown
+        )
+        return url, status
+
+
+def _log_validation_failure(exception):
+    logger = parent_logger.getChild("_log_validation_failure")
+    logger.warning(f"Failed to validate image! Reason: {exception}")
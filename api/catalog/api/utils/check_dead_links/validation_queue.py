@@ -0,0 +1,79 @@
+"""Redis queue of links awaiting validation outside of the search request."""
+
+import json
+
+from django_redis.client.default import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from catalog.api.utils.work_queue import WorkQueue
+
+
+queue = WorkQueue("link_validation")
+QUEUE_KEY = queue.key
+
+
+def enqueue(
+    redis: Redis, query_hash: str, start_slice: int, items: list[tuple[int, str, str]]
+) -> int:
+    """
+    Queue links for validation, skipping links that are already queued.
+
+    :param redis: the Redis connection
+    :param query_hash: the hash of the query the results belong to
+    :param start_slice: the position of the first result in the query
+    :param items: tuples of the result index, URL and provider of each link
+    :return: the number of links added to the queue
+    """
+    return queue.enqueue(redis, _get_items(query_hash, start_slice, items))
+
+
+async def aenqueue(
+    redis: AsyncRedis,
+    query_hash: str,
+    start_slice: int,
+    items: list[tuple[int, str, str]],
+) -> int:
+    """Async variant of ``enqueue``."""
+
+    return await queue.aenqueue(redis, _get_items(query_hash, start_slice, items))
+
+
+def _get_items(
+    query_hash: str, start_slice: int, items: list[tuple[int, str, str]]
+) -> list[tuple[str, str]]:
+    return [
+        (
+            url,
+            json.dumps(
+                {
+                    "url": url,
+                    "provider": provider,
+                    "query_hash": query_hash,
+                    "position": start_slice + idx,
+                }
+            ),
+        )
+        for idx, url, provider in items
+    ]
+
+
+def dequeue(redis: Redis, batch_size: int, timeout: int) -> list[dict]:
+    """
+    Take up to ``batch_size`` of the oldest queued links.
+
+    Blocks for up to ``timeout`` seconds until at least one link is available.
+
+    :param redis: the Redis connection
+    :param batch_size: the maximum number of links to take
+    :param timeout: the number of seconds to wait for a link
+    :return: the queued links, empty if the timeout elapsed
+    """
+    return [
+        json.loads(payload) for payload in queue.dequeue(redis, batch_size, timeout)
+    ]
+
+
+def clear_pending(redis: Redis, urls: list[str]) -> None:
+    """Allow the given links to be queued again."""
+
+    queue.clear_pending(redis, urls)
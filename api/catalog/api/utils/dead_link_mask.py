@@ -1,28 +1,170 @@
-from deepdiff import DeepHash
+import hashlib
+import json
+import weakref
+from collections.abc import Mapping
+
 from django_redis import get_redis_connection
-from elasticsearch_dsl import Search
+
+from catalog.api.utils import async_redis
 
 
 # 3 hours minutes (in seconds)
 DEAD_LINK_MASK_TTL = 60 * 60 * 3
 
+# Masks are stored as a Redis bitstring, with bit ``i`` set when the ``i``-th result
+# of the query is live. Trailing dead results cannot be represented by the bitstring
+# alone, so the number of validated results is stored in a separate key.
+#
+# KEYS[1]: mask bits, KEYS[2]: mask length
+# ARGV[1]: start offset, ARGV[2]: mask as a string of "0" and "1", ARGV[3]: TTL
+SAVE_MASK_SCRIPT = """
+local old_length = tonumber(redis.call("GET", KEYS[2])) or 0
+-- Keep the part of the existing mask before ``start`` and overwrite the rest.
+local start = math.min(tonumber(ARGV[1]), old_length)
+local mask = ARGV[2]
+local new_length = start + #mask
+
+for i = 1, #mask do
+    redis.call("SETBIT", KEYS[1], start + i - 1, tonumber(string.sub(mask, i, i)))
+end
+-- Clear bits left over from a longer, previous mask.
+for offset = new_length, old_length - 1 do
+    redis.call("SETBIT", KEYS[1], offset, 0)
+end
+
+redis.call("SET", KEYS[2], new_length, "EX", ARGV[3])
+if new_length > 0 then
+    redis.call("EXPIRE", KEYS[1], ARGV[3])
+end
+return new_length
+"""
+
+# See ``search_controller._paginate_with_dead_link_mask`` for the meaning of the
+# branches; "accumulated mask" refers to the running count of live results.
+#
+# KEYS[1]: mask bits, KEYS[2]: mask length
+# ARGV[1]: page size, ARGV[2]: page, ARGV[3]: end of the query without a mask
+QUERY_SLICE_SCRIPT = """
+local page_size = tonumber(ARGV[1])
+local page = tonumber(ARGV[2])
+local unmasked_end = tonumber(ARGV[3])
+
+local length = tonumber(redis.call("GET", KEYS[2])) or 0
+if length == 0 then  -- branch 1
+    return {0, unmasked_end}
+end
+
+local live_count = redis.call("BITCOUNT", KEYS[1])
+local skipped = page_size * (page - 1)
+if skipped > live_count then  -- branch 2
+    return {length, unmasked_end}
+end
+
+-- Find the offset at which the accumulated mask first reaches ``n``. Rather than
+-- reading the whole bitstring, binary search the byte in which it does with
+-- ``BITCOUNT`` over byte ranges, then read only that byte. The ``n``-th live result
+-- cannot be before offset ``n - 1``, so the search starts from there.
+local function nth_live(n)
+    if n > live_count then
+        return -1
+    end
+    local low = math.floor((n - 1) / 8)
+    local high = redis.call("STRLEN", KEYS[1]) - 1
+    while low < high do
+        local mid = math.floor((low + high) / 2)
+        if redis.call("BITCOUNT", KEYS[1], 0, mid) >= n then
+            high = mid
+        else
+            low = mid + 1
+        end
+    end
+
+    -- A range ending at -1 would count the whole bitstring.
+    local count = 0
+    if low > 0 then
+        count = redis.call("BITCOUNT", KEYS[1], 0, low - 1)
+    end
+    local byte = string.byte(redis.call("GETRANGE", KEYS[1], low, low))
+    for bit = 7, 0, -1 do
+        count = count + math.floor(byte / 2 ^ bit) % 2
+        if count == n then
+            return low * 8 + (7 - bit)
+        end
+    end
+    return -1
+end
+
+local start = 0
+if page > 1 then
+    start = nth_live(skipped + 1)  -- branch 3_start_A
+    if start < 0 then  -- branch 3_start_B
+        start = nth_live(skipped) + 1
+    end
+end
+
+local stop
+if page_size * page > live_count then  -- branch 3_end_A
+    stop = unmasked_end
+else  -- branch 3_end_B
+    stop = nth_live(page_size * page) + 1
+end
+return {start, stop}
+"""
 
-def get_query_hash(s: Search) -> str:
+
+# Clear the bits of results found dead after the mask was saved, without growing it.
+#
+# KEYS[1]: mask bits, KEYS[2]: mask length
+# ARGV: the positions of the dead results
+MARK_DEAD_SCRIPT = """
+local length = tonumber(redis.call("GET", KEYS[2])) or 0
+for i = 1, #ARGV do
+    local offset = tonumber(ARGV[i])
+    if offset < length then
+        redis.call("SETBIT", KEYS[1], offset, 0)
+    end
+end
+return length
+"""
+
+
+# The scripts registered with each client, so that they are registered once per
+# client rather than on every call.
+_scripts: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_script(redis, script: str):
+    scripts = _scripts.setdefault(redis, {})
+    if script not in scripts:
+        scripts[script] = redis.register_script(script)
+    return scripts[script]
+
+
+def _get_mask_keys(query_hash: str) -> list[str]:
+    return [
+        f"{query_hash}:dead_link_mask_bits",
+        f"{query_hash}:dead_link_mask_length",
+    ]
+
+
+def get_query_hash(params: Mapping, index: str) -> str:
     """
-    Hash the search query using a deterministic algorithm.
+    Hash the parameters of a query using a deterministic algorithm.
 
-    Generates a deterministic Murmur3 or SHA256 hash from the serialized Search
-    object using DeepHash so that two Search objects with the same content will
-    produce the same hash.
+    The parameters are serialized to compact JSON with sorted keys, so that the same
+    parameters always produce the same hash, and hashed with BLAKE2b.
 
-    :param s: Search object to be serialized and hashed.
-    :return: Serialized Search object hash.
+    :param params: The parameters that determine the query, excluding pagination.
+    :param index: The Elasticsearch index that is queried.
+    :return: The hash of the query.
     """
-    serialized_search_obj = s.to_dict()
-    serialized_search_obj.pop("from", None)
-    serialized_search_obj.pop("size", None)
-    deep_hash = DeepHash(serialized_search_obj)[serialized_search_obj]
-    return deep_hash
+    serialized = json.dumps(
+        {"index": index, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.blake2b(serialized.encode(), digest_size=16).hexdigest()
 
 
 def get_query_mask(query_hash: str) -> list[int]:
@@ -33,21 +175,90 @@ def get_query_mask(query_hash: str) -> list[int]:
     :return: Boolean mask as a list of integers (0 or 1).
     """
     redis = get_redis_connection("default")
-    key = f"{query_hash}:dead_link_mask"
-    return list(map(int, redis.lrange(key, 0, -1)))
+    bits_key, length_key = _get_mask_keys(query_hash)
+    bits, length = redis.mget(bits_key, length_key)
+    if not length:
+        return []
+    bits = bits or b""
+    return [
+        (bits[i // 8] >> (7 - i % 8)) & 1 if i // 8 < len(bits) else 0
+        for i in range(int(length))
+    ]
 
 
-def save_query_mask(query_hash: str, mask: list):
+def save_query_mask(query_hash: str, mask: list, start: int = 0):
     """
     Save a query mask to redis.
 
-    :param mask: Boolean mask as a list of integers (0 or 1).
+    The existing mask is kept up to ``start`` and replaced by ``mask`` after that.
+
     :param query_hash: Unique value to be used as key.
+    :param mask: Boolean mask as a list of integers (0 or 1).
+    :param start: The position of the first result in ``mask``.
+    """
+    redis = get_redis_connection("default")
+    save_mask = _get_script(redis, SAVE_MASK_SCRIPT)
+    save_mask(
+        keys=_get_mask_keys(query_hash),
+        args=[start, "".join(str(bit) for bit in mask), DEAD_LINK_MASK_TTL],
+    )
+
+
+async def asave_query_mask(query_hash: str, mask: list, start: int = 0):
+    """Async variant of ``save_query_mask``."""
+
+    redis = async_redis.get_redis_connection("default")
+    save_mask = _get_script(redis, SAVE_MASK_SCRIPT)
+    await save_mask(
+        keys=_get_mask_keys(query_hash),
+        args=[start, "".join(str(bit) for bit in mask), DEAD_LINK_MASK_TTL],
+    )
+
+
+def get_query_slice(
+    query_hash: str, page_size: int, page: int, unmasked_end: int
+) -> tuple[int, int]:
+    """
+    Compute the results slice for a page of a query from its mask, inside Redis.
+
+    :param query_hash: Unique value for a particular query.
+    :param page_size: How big the page should be.
+    :param page: The page number.
+    :param unmasked_end: The end of the slice to use where the mask is insufficient.
+    :return: Tuple of start and end.
     """
-    redis_pipe = get_redis_connection("default").pipeline()
-    key = f"{query_hash}:dead_link_mask"
+    redis = get_redis_connection("default")
+    query_slice = _get_script(redis, QUERY_SLICE_SCRIPT)
+    start, end = query_slice(
+        keys=_get_mask_keys(query_hash),
+        args=[page_size, page, unmasked_end],
+    )
+    return int(start), int(end)
+
+
+async def aget_query_slice(
+    query_hash: str, page_size: int, page: int, unmasked_end: int
+) -> tuple[int, int]:
+    """Async variant of ``get_query_slice``."""
 
-    redis_pipe.delete(key)
-    redis_pipe.rpush(key, *mask)
-    redis_pipe.expire(key, DEAD_LINK_MASK_TTL)
-    redis_pipe.execute()
+    redis = async_redis.get_redis_connection("default")
+    query_slice = _get_script(redis, QUERY_SLICE_SCRIPT)
+    start, end = await query_slice(
+        keys=_get_mask_keys(query_hash),
+        args=[page_size, page, unmasked_end],
+    )
+    return int(start), int(end)
+
+
+def mark_dead_results(query_hash: str, positions: list[int]):
+    """
+    Mark results of an existing query mask as dead.
+
+    Positions beyond the end of the mask are ignored.
+
+    :param query_hash: Unique value for a particular query.
+    :param positions: The positions of the dead results in the query.
+    """
+    redis = get_redis_connection("default")
+    mark_dead = _get_script(redis, MARK_DEAD_SCRIPT)
+    mark_dead(keys=_get_mask_keys(query_hash), args=positions)
@@ -1,4 +1,6 @@
-from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+import orjson
 
 
 class BrowsableAPIRendererWithoutForms(BrowsableAPIRenderer):
@@ -25,3 +27,31 @@ class BrowsableAPIRendererWithoutForms(BrowsableAPIRenderer):
         rendered HTML, so let's simply return an empty string.
         """
         return ""
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renders JSON with ``orjson``, which is several times faster than the standard
+    library for large responses such as pages of search results.
+
+    The output is the same as ``JSONRenderer`` with the default settings. Types that
+    ``orjson`` does not serialize like DRF, such as dates and decimals, are converted
+    by DRF's encoder. Indented responses are rendered by ``JSONRenderer`` because
+    ``orjson`` only supports an indentation of 2 spaces.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=self.options
+        )
+        # Escape the line separators, which are invalid in JavaScript, like DRF.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -0,0 +1,104 @@
+"""Fetch the DB rows of search results, caching them until the index is refreshed."""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model, QuerySet
+
+from elasticsearch.exceptions import TransportError
+from elasticsearch_dsl.response import Hit
+
+
+parent_logger = logging.getLogger(__name__)
+
+
+CACHE_PREFIX = "hydrated:"
+
+
+def _get_cache_key(model: type[Model], index: str, identifier: str) -> str:
+    return f"{CACHE_PREFIX}{model._meta.model_name}:{index}:{identifier}"
+
+
+def get_db_results(queryset: QuerySet, hits: list[Hit]) -> list[Model]:
+    """
+    Fetch the DB rows of the given hits, in the same order as the hits.
+
+    Rows are cached under the concrete index of their hit, so that they are fetched
+    again once the index has been refreshed. Hits without a DB row are dropped.
+
+    :param queryset: the queryset to fetch the rows from
+    :param hits: the search results
+    :return: the rows, with the ``fields_matched`` of their hit
+    """
+    logger = parent_logger.getChild("get_db_results")
+    keys = {
+        hit.identifier: _get_cache_key(queryset.model, hit.meta.index, hit.identifier)
+        for hit in hits
+    }
+
+    rows = {}
+    if settings.ENABLE_HYDRATION_CACHE:
+        cached_rows = cache.get_many(keys.values())
+        rows = {
+            identifier: cached_rows[key]
+            for identifier, key in keys.items()
+            if key in cached_rows
+        }
+
+    if missing := [identifier for identifier in keys if identifier not in rows]:
+        fetched_rows = {
+            str(row.identifier): row for row in queryset.filter(identifier__in=missing)
+        }
+        if settings.ENABLE_HYDRATION_CACHE:
+            cache.set_many(
+                {keys[identifier]: row for identifier, row in fetched_rows.items()},
+                timeout=settings.HYDRATION_CACHE_TTL,
+            )
+        rows |= fetched_rows
+
+    results = []
+    for hit in hits:
+        if (row := rows.get(hit.identifier)) is None:
+            logger.warning(f"Search result not found in DB identifier={hit.identifier}")
+            continue
+        row.fields_matched = getattr(hit, "fields_matched", None)
+        results.append(row)
+    return results
+
+
+def invalidate(model: type[Model], identifier: str, indexes: list[str]):
+    """
+    Remove the cached row of a media item, for example after it has been moderated.
+
+    :param model: the model of the media item
+    :param identifier: the identifier of the media item
+    :param indexes: the indexes, or aliases, the media item is cached for
+    """
+    invalidate_many(model, [identifier], indexes)
+
+
+def invalidate_many(model: type[Model], identifiers: list[str], indexes: list[str]):
+    """
+    Remove the cached rows of several media items, see ``invalidate``.
+
+    :param model: the model of the media items
+    :param identifiers: the identifiers of the media items
+    :param indexes: the indexes, or aliases, the media items are cached for
+    """
+    if not settings.ENABLE_HYDRATION_CACHE:
+        return
+
+    keys = []
+    for index in indexes:
+        try:
+            concrete_indexes = settings.ES.indices.get_alias(index=index)
+        except TransportError:
+            continue
+        keys += [
+            _get_cache_key(model, name, identifier)
+            for name in concrete_indexes
+            for identifier in identifiers
+        ]
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,163 @@
+"""
+A per-process cache in front of the shared cache, for configuration read by every
+request.
+
+Entries expire after ``LOCAL_CACHE_TTL`` seconds. They are also evicted from every
+process as soon as they are invalidated, through a Redis pub/sub channel.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import TypeVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+from django_redis import get_redis_connection
+
+
+parent_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CHANNEL = "local_cache:invalidate"
+# How long to wait before subscribing again after losing the connection (in seconds)
+RESUBSCRIBE_DELAY = 1
+
+_MISSING = object()
+
+
+class LocalCache:
+    """A thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_TTL)
+_subscriber_lock = threading.Lock()
+_subscriber_pid = None
+
+
+def _listen():
+    logger = parent_logger.getChild("_listen")
+    while True:
+        try:
+            pubsub = get_redis_connection("default").pubsub(
+                ignore_subscribe_messages=True
+            )
+            pubsub.subscribe(CHANNEL)
+            for message in pubsub.listen():
+                _local.delete(*json.loads(message["data"]))
+        except Exception as exc:
+            logger.warning(f"Lost subscription to local cache invalidations: {exc}")
+        # Invalidations may have been missed while disconnected.
+        _local.clear()
+        time.sleep(RESUBSCRIBE_DELAY)
+
+
+def _ensure_subscribed():
+    """Start listening for invalidations, once per process."""
+
+    global _subscriber_pid
+    if _subscriber_pid == os.getpid():
+        return
+    with _subscriber_lock:
+        if _subscriber_pid == os.getpid():
+            return
+        # Entries copied from the parent process are not invalidated anymore.
+        _local.clear()
+        threading.Thread(target=_listen, daemon=True).start()
+        _subscriber_pid = os.getpid()
+
+
+def get(key: str, default=None):
+    """
+    Get a value from the cache of this process.
+
+    :param key: the cache key
+    :param default: the value to return if the key is not cached
+    :return: the cached value, or ``default``
+    """
+    if not settings.ENABLE_LOCAL_CACHE:
+        return default
+    _ensure_subscribed()
+    return _local.get(key, default)
+
+
+def set(key: str, value):
+    """
+    Cache a value in this process, for ``LOCAL_CACHE_TTL`` seconds.
+
+    :param key: the cache key
+    :param value: the value to cache
+    """
+    if settings.ENABLE_LOCAL_CACHE:
+        _ensure_subscribed()
+        _local.set(key, value)
+
+
+def get_or_set(key: str, compute: Callable[[], T], timeout: int) -> T:
+    """
+    Get a value from the cache of this process, then from the shared cache,
+    computing and caching it in both on a miss.
+
+    :param key: the cache key
+    :param compute: a callable producing the value to cache
+    :param timeout: the number of seconds to keep the value in the shared cache
+    :return: the cached or freshly computed value
+    """
+    if (value := get(key, _MISSING)) is not _MISSING:
+        return value
+    if (value := cache.get(key, _MISSING)) is _MISSING:
+        value = compute()
+        cache.set(key, value, timeout=timeout)
+    set(key, value)
+    return value
+
+
+def invalidate(*keys: str):
+    """
+    Remove values from the shared cache and from the cache of every process.
+
+    :param keys: the cache keys to invalidate
+    """
+    cache.delete_many(keys)
+    _local.delete(*keys)
+    if settings.ENABLE_LOCAL_CACHE:
+        get_redis_connection("default").publish(CHANNEL, json.dumps(keys))
@@ -1,30 +1,49 @@
 import datetime as dt
+import hashlib
 import logging
 
+from django.core.cache import cache
+
 from oauth2_provider.models import AccessToken
 
 from catalog.api import models
+from catalog.api.utils import local_cache
 
 
 parent_logger = logging.getLogger(__name__)
 
 _no_result = (None, None, None)
 
+CACHE_PREFIX = "token_info:"
 
-def get_token_info(token: str):
+
+def get_cache_key(token: str) -> str:
     """
-    Recover an OAuth2 application client ID and rate limit model from an access token.
+    Get the key of the cached information about an access token.
+
+    The token is hashed so that it is never stored in the cache in clear.
 
     :param token: An OAuth2 access token.
-    :return: If the token is valid, return the client ID associated with the
-    token, rate limit model, and email verification status as a tuple; else
-    return ``(None, None, None)``.
+    :return: the cache key
+    """
+    return (
+        f"{CACHE_PREFIX}{hashlib.blake2b(token.encode(), digest_size=16).hexdigest()}"
+    )
+
+
+def _get_uncached_token_info(token: str):
+    """
+    Recover the token information from the database.
+
+    :param token: An OAuth2 access token.
+    :return: the client ID, rate limit model, email verification status and
+    expiry of the token; ``None`` if the token does not exist
     """
     logger = parent_logger.getChild("get_token_info")
     try:
         token = AccessToken.objects.get(token=token)
     except AccessToken.DoesNotExist:
-        return _no_result
+        return None
 
     try:
         application = models.ThrottledApplication.objects.get(accesstoken=token)
@@ -33,7 +52,7 @@ def get_token_info(token: str):
         # In practice should never occur so long as the preceeding
         # operation to retrieve the access token was successful.
         logger.critical("Failed to find application associated with access token.")
-        return _no_result
+        return None
 
     expired = token.expires < dt.datetime.now(token.expires.tzinfo)
     if expired:
@@ -42,9 +61,53 @@ def get_token_info(token: str):
             f"application.name={application.name} "
             f"application.client_id={application.client_id} "
         )
-        return _no_result
+        return None
 
     client_id = str(application.client_id)
     rate_limit_model = application.rate_limit_model
     verified = application.verified
-    return client_id, rate_limit_model, verified
+    return client_id, rate_limit_model, verified, token.expires
+
+
+def get_token_info(token: str):
+    """
+    Recover an OAuth2 application client ID and rate limit model from an access token.
+
+    Valid tokens are cached in this process and in Redis until they expire, so that
+    the database is not queried by every request. The cache is invalidated when the
+    application changes, see ``ThrottledApplication.invalidate_token_info``.
+
+    :param token: An OAuth2 access token.
+    :return: If the token is valid, return the client ID associated with the
+    token, rate limit model, and email verification status as a tuple; else
+    return ``(None, None, None)``.
+    """
+    key = get_cache_key(token)
+    if (info := local_cache.get(key)) is None:
+        if (info := cache.get(key)) is None:
+            if (info := _get_uncached_token_info(token)) is None:
+                return _no_result
+            timeout = (info[3] - dt.datetime.now(info[3].tzinfo)).total_seconds()
+            cache.set(key, info, timeout=timeout)
+        local_cache.set(key, info)
+
+    *token_info, expires = info
+    # The entry of this process may outlive the token.
+    if expires < dt.datetime.now(expires.tzinfo):
+        return _no_result
+    return tuple(token_info)
+
+
+def get_request_token_info(request):
+    """
+    Recover the token information of the access token of a request.
+
+    The information is memoized on the request, as every throttle class of a view
+    needs it.
+
+    :param request: the DRF request
+    :return: the same tuple as ``get_token_info``
+    """
+    if not hasattr(request, "_token_info"):
+        request._token_info = get_token_info(str(request.auth))
+    return request._token_info
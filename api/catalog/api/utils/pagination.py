@@ -12,8 +12,20 @@ class StandardPagination(PageNumberPagination):
         self.result_count = None  # populated later
         self.page_count = None  # populated later
         self.page = 1  # default, get's updated when necessary
+        self.use_cursor = False  # whether pages are walked with ``next_cursor``
+        self.next_cursor = None  # populated later
 
     def get_paginated_response(self, data):
+        if self.use_cursor:
+            return Response(
+                {
+                    "result_count": self.result_count,
+                    "page_size": self.page_size,
+                    "next_cursor": self.next_cursor,
+                    "results": data,
+                }
+            )
+
         return Response(
             {
                 "result_count": self.result_count,
@@ -42,5 +54,13 @@ class StandardPagination(PageNumberPagination):
                 field: {"type": "integer", "description": description}
                 for field, description in field_descriptions.items()
             }
-            | {"results": schema},
+            | {
+                "next_cursor": {
+                    "type": "string",
+                    "nullable": True,
+                    "description": "The cursor for the next page, replaces "
+                    "`page_count` and `page` when the `cursor` parameter is used.",
+                },
+                "results": schema,
+            },
         }
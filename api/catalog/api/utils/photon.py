@@ -1,14 +1,23 @@
+import hashlib
 import logging
+import os
+import threading
+import time
 from urllib.parse import urlparse
 
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from rest_framework import status
 from rest_framework.exceptions import APIException
 
 import django_redis
 import requests
 import sentry_sdk
+from redis.exceptions import RedisError
+from requests.adapters import HTTPAdapter
+
+from catalog.api.utils import thumbnail_cache
 
 
 parent_logger = logging.getLogger(__name__)
@@ -26,6 +35,100 @@ HEADERS = {
     )
 }
 
+URL_FAILURE_PREFIX = "thumbnail_failure:url:"
+DOMAIN_FAILURE_PREFIX = "thumbnail_failure:domain:"
+# Size of the chunks streamed from Photon to the client (in bytes)
+CHUNK_SIZE = 64 * 1024
+
+_session_lock = threading.Lock()
+_session = None
+_session_pid = None
+
+
+def get_session() -> requests.Session:
+    """
+    Get the HTTP session of this process, which keeps the connections to Photon,
+    and to image hosts when rendering locally, alive between requests.
+    """
+
+    global _session, _session_pid
+    if _session_pid == os.getpid():
+        return _session
+    with _session_lock:
+        if _session_pid != os.getpid():
+            # Pooled connections must not be shared with the parent process.
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=settings.THUMBNAIL_POOL_MAXSIZE
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def _get_failure_keys(image_url: str, domain: str) -> tuple[str, str]:
+    url_hash = hashlib.blake2b(image_url.encode(), digest_size=16).hexdigest()
+    return f"{URL_FAILURE_PREFIX}{url_hash}", f"{DOMAIN_FAILURE_PREFIX}{domain}"
+
+
+def _check_failures(image_url: str, domain: str):
+    """
+    Fail fast if the image, or its host, failed to render recently.
+
+    :param image_url: the URL of the image
+    :param domain: the host of the image
+    :raises UpstreamThumbnailException: if the thumbnail is known to fail
+    """
+    logger = parent_logger.getChild("_check_failures")
+    if not settings.ENABLE_THUMBNAIL_FAILURE_CACHE:
+        return
+
+    url_key, domain_key = _get_failure_keys(image_url, domain)
+    try:
+        url_failure, domain_timeouts = django_redis.get_redis_connection(
+            "default"
+        ).mget(url_key, domain_key)
+    except RedisError as exc:
+        logger.warning(f"Failed to read thumbnail failures from Redis: {exc}")
+        return
+
+    if url_failure is not None:
+        raise UpstreamThumbnailException(
+            "Failed to render thumbnail, which recently failed upstream."
+        )
+    if int(domain_timeouts or 0) >= settings.THUMBNAIL_DOMAIN_TIMEOUT_THRESHOLD:
+        raise UpstreamThumbnailException(
+            f"Failed to render thumbnail, {domain} recently timed out repeatedly."
+        )
+
+
+def _record_failure(image_url: str, domain: str, is_timeout: bool):
+    """
+    Remember that the thumbnail failed to render, so that it fails fast next time.
+
+    :param image_url: the URL of the image
+    :param domain: the host of the image
+    :param is_timeout: whether the failure was a timeout, which counts against the
+    host
+    """
+    logger = parent_logger.getChild("_record_failure")
+    if not settings.ENABLE_THUMBNAIL_FAILURE_CACHE:
+        return
+
+    url_key, domain_key = _get_failure_keys(image_url, domain)
+    pipe = django_redis.get_redis_connection("default").pipeline()
+    pipe.set(url_key, 1, ex=settings.THUMBNAIL_FAILURE_TTL)
+    if is_timeout:
+        # The window slides with every timeout, so a host is skipped until it has
+        # not timed out for the length of the window.
+        pipe.incr(domain_key)
+        pipe.expire(domain_key, settings.THUMBNAIL_DOMAIN_TIMEOUT_WINDOW)
+    try:
+        pipe.execute()
+    except RedisError as exc:
+        logger.warning(f"Failed to write thumbnail failure to Redis: {exc}")
+
 
 def _get_photon_params(image_url, is_full_size, is_compressed):
     """
@@ -57,33 +160,19 @@ def _get_photon_params(image_url, is_full_size, is_compressed):
     return params, parsed_image_url
 
 
-def get(
-    image_url: str,
-    accept_header: str = "image/*",
-    is_full_size: bool = False,
-    is_compressed: bool = True,
-) -> HttpResponse:
-    logger = parent_logger.getChild("get")
-    params, parsed_image_url = _get_photon_params(
-        image_url, is_full_size, is_compressed
-    )
-
-    # Photon excludes the protocol, so we need to reconstruct the url + port + path
-    # to send as the "path" of the Photon request
-    domain = parsed_image_url.netloc
-    path = parsed_image_url.path
-    upstream_url = f"{settings.PHOTON_ENDPOINT}{domain}{path}"
-
-    headers = {"Accept": accept_header} | HEADERS
-    if settings.PHOTON_AUTH_KEY:
-        headers["X-Photon-Authentication"] = settings.PHOTON_AUTH_KEY
-
+def _request(
+    upstream_url: str, params: dict, headers: dict, image_url: str, domain: str
+) -> requests.Response:
     try:
-        upstream_response = requests.get(
+        upstream_response = get_session().get(
             upstream_url,
-            timeout=15,
+            timeout=(
+                settings.THUMBNAIL_CONNECT_TIMEOUT,
+                settings.THUMBNAIL_READ_TIMEOUT,
+            ),
             params=params,
             headers=headers,
+            stream=True,
         )
         upstream_response.raise_for_status()
     except requests.ReadTimeout as exc:
@@ -94,11 +183,17 @@ def get(
             cache.incr(key)
         except ValueError:  # Key does not exist.
             cache.set(key, 1)
+        _record_failure(image_url, domain, is_timeout=True)
 
         sentry_sdk.capture_exception(exc)
         raise UpstreamThumbnailException(
             f"Failed to render thumbnail due to timeout: {exc}"
         )
+    except requests.HTTPError as exc:
+        upstream_response.close()
+        _record_failure(image_url, domain, is_timeout=False)
+        sentry_sdk.capture_exception(exc)
+        raise UpstreamThumbnailException(f"Failed to render thumbnail. {exc}")
     except requests.RequestException as exc:
         sentry_sdk.capture_exception(exc)
         raise UpstreamThumbnailException(f"Failed to render thumbnail. {exc}")
@@ -107,16 +202,106 @@ def get(
         raise UpstreamThumbnailException(
             f"Failed to render thumbnail due to unidentified exception. {exc}"
         )
-    else:
-        res_status = upstream_response.status_code
-        content_type = upstream_response.headers.get("Content-Type")
-        logger.debug(
-            "Image proxy response "
-            f"status: {res_status}, content-type: {content_type}"
-        )
+    return upstream_response
 
-        return HttpResponse(
-            upstream_response.content,
-            status=res_status,
-            content_type=content_type,
-        )
+
+def _stream(upstream_response: requests.Response):
+    """
+    Relay the thumbnail to the client as it is downloaded, then release the
+    connection to the pool.
+    """
+    logger = parent_logger.getChild("_stream")
+    try:
+        yield from upstream_response.iter_content(chunk_size=CHUNK_SIZE)
+    except requests.RequestException as exc:
+        # The response has already started, so the client gets a truncated body.
+        logger.warning(f"Failed to stream thumbnail: {exc}")
+        sentry_sdk.capture_exception(exc)
+    finally:
+        upstream_response.close()
+
+
+def _get_cached(
+    upstream_url: str, params: dict, headers: dict, image_url: str, domain: str
+) -> HttpResponse:
+    """
+    Serve the thumbnail from the cache, fetching or revalidating it if needed.
+
+    See ``catalog.api.utils.thumbnail_cache``.
+    """
+    logger = parent_logger.getChild("_get_cached")
+    key = thumbnail_cache.get_key(upstream_url, params, headers["Accept"])
+    thumbnail = thumbnail_cache.get(key)
+
+    res_status = status.HTTP_200_OK
+    if thumbnail is None or not thumbnail.is_fresh:
+        validators = thumbnail.validators if thumbnail else {}
+        with _request(
+            upstream_url, params, headers | validators, image_url, domain
+        ) as upstream_response:
+            if upstream_response.status_code == status.HTTP_304_NOT_MODIFIED:
+                logger.debug(f"Revalidated cached thumbnail key={key}")
+                thumbnail.fetched_at = time.time()
+            else:
+                thumbnail = thumbnail_cache.CachedThumbnail(
+                    content=upstream_response.content,
+                    content_type=upstream_response.headers.get("Content-Type"),
+                    etag=upstream_response.headers.get("ETag"),
+                    last_modified=upstream_response.headers.get("Last-Modified"),
+                )
+                res_status = upstream_response.status_code
+        # Other successful statuses are relayed to the client, but not cached.
+        if res_status == status.HTTP_200_OK:
+            thumbnail_cache.set(key, thumbnail)
+
+    response = HttpResponse(
+        thumbnail.content, status=res_status, content_type=thumbnail.content_type
+    )
+    response["ETag"] = thumbnail.response_etag
+    if thumbnail.last_modified:
+        response["Last-Modified"] = thumbnail.last_modified
+    patch_cache_control(
+        response, public=True, max_age=settings.THUMBNAIL_CACHE_FRESH_TTL
+    )
+    # The format of the thumbnail depends on the formats accepted by the client.
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def get(
+    image_url: str,
+    accept_header: str = "image/*",
+    is_full_size: bool = False,
+    is_compressed: bool = True,
+) -> HttpResponse | StreamingHttpResponse:
+    logger = parent_logger.getChild("get")
+    params, parsed_image_url = _get_photon_params(
+        image_url, is_full_size, is_compressed
+    )
+
+    # Photon excludes the protocol, so we need to reconstruct the url + port + path
+    # to send as the "path" of the Photon request
+    domain = parsed_image_url.netloc
+    path = parsed_image_url.path
+    upstream_url = f"{settings.PHOTON_ENDPOINT}{domain}{path}"
+
+    headers = {"Accept": accept_header} | HEADERS
+    if settings.PHOTON_AUTH_KEY:
+        headers["X-Photon-Authentication"] = settings.PHOTON_AUTH_KEY
+
+    _check_failures(image_url, domain)
+    if settings.ENABLE_THUMBNAIL_CACHE:
+        return _get_cached(upstream_url, params, headers, image_url, domain)
+
+    upstream_response = _request(upstream_url, params, headers, image_url, domain)
+    res_status = upstream_response.status_code
+    content_type = upstream_response.headers.get("Content-Type")
+    logger.debug(
+        "Image proxy response " f"status: {res_status}, content-type: {content_type}"
+    )
+
+    return StreamingHttpResponse(
+        _stream(upstream_response),
+        status=res_status,
+        content_type=content_type,
+    )
@@ -0,0 +1,203 @@
+"""
+Render thumbnails in-process with Pillow, as an alternative to Photon.
+
+Enabled by setting ``THUMBNAIL_BACKEND`` to ``pillow``. Images are downloaded by
+the API and resized in a pool of ``THUMBNAIL_RENDER_PROCESSES`` processes, so that
+rendering does not hold the GIL of the worker serving requests.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+import requests
+import sentry_sdk
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+from catalog.api.utils.photon import HEADERS, UpstreamThumbnailException, get_session
+
+
+parent_logger = logging.getLogger(__name__)
+
+# Output formats by MIME type, in order of preference
+OUTPUT_FORMATS = {
+    "image/avif": "AVIF",
+    "image/webp": "WEBP",
+}
+DEFAULT_FORMAT = "JPEG"
+# Size of the chunks read when downloading images (in bytes)
+CHUNK_SIZE = 64 * 1024
+
+_pool_lock = threading.Lock()
+_pool = None
+_pool_slots = None
+_pool_pid = None
+
+
+class RenderError(ValueError):
+    pass
+
+
+def _get_pool() -> tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+    """
+    Get the rendering pool of this process, with a semaphore bounding the number
+    of renders waiting for a free process.
+    """
+
+    global _pool, _pool_slots, _pool_pid
+    if _pool_pid == os.getpid():
+        return _pool, _pool_slots
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            processes = settings.THUMBNAIL_RENDER_PROCESSES
+            # Forking would copy the locks held by the threads of the worker, like
+            # the link validator loop, into processes where they are never released.
+            _pool = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_slots = threading.BoundedSemaphore(processes * 2)
+            _pool_pid = os.getpid()
+    return _pool, _pool_slots
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Replace a pool that cannot be used anymore, like after a process crashed."""
+
+    global _pool_pid
+    with _pool_lock:
+        if _pool is pool:
+            _pool_pid = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_output_format(accept_header: str) -> str:
+    """
+    Pick the most efficient output format accepted by the client.
+
+    :param accept_header: the formats accepted by the client
+    :return: the name of the Pillow format to encode the thumbnail in
+    """
+    accepted = {
+        media_range.split(";")[0].strip() for media_range in accept_header.split(",")
+    }
+    Image.init()  # Registers the encoders of all installed formats
+    for mime_type, image_format in OUTPUT_FORMATS.items():
+        if mime_type in accepted and image_format in Image.SAVE:
+            return image_format
+    return DEFAULT_FORMAT
+
+
+def render(
+    data: bytes,
+    width: int | None,
+    quality: int | None,
+    image_format: str,
+    max_pixels: int,
+) -> bytes:
+    """
+    Resize an image. This runs in the rendering pool, so it must stay picklable.
+
+    :param data: the original image
+    :param width: the maximum width of the thumbnail, ``None`` to keep the size
+    :param quality: the encoding quality, ``None`` for the default of the format
+    :param image_format: the Pillow format to encode the thumbnail in
+    :param max_pixels: the maximum number of pixels of the original image
+    :return: the encoded thumbnail
+    :raises RenderError: if the image cannot be decoded or is too large
+    """
+    try:
+        img = Image.open(BytesIO(data))
+        if img.width * img.height > max_pixels:
+            raise RenderError(f"Image is too large: {img.width}x{img.height}px.")
+
+        # Images rotated by their EXIF orientation are stored sideways.
+        is_sideways = img.getexif().get(ExifTags.Base.Orientation) in {5, 6, 7, 8}
+        upright_width, upright_height = img.size[::-1] if is_sideways else img.size
+        if width and upright_width > width:
+            height = max(1, upright_height * width // upright_width)
+            # Let the JPEG decoder downscale by a power of two while decoding,
+            # which is much cheaper than decoding at full size.
+            img.draft("RGB", (height, width) if is_sideways else (width, height))
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((width, height), reducing_gap=2.0)
+        else:
+            img = ImageOps.exif_transpose(img)
+
+        if img.mode not in {"RGB", "RGBA", "L"} or (
+            image_format == DEFAULT_FORMAT and img.mode == "RGBA"
+        ):
+            img = img.convert("RGB")
+
+        output = BytesIO()
+        params = {"quality": quality} if quality else {}
+        img.save(output, image_format, **params)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        raise RenderError(f"Could not decode image: {exc}")
+    return output.getvalue()
+
+
+def _download(image_url: str) -> bytes:
+    with get_session().get(
+        image_url,
+        timeout=(settings.THUMBNAIL_CONNECT_TIMEOUT, settings.THUMBNAIL_READ_TIMEOUT),
+        headers=HEADERS,
+        stream=True,
+    ) as response:
+        response.raise_for_status()
+        data = BytesIO()
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            data.write(chunk)
+            if data.tell() > settings.THUMBNAIL_MAX_INPUT_BYTES:
+                raise RenderError("Image is too large to download.")
+    return data.getvalue()
+
+
+def get(
+    image_url: str,
+    accept_header: str = "image/*",
+    is_full_size: bool = False,
+    is_compressed: bool = True,
+) -> HttpResponse:
+    """Render the thumbnail of an image, with the same interface as ``photon.get``."""
+    logger = parent_logger.getChild("get")
+    width = None if is_full_size else int(settings.THUMBNAIL_WIDTH_PX)
+    quality = int(settings.THUMBNAIL_QUALITY) if is_compressed else None
+    image_format = get_output_format(accept_header)
+
+    try:
+        data = _download(image_url)
+        args = (data, width, quality, image_format, settings.THUMBNAIL_MAX_INPUT_PIXELS)
+        if settings.THUMBNAIL_RENDER_PROCESSES:
+            pool, slots = _get_pool()
+            with slots:
+                future = pool.submit(render, *args)
+                thumbnail = future.result(timeout=settings.THUMBNAIL_RENDER_TIMEOUT)
+        else:
+            thumbnail = render(*args)
+    except RenderError as exc:
+        logger.info(f"Could not render thumbnail image_url={image_url}: {exc}")
+        raise UpstreamThumbnailException(f"Failed to render thumbnail. {exc}")
+    except FutureTimeoutError:
+        raise UpstreamThumbnailException("Failed to render thumbnail due to timeout.")
+    except BrokenProcessPool as exc:
+        # A rendering process died, for example because it ran out of memory.
+        logger.warning(f"Rendering pool is broken image_url={image_url}: {exc}")
+        sentry_sdk.capture_exception(exc)
+        _discard_pool(pool)
+        raise UpstreamThumbnailException("Failed to render thumbnail.")
+    except requests.RequestException as exc:
+        sentry_sdk.capture_exception(exc)
+        raise UpstreamThumbnailException(f"Failed to render thumbnail. {exc}")
+
+    response = HttpResponse(thumbnail, content_type=f"image/{image_format.lower()}")
+    patch_vary_headers(response, ["Accept"])
+    return response
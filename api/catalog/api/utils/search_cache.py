@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import TypeVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from elasticsearch.exceptions import TransportError
+
+
+parent_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CACHE_PREFIX = "search_cache:"
+# How long to remember which concrete index an alias points to (in seconds)
+GENERATION_CACHE_TIMEOUT = 60
+# Upper bound on a single background revalidation (in seconds)
+REVALIDATION_LOCK_TIMEOUT = 30
+
+
+def get_index_generation(index: str) -> str:
+    """
+    Get the names of the concrete indices that an index name resolves to.
+
+    When the ingestion server promotes a new index with ``point_alias``, the alias
+    resolves to a different concrete index, so every cache key built from the
+    previous generation stops being used.
+
+    :param index: the name of the alias (or index) being searched
+    :return: a comma-separated list of the concrete index names
+    """
+    key = f"{CACHE_PREFIX}generation:{index}"
+    generation = cache.get(key)
+    if generation is None:
+        try:
+            generation = ",".join(sorted(settings.ES.indices.get_alias(index=index)))
+        except TransportError:
+            # Fall back to the name itself, e.g. for QA indices that are not aliases.
+            generation = index
+        cache.set(key, generation, timeout=GENERATION_CACHE_TIMEOUT)
+    return generation
+
+
+def get_cache_key(
+    search_params, index: str, page_size: int, page: int, filter_dead: bool
+) -> str:
+    """
+    Build a cache key from the normalized search parameters.
+
+    :param search_params: the validated search request serializer
+    :param index: the resolved Elasticsearch index
+    :param page_size: the number of results per page
+    :param page: the page number
+    :param filter_dead: whether dead links are removed from the results
+    :return: the key under which the page of results is cached
+    """
+    params = dict(search_params.data) | {
+        "page_size": page_size,
+        "page": page,
+        "filter_dead": filter_dead,
+    }
+    serialized = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.blake2b(serialized.encode(), digest_size=16).hexdigest()
+    return f"{CACHE_PREFIX}{get_index_generation(index)}:{digest}"
+
+
+def _store(key: str, value) -> None:
+    entry = {
+        "value": value,
+        "fresh_until": time.time() + settings.SEARCH_RESULT_CACHE_FRESH_TTL,
+    }
+    cache.set(key, entry, timeout=settings.SEARCH_RESULT_CACHE_STALE_TTL)
+
+
+def _revalidate_in_background(key: str, compute: Callable[[], T]) -> None:
+    logger = parent_logger.getChild("_revalidate_in_background")
+    lock_key = f"{key}:revalidating"
+    if not cache.add(lock_key, 1, timeout=REVALIDATION_LOCK_TIMEOUT):
+        # Another request is already refreshing this entry.
+        return
+
+    def revalidate():
+        try:
+            _store(key, compute())
+        except Exception as exc:
+            logger.warning(f"Failed to revalidate cached search key={key}: {exc}")
+        finally:
+            cache.delete(lock_key)
+            connections.close_all()
+
+    threading.Thread(target=revalidate, daemon=True).start()
+
+
+def get_or_compute(key: str, compute: Callable[[], T]) -> T:
+    """
+    Get a cached value, computing and caching it on a miss.
+
+    Entries older than ``SEARCH_RESULT_CACHE_FRESH_TTL`` are still served, but are
+    recomputed in the background so that popular queries never wait on
+    Elasticsearch. Entries are evicted after ``SEARCH_RESULT_CACHE_STALE_TTL``.
+
+    :param key: the cache key, see ``get_cache_key``
+    :param compute: a callable producing the value to cache
+    :return: the cached or freshly computed value
+    """
+    logger = parent_logger.getChild("get_or_compute")
+    entry = cache.get(key)
+    if entry is None:
+        logger.debug(f"cache miss key={key}")
+        value = compute()
+        _store(key, value)
+        return value
+
+    if entry["fresh_until"] < time.time():
+        logger.debug(f"serving stale entry key={key}")
+        _revalidate_in_background(key, compute)
+
+    return entry["value"]
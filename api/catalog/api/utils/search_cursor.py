@@ -0,0 +1,65 @@
+"""Opaque continuation tokens for walking search results with a point in time."""
+
+import hashlib
+import json
+from collections.abc import Mapping
+
+from django.core import signing
+
+
+SALT = "catalog.api.utils.search_cursor"
+# Parameters that may change from one page to the next
+IGNORED_PARAMS = {"cursor", "page_size"}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def get_params_hash(query_params: Mapping) -> str:
+    """
+    Hash the search parameters that a cursor is bound to.
+
+    :param query_params: the query string parameters of the search request
+    :return: the hash of the parameters that must stay the same between pages
+    """
+    params = {
+        key: query_params[key] for key in query_params if key not in IGNORED_PARAMS
+    }
+    serialized = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(serialized.encode(), digest_size=16).hexdigest()
+
+
+def dumps(pit_id: str, search_after: list, params_hash: str) -> str:
+    """
+    Serialize the position in the results into a signed token.
+
+    :param pit_id: the ID of the Elasticsearch point in time
+    :param search_after: the sort values of the last hit of the page
+    :param params_hash: the hash of the search parameters, see ``get_params_hash``
+    :return: the cursor for the next page
+    """
+    return signing.dumps(
+        {"pit": pit_id, "search_after": search_after, "params": params_hash},
+        salt=SALT,
+        compress=True,
+    )
+
+
+def loads(cursor: str, params_hash: str) -> dict:
+    """
+    Deserialize a token created by ``dumps`` for the same search parameters.
+
+    :param cursor: the cursor sent by the client
+    :param params_hash: the hash of the search parameters of the request
+    :return: the ``pit`` ID and ``search_after`` sort values of the cursor
+    :raises InvalidCursor: if the cursor was tampered with or belongs to a search
+    with other parameters
+    """
+    try:
+        payload = signing.loads(cursor, salt=SALT)
+    except signing.BadSignature:
+        raise InvalidCursor("Invalid cursor.")
+    if payload["params"] != params_hash:
+        raise InvalidCursor("The cursor belongs to a search with other parameters.")
+    return payload
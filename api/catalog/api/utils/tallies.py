@@ -1,9 +1,22 @@
+import atexit
+import logging
+import os
+import threading
+import time
 from collections import defaultdict
+from collections.abc import Callable
 from datetime import datetime, timedelta
 
+from django.conf import settings
+
 import django_redis
 from django_redis.client.default import Redis
 
+from catalog.api.utils import async_redis
+
+
+parent_logger = logging.getLogger(__name__)
+
 
 def _get_weekly_timestamp() -> str:
     """Get a timestamp for the Monday of any given week."""
@@ -12,7 +25,7 @@ def _get_weekly_timestamp() -> str:
     return monday.strftime("%Y-%m-%d")
 
 
-def count_provider_occurrences(results: list[dict], index: str) -> None:
+def _increment(counts: dict[str, int]) -> None:
     # Use ``get_redis_connection`` rather than Django's caches
     # so that we can open a pipeline rather than sending off ``n``
     # writes and because the RedisPy client's ``incr`` method
@@ -22,14 +35,138 @@ def count_provider_occurrences(results: list[dict], index: str) -> None:
     # just initialising the key to the value like Redis's behaviour.
     tallies: Redis = django_redis.get_redis_connection("tallies")
 
+    with tallies.pipeline() as pipe:
+        for key, count in counts.items():
+            pipe.incr(key, count)
+
+        pipe.execute()
+
+
+class TallyBuffer:
+    """
+    Accumulates tallies in the process and adds them to Redis from a background
+    thread, every ``flush_interval`` seconds or once ``max_keys`` tallies are
+    buffered, whichever comes first.
+
+    The tallies are added with ``_increment``, unless another ``increment``
+    function is given. If that fails, the tallies are kept and added again after
+    ``flush_interval`` seconds, unless more than ``max_backlog`` tallies would be
+    kept, in which case they are dropped.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float,
+        max_keys: int,
+        increment: Callable[[dict[str, int]], None] | None = None,
+        max_backlog: int | None = None,
+    ):
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self.max_backlog = max_backlog or max_keys * 10
+        self.increment = increment
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+        self._full = threading.Event()
+        self._pid = None
+
+    def add(self, counts: dict[str, int]) -> None:
+        self._ensure_started()
+        with self._lock:
+            for key, count in counts.items():
+                self._counts[key] += count
+            if len(self._counts) >= self.max_keys:
+                self._full.set()
+
+    def flush(self) -> bool:
+        """
+        Add the buffered tallies to Redis.
+
+        :return: whether the tallies were added, or there were none
+        """
+
+        logger = parent_logger.getChild("TallyBuffer.flush")
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+        if not counts:
+            return True
+
+        try:
+            (self.increment or _increment)(counts)
+        except Exception as exc:
+            with self._lock:
+                for key, count in self._counts.items():
+                    counts[key] += count
+                is_kept = len(counts) <= self.max_backlog
+                # Keep the tallies for the next flush, unless there are too many.
+                self._counts = counts if is_kept else defaultdict(int)
+            if is_kept:
+                logger.warning(f"Failed to flush {len(counts)} tallies: {exc}")
+            else:
+                logger.error(f"Dropped {len(counts)} tallies: {exc}")
+            return False
+        return True
+
+    def _run(self) -> None:
+        while True:
+            self._full.wait(self.flush_interval)
+            self._full.clear()
+            if not self.flush():
+                # Do not retry as soon as the buffer is full again, Redis is down.
+                time.sleep(self.flush_interval)
+
+    def _ensure_started(self) -> None:
+        """Start the flushing thread, once per process."""
+
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Tallies copied from the parent process are flushed by the parent.
+            self._counts.clear()
+            threading.Thread(target=self._run, daemon=True).start()
+            # Flush the remaining tallies when the worker shuts down gracefully.
+            atexit.register(self.flush)
+            self._pid = os.getpid()
+
+
+_buffer = TallyBuffer(settings.TALLIES_FLUSH_INTERVAL, settings.TALLIES_FLUSH_SIZE)
+
+
+def _get_counts(results: list[dict], index: str) -> dict[str, int]:
     provider_occurrences = defaultdict(int)
     for result in results:
         provider_occurrences[result["provider"]] += 1
 
     week = _get_weekly_timestamp()
-    with tallies.pipeline() as pipe:
-        for provider, occurrences in provider_occurrences.items():
-            pipe.incr(f"provider_occurrences:{index}:{week}:{provider}", occurrences)
-            pipe.incr(f"provider_appeared_in_searches:{index}:{week}:{provider}", 1)
+    counts = {}
+    for provider, occurrences in provider_occurrences.items():
+        counts[f"provider_occurrences:{index}:{week}:{provider}"] = occurrences
+        counts[f"provider_appeared_in_searches:{index}:{week}:{provider}"] = 1
+    return counts
 
-        pipe.execute()
+
+def count_provider_occurrences(results: list[dict], index: str) -> None:
+    counts = _get_counts(results, index)
+
+    if settings.ENABLE_BUFFERED_TALLIES:
+        _buffer.add(counts)
+    else:
+        _increment(counts)
+
+
+async def acount_provider_occurrences(results: list[dict], index: str) -> None:
+    """Async variant of ``count_provider_occurrences``."""
+
+    counts = _get_counts(results, index)
+
+    if settings.ENABLE_BUFFERED_TALLIES:
+        _buffer.add(counts)
+    else:
+        tallies = async_redis.get_redis_connection("tallies")
+        async with tallies.pipeline() as pipe:
+            for key, count in counts.items():
+                pipe.incr(key, count)
+
+            await pipe.execute()
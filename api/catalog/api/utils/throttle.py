@@ -1,27 +1,171 @@
 import abc
 import logging
+import time
+from uuid import uuid4
 
 from rest_framework.throttling import SimpleRateThrottle
 
 from django_redis import get_redis_connection
 
-from catalog.api.utils.oauth2_helper import get_token_info
+from catalog.api.utils.oauth2_helper import get_request_token_info
 
 
 parent_logger = logging.getLogger(__name__)
 
+# Evaluates every throttle scope of a request at once, as a sliding window log: the
+# sorted set of each scope holds the times of the requests made within the window.
+# A request is recorded in each scope that allows it, like ``SimpleRateThrottle``.
+# A request can count as several, up to the whole quota of a scope, in which case
+# it is recorded as many times. Scopes that honour the IP whitelist are skipped for
+# whitelisted IP addresses.
+#
+# KEYS: the sorted set of each scope
+# ARGV[1]: the current time (in ms), ARGV[2]: a unique ID for the request,
+# ARGV[3]: the IP address of the request, ARGV[4]: the number of requests that the
+# request counts as, then for each scope: the number of allowed requests, the
+# duration of the window (in ms), and whether it honours the IP whitelist ("1" or
+# "0")
+# Returns for each scope: whether the request is allowed (1 or 0), the number of
+# available requests (-1 for whitelisted IP addresses), and the time until the
+# request would be allowed (in ms)
+THROTTLE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[4])
+local whitelisted = redis.call("SISMEMBER", "ip-whitelist", ARGV[3]) == 1
+
+local results = {}
+for i, key in ipairs(KEYS) do
+    local num_requests = tonumber(ARGV[i * 3 + 2])
+    local duration = tonumber(ARGV[i * 3 + 3])
+    if whitelisted and ARGV[i * 3 + 4] == "1" then
+        results[i] = {1, -1, 0}
+    else
+        redis.call("ZREMRANGEBYSCORE", key, "-inf", now - duration)
+        local count = redis.call("ZCARD", key)
+        local weight = math.max(1, math.min(cost, num_requests))
+        if count + weight <= num_requests then
+            for n = 1, weight do
+                redis.call("ZADD", key, now, ARGV[2] .. ":" .. n)
+            end
+            redis.call("PEXPIRE", key, duration)
+            results[i] = {1, num_requests - count - weight, 0}
+        else
+            -- Wait for enough of the oldest requests to leave the window.
+            local index = count + weight - num_requests - 1
+            local oldest = redis.call("ZRANGE", key, index, index, "WITHSCORES")
+            results[i] = {0, 0, tonumber(oldest[2]) + duration - now}
+        end
+    end
+end
+return results
+"""
+
+
+def _evaluate_throttles(request, view, throttles) -> dict[str, tuple[bool, int, int]]:
+    """
+    Evaluate the throttles of a request in a single call to Redis.
+
+    Views that do the work of several requests at once, like batch searches, count
+    as that many requests by defining ``get_throttle_cost(request)``.
+
+    :param request: the DRF request
+    :param view: the view handling the request
+    :param throttles: the throttles to evaluate
+    :return: a mapping of the cache key of each applicable throttle to whether the
+    request is allowed, the number of available requests, and the time until the
+    request would be allowed (in ms)
+    """
+    cost = 1
+    if (get_throttle_cost := getattr(view, "get_throttle_cost", None)) is not None:
+        cost = get_throttle_cost(request)
+
+    keys = []
+    args = [int(time.time() * 1000), uuid4().hex, "", cost]
+    for throttle in throttles:
+        if not isinstance(throttle, SimpleRateThrottleHeader) or throttle.rate is None:
+            continue
+        if (key := throttle.get_cache_key(request, view)) is None or key in keys:
+            continue
+        honours_whitelist = isinstance(throttle, AbstractAnonRateThrottle)
+        if honours_whitelist:
+            args[2] = throttle.get_ident(request)
+        keys.append(key)
+        args += [
+            throttle.num_requests,
+            throttle.duration * 1000,
+            int(honours_whitelist),
+        ]
+
+    if not keys:
+        return {}
+
+    redis = get_redis_connection("default")
+    results = redis.register_script(THROTTLE_SCRIPT)(keys=keys, args=args)
+    return {
+        key: (bool(allowed), int(available), int(wait))
+        for key, (allowed, available, wait) in zip(keys, results)
+    }
+
+
+def get_request_count(scope: str, ident: str) -> int | None:
+    """
+    Count the requests recorded for an identity within the window of a scope.
+
+    :param scope: the throttle scope
+    :param ident: the identity, an IP address or a client ID
+    :return: the number of requests, or ``None`` if there are none
+    """
+    key = SimpleRateThrottle.cache_format % {"scope": scope, "ident": ident}
+    redis = get_redis_connection("default", write=False)
+    if (rate := SimpleRateThrottle.THROTTLE_RATES.get(scope)) is None:
+        count = redis.zcard(key)
+    else:
+        _, duration = SimpleRateThrottle.parse_rate(None, rate)
+        count = redis.zcount(key, int((time.time() - duration) * 1000), "+inf")
+    return count or None
+
 
 class SimpleRateThrottleHeader(SimpleRateThrottle, metaclass=abc.ABCMeta):
     """
     Extends the ``SimpleRateThrottle`` class to provide additional functionality such as
     rate-limit headers in the response.
+
+    Instead of storing the history of each scope in the cache, the throttles of a
+    view are evaluated together by an atomic Redis script, once per request.
     """
 
+    logger = parent_logger.getChild("SimpleRateThrottleHeader")
+    available: int | None = None
+
     def allow_request(self, request, view):
-        is_allowed = super().allow_request(request, view)
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        results = getattr(request, "_throttle_results", None)
+        if results is None:
+            results = _evaluate_throttles(request, view, view.get_throttles())
+            request._throttle_results = results
+        if self.key not in results:
+            # The throttle is not one of the throttles of the view.
+            results |= _evaluate_throttles(request, view, [self])
+
+        is_allowed, available, self.wait_ms = results[self.key]
+        if available < 0:
+            logger = self.logger.getChild("allow_request")
+            logger.info(f"bypassing rate limiting for key={self.key}")
+            return True
+
+        self.available = available
         view.headers |= self.headers()
         return is_allowed
 
+    def wait(self):
+        return self.wait_ms / 1000
+
     def headers(self):
         """
         Get `X-RateLimit-` headers for this particular throttle. Each pair of headers
@@ -31,10 +175,10 @@ class SimpleRateThrottleHeader(SimpleRateThrottle, metaclass=abc.ABCMeta):
 
         prefix = "X-RateLimit"
         suffix = self.scope or self.__class__.__name__.lower()
-        if hasattr(self, "history"):
+        if self.available is not None:
             return {
                 f"{prefix}-Limit-{suffix}": self.rate,
-                f"{prefix}-Available-{suffix}": self.num_requests - len(self.history),
+                f"{prefix}-Available-{suffix}": self.available,
             }
         else:
             return {}
@@ -45,32 +189,26 @@ class AbstractAnonRateThrottle(SimpleRateThrottleHeader, metaclass=abc.ABCMeta):
     Limits the rate of API calls that may be made by a anonymous users.
 
     The IP address of the request will be used as the unique cache key.
+
+    IP addresses in the ``ip-whitelist`` Redis set are exempt. This exists as a legacy
+    holdover and usages of this should be replaced with the exempt API key as it is
+    easier to manage via Django admin and doesn't require leaky permissions in our
+    production infra.
     """
 
     logger = parent_logger.getChild("AnonRateThrottle")
 
     def get_cache_key(self, request, view):
-        logger = self.logger.getChild("get_cache_key")
         # Do not apply anonymous throttle to request with valid tokens.
         if request.auth:
-            client_id, _, verified = get_token_info(str(request.auth))
+            client_id, _, verified = get_request_token_info(request)
             if client_id and verified:
                 return None
 
-        ident = self.get_ident(request)
-        redis = get_redis_connection("default", write=False)
-        if redis.sismember("ip-whitelist", ident):
-            logger.info(f"bypassing rate limiting for ident={ident}")
-            """
-            Exempt internal IP addresses. Exists as a legacy holdover and usages of this
-            should be replaced with the exempt API key as it is easier to manage via
-            Django admin and doesn't require leaky permissions in our production infra.
-            """
-            return None
-
+        # The IP whitelist is checked by ``THROTTLE_SCRIPT``.
         return self.cache_format % {
             "scope": self.scope,
-            "ident": ident,
+            "ident": self.get_ident(request),
         }
 
 
@@ -108,8 +246,7 @@ class AbstractOAuth2IdRateThrottle(SimpleRateThrottleHeader, metaclass=abc.ABCMe
 
     def get_cache_key(self, request, view):
         # Find the client ID associated with the access token.
-        auth = str(request.auth)
-        client_id, rate_limit_model, verified = get_token_info(auth)
+        client_id, rate_limit_model, verified = get_request_token_info(request)
         if client_id and rate_limit_model == self.applies_to_rate_limit_model:
             ident = client_id
         else:
@@ -0,0 +1,199 @@
+"""
+Cache the thumbnails rendered by Photon, on the local disk and optionally in Redis.
+
+Thumbnails are fresh for ``THUMBNAIL_CACHE_FRESH_TTL`` seconds. Once stale, they are
+revalidated with a conditional request to Photon before being served again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+
+import django_redis
+from redis.exceptions import RedisError
+
+
+parent_logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = "thumbnail:"
+# Fraction of the size cap to free when evicting, so eviction does not run on
+# every write
+EVICTION_RATIO = 0.9
+
+
+@dataclass
+class CachedThumbnail:
+    content: bytes = field(repr=False)
+    content_type: str
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = field(default_factory=time.time)
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() - self.fetched_at < settings.THUMBNAIL_CACHE_FRESH_TTL
+
+    @property
+    def response_etag(self) -> str:
+        """Get the ETag to send to clients, which Photon does not always provide."""
+
+        if self.etag:
+            return self.etag
+        return f'"{hashlib.blake2b(self.content, digest_size=16).hexdigest()}"'
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Get the headers to revalidate the thumbnail with Photon."""
+
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def dumps(self) -> bytes:
+        meta = asdict(self)
+        del meta["content"]
+        return json.dumps(meta).encode() + b"\n" + self.content
+
+    @classmethod
+    def loads(cls, data: bytes) -> "CachedThumbnail":
+        meta, content = data.split(b"\n", 1)
+        return cls(content=content, **json.loads(meta))
+
+
+def get_key(upstream_url: str, params: dict, accept_header: str) -> str:
+    """
+    Build the cache key of a thumbnail.
+
+    :param upstream_url: the Photon URL of the thumbnail, without query string
+    :param params: the Photon parameters, e.g. width and quality
+    :param accept_header: the formats accepted by the client
+    :return: the key under which the thumbnail is cached
+    """
+    serialized = json.dumps(
+        [upstream_url, params, accept_header], sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.blake2b(serialized.encode(), digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """
+    Store thumbnails as files, evicting the least recently used ones when the
+    total size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._written_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> CachedThumbnail | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            # The modification time orders the entries for eviction.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return CachedThumbnail.loads(data)
+
+    def set(self, key: str, thumbnail: CachedThumbnail):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = thumbnail.dumps()
+        # Write to a temporary file first so that readers never see partial files.
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as file:
+            file.write(data)
+        os.replace(file.name, path)
+
+        with self._lock:
+            self._written_bytes += len(data)
+            should_evict = self._written_bytes > self.max_bytes * (1 - EVICTION_RATIO)
+            if should_evict:
+                self._written_bytes = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        files = []
+        for path in self.directory.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in files)
+        if total_size <= self.max_bytes:
+            return
+        for _, size, path in sorted(files):
+            path.unlink(missing_ok=True)
+            total_size -= size
+            if total_size <= self.max_bytes * EVICTION_RATIO:
+                break
+
+
+disk_cache = DiskCache(settings.THUMBNAIL_CACHE_DIR, settings.THUMBNAIL_CACHE_MAX_BYTES)
+
+
+def get(key: str) -> CachedThumbnail | None:
+    """
+    Get a thumbnail from the disk, falling back to Redis if enabled.
+
+    :param key: the key of the thumbnail, see ``get_key``
+    :return: the cached thumbnail, if any, fresh or not
+    """
+    logger = parent_logger.getChild("get")
+    if thumbnail := disk_cache.get(key):
+        return thumbnail
+    if not settings.THUMBNAIL_CACHE_REDIS_TTL:
+        return None
+
+    try:
+        data = django_redis.get_redis_connection("default").get(f"{REDIS_PREFIX}{key}")
+    except RedisError as exc:
+        logger.warning(f"Failed to read thumbnail from Redis: {exc}")
+        return None
+    if data is None:
+        return None
+    thumbnail = CachedThumbnail.loads(data)
+    disk_cache.set(key, thumbnail)
+    return thumbnail
+
+
+def set(key: str, thumbnail: CachedThumbnail):
+    """
+    Store a thumbnail on the disk and, if enabled and small enough, in Redis.
+
+    :param key: the key of the thumbnail, see ``get_key``
+    :param thumbnail: the thumbnail to cache
+    """
+    logger = parent_logger.getChild("set")
+    disk_cache.set(key, thumbnail)
+    if not settings.THUMBNAIL_CACHE_REDIS_TTL:
+        return
+    if len(thumbnail.content) > settings.THUMBNAIL_CACHE_REDIS_MAX_BYTES:
+        return
+
+    try:
+        django_redis.get_redis_connection("default").set(
+            f"{REDIS_PREFIX}{key}",
+            thumbnail.dumps(),
+            ex=settings.THUMBNAIL_CACHE_REDIS_TTL,
+        )
+    except RedisError as exc:
+        logger.warning(f"Failed to write thumbnail to Redis: {exc}")
@@ -0,0 +1,203 @@
+"""
+Timing of the stages of the search hot path.
+
+The durations of the stages of each request are reported in its ``Server-Timing``
+header, see ``catalog.api.middleware.server_timing_middleware``, and aggregated
+into histograms, served in the Prometheus text format by ``render_metrics``.
+"""
+
+import logging
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+from django.conf import settings
+
+import django_redis
+from django_redis.client.default import Redis
+
+from catalog.api.utils.tallies import TallyBuffer
+
+
+parent_logger = logging.getLogger(__name__)
+
+
+METRICS_KEY = "search_timing"
+# The upper bounds of the histogram buckets, in seconds.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DURATION_METRIC = "openverse_search_stage_duration_seconds"
+EVENT_METRIC = "openverse_search_stage_events_total"
+
+
+class Timings:
+    """The durations of the stages of a request, and the events counted in them."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations: dict[str, float] = defaultdict(float)
+        self.calls: dict[str, int] = defaultdict(int)
+        self.events: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, stage: str, duration: float) -> None:
+        self.durations[stage] += duration
+        self.calls[stage] += 1
+
+    def count(self, stage: str, **events: int) -> None:
+        for event, count in events.items():
+            self.events[stage][event] += count
+
+    def finish(self) -> None:
+        """Record the total duration of the request."""
+
+        self.add("total", time.perf_counter() - self.started_at)
+
+    def get_header(self) -> str:
+        """
+        Format the durations as the value of a ``Server-Timing`` header.
+
+        Stages run several times per request, like the backfills of dead links,
+        are summed up, with the number of calls in their description.
+        """
+        metrics = []
+        for stage, duration in self.durations.items():
+            metric = f"{stage};dur={duration * 1000:.1f}"
+            description = [f"{event}={n}" for event, n in self.events[stage].items()]
+            if self.calls[stage] > 1:
+                description.insert(0, f"calls={self.calls[stage]}")
+            if description:
+                metric += f';desc="{" ".join(description)}"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+    def get_metric_counts(self, view: str) -> dict[str, int]:
+        """
+        Get the increments of the histograms and counters for this request.
+
+        Fields are ``view|stage|b|<bucket index>`` for the histogram buckets,
+        ``view|stage|s`` for the sum of the durations in microseconds, and
+        ``view|stage|e|<event>`` for the events.
+        """
+        counts = {}
+        for stage, duration in self.durations.items():
+            counts[f"{view}|{stage}|b|{bisect_left(BUCKETS, duration)}"] = 1
+            counts[f"{view}|{stage}|s"] = round(duration * 1e6)
+        for stage, events in self.events.items():
+            for event, n in events.items():
+                counts[f"{view}|{stage}|e|{event}"] = n
+        return counts
+
+
+_current: ContextVar[Timings | None] = ContextVar("timings", default=None)
+
+
+def start() -> tuple[Timings, Token]:
+    """Start timing the stages of the current request."""
+
+    timings = Timings()
+    return timings, _current.set(timings)
+
+
+def stop(token: Token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as a stage of the current request, if timed."""
+
+    if (timings := _current.get()) is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(stage, time.perf_counter() - started_at)
+
+
+def add(stage: str, duration: float) -> None:
+    """Record a duration measured elsewhere, like the ``took`` of Elasticsearch."""
+
+    if (timings := _current.get()) is not None:
+        timings.add(stage, duration)
+
+
+def count(stage: str, **events: int) -> None:
+    """Count events, like the links validated, in a stage of the current request."""
+
+    if (timings := _current.get()) is not None:
+        timings.count(stage, **events)
+
+
+def _increment(counts: dict[str, int]) -> None:
+    redis: Redis = django_redis.get_redis_connection("traffic_stats")
+    with redis.pipeline() as pipe:
+        for field, count in counts.items():
+            pipe.hincrby(METRICS_KEY, field, count)
+        pipe.execute()
+
+
+# Shared by all the requests handled by this process.
+_buffer = TallyBuffer(
+    settings.SEARCH_TIMING_FLUSH_INTERVAL,
+    settings.SEARCH_TIMING_FLUSH_SIZE,
+    increment=_increment,
+)
+
+
+def record(view: str, timings: Timings) -> None:
+    """
+    Add the timings of a request to the histograms.
+
+    :param view: the name of the view that handled the request
+    :param timings: the timings of the request
+    """
+    _buffer.add(timings.get_metric_counts(view))
+
+
+def render_metrics() -> str:
+    """
+    Render the histograms of all the API workers in the Prometheus text format.
+
+    :return: the text of the metrics
+    """
+    redis: Redis = django_redis.get_redis_connection("traffic_stats")
+    fields = redis.hgetall(METRICS_KEY)
+
+    buckets = defaultdict(lambda: [0] * (len(BUCKETS) + 1))
+    sums = {}
+    events = {}
+    for field, value in fields.items():
+        view, stage, kind, *rest = field.decode().split("|")
+        if kind == "b":
+            buckets[view, stage][int(rest[0])] = int(value)
+        elif kind == "s":
+            sums[view, stage] = int(value) / 1e6
+        elif kind == "e":
+            events[view, stage, rest[0]] = int(value)
+
+    lines = [
+        f"# HELP {DURATION_METRIC} The duration of the stages of search requests.",
+        f"# TYPE {DURATION_METRIC} histogram",
+    ]
+    for (view, stage), counts in sorted(buckets.items()):
+        labels = f'view="{view}",stage="{stage}"'
+        cumulative = 0
+        for bound, n in zip((*BUCKETS, "+Inf"), counts):
+            cumulative += n
+            lines.append(
+                f'{DURATION_METRIC}_bucket{{{labels},le="{bound}"}} {cumulative}'
+            )
+        lines.append(f"{DURATION_METRIC}_sum{{{labels}}} {sums.get((view, stage), 0)}")
+        lines.append(f"{DURATION_METRIC}_count{{{labels}}} {cumulative}")
+
+    lines += [
+        f"# HELP {EVENT_METRIC} The events counted in the stages of search requests.",
+        f"# TYPE {EVENT_METRIC} counter",
+    ]
+    for (view, stage, event), n in sorted(events.items()):
+        labels = f'view="{view}",stage="{stage}",event="{event}"'
+        lines.append(f"{EVENT_METRIC}{{{labels}}} {n}")
+    return "\n".join(lines) + "\n"
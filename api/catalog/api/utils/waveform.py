@@ -6,9 +6,15 @@ import os
 import pathlib
 import shutil
 import subprocess
+import tempfile
+import threading
+from collections.abc import Iterable
+from functools import partial
 
 from django.conf import settings
 
+import aiohttp
+import numpy as np
 import requests
 
 
@@ -16,6 +22,13 @@ parent_logger = logging.getLogger(__name__)
 
 TMP_DIR = pathlib.Path("/tmp").resolve()
 UA_STRING = settings.OUTBOUND_USER_AGENT_TEMPLATE.format(purpose="Waveform")
+# Size of the chunks written when downloading audio (in bytes)
+CHUNK_SIZE = 64 * 1024
+# The number of peaks computed by ``peaks_from_samples``, which is the approximate
+# resolution of the waveforms generated by ``audiowaveform``
+PEAK_COUNT = 1000
+# Audio is decoded at a low sample rate, which is plenty to compute 1000 peaks.
+DECODE_SAMPLE_RATE = 8000
 
 
 def ext_from_url(url):
@@ -36,6 +49,13 @@ def ext_from_url(url):
         return None
 
 
+def _get_file_name(url, identifier, mimetype):
+    ext = ext_from_url(url) or mimetypes.guess_extension(mimetype)
+    if ext is None:
+        raise ValueError("Could not identify media extension")
+    return f"audio-{identifier}{ext}"
+
+
 def download_audio(url, identifier):
     """
     Download the audio from the given URL to a location on the disk.
@@ -53,16 +73,40 @@ def download_audio(url, identifier):
         logger.debug(f"res.status_code={res.status_code}")
         mimetype = res.headers["content-type"]
         logger.debug(f"mimetype={mimetype}")
-        ext = ext_from_url(url) or mimetypes.guess_extension(mimetype)
-        if ext is None:
-            raise ValueError("Could not identify media extension")
-        file_name = f"audio-{identifier}{ext}"
+        file_name = _get_file_name(url, identifier, mimetype)
         logger.debug(f"file name={file_name}")
         with open(TMP_DIR.joinpath(file_name), "wb") as file:
             shutil.copyfileobj(res.raw, file)
     return file_name
 
 
+async def download_audio_async(session: aiohttp.ClientSession, url, identifier):
+    """
+    Download the audio from the given URL to a location on the disk, without
+    blocking the event loop. Used to download many files concurrently.
+
+    :param session: the ``aiohttp`` session to download the file with
+    :param url: the URL to the file being downloaded
+    :param identifier: the identifier of the media object to name the file
+    :returns: the name of the file on the disk
+    """
+
+    logger = parent_logger.getChild("download_audio_async")
+    logger.info(f"downloading file url={url}")
+
+    headers = {"User-Agent": UA_STRING}
+    async with session.get(url, headers=headers, raise_for_status=True) as res:
+        file_name = _get_file_name(url, identifier, res.headers["content-type"])
+        try:
+            with open(TMP_DIR.joinpath(file_name), "wb") as file:
+                async for chunk in res.content.iter_chunked(CHUNK_SIZE):
+                    file.write(chunk)
+        except BaseException:
+            cleanup(file_name)
+            raise
+    return file_name
+
+
 def generate_waveform(file_name, duration):
     """
     Generate the waveform for the file by invoking the ``audiowaveform`` binary.
@@ -148,12 +192,130 @@ def cleanup(file_name):
         logger.debug("file not found, nothing deleted")
 
 
-def generate_peaks(audio) -> list[float]:
-    file_name = None
+def decode_audio(chunks: Iterable[bytes]) -> np.ndarray:
+    """
+    Decode audio into mono 16-bit samples, by piping it through ``ffmpeg``.
+
+    :param chunks: the encoded audio, as it is downloaded
+    :returns: the decoded samples
+    :raises subprocess.CalledProcessError: if the audio cannot be decoded
+    :raises Exception: any exception raised while iterating over ``chunks``
+    """
+
+    logger = parent_logger.getChild("decode_audio")
+    args = [
+        "ffmpeg",
+        *("-hide_banner", "-loglevel", "error"),
+        *("-i", "pipe:0"),
+        *("-f", "s16le", "-ac", "1", "-ar", str(DECODE_SAMPLE_RATE)),
+        "pipe:1",
+    ]
+    logger.debug(f'executing subprocess command={" ".join(args)}')
+    # Errors go to a file, as ``ffmpeg`` logs one per bad frame of a corrupt file,
+    # which could fill a pipe and block ``ffmpeg`` before it closes stdout.
+    errors = tempfile.TemporaryFile()
+    proc = subprocess.Popen(
+        args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=errors
+    )
+
+    feed_errors = []
+
+    def feed():
+        try:
+            for chunk in chunks:
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # ``ffmpeg`` exited early, its error is raised below.
+        except Exception as exc:
+            # Raised below, or ``ffmpeg`` would decode a truncated download.
+            feed_errors.append(exc)
+        finally:
+            proc.stdin.close()
+
+    # Write in another thread, so that ``ffmpeg`` never blocks on a full stdout.
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    with errors:
+        samples = proc.stdout.read()
+        writer.join()
+        returncode = proc.wait()
+        if feed_errors:
+            raise feed_errors[0]
+        if returncode:
+            errors.seek(0)
+            raise subprocess.CalledProcessError(returncode, args, stderr=errors.read())
+    logger.debug(f"finished subprocess len(samples)={len(samples) // 2}")
+    return np.frombuffer(samples, dtype="<i2")
+
+
+def peaks_from_samples(samples: np.ndarray, count: int = PEAK_COUNT) -> list[float]:
+    """
+    Compute the peaks of decoded audio, with the same transformation as
+    ``process_waveform_output``.
+
+    The samples are split in ``count`` buckets of nearly equal length. The peak of
+    a bucket is its largest sample, or 0 if negative, scaled down by the largest
+    peak so that it lies in the range [0, 1].
+
+    :param samples: the decoded audio
+    :param count: the number of peaks to compute
+    :returns: the list of peaks
+    """
+
+    if not samples.size:
+        return []
+    count = min(count, samples.size)
+    bucket_starts = np.linspace(0, samples.size, count, endpoint=False).astype(int)
+    peaks = np.maximum.reduceat(samples, bucket_starts).clip(min=0)
+    if not (max_val := peaks.max()):
+        return [0.0] * count
+    # ``round`` is cheap for 1000 values and rounds exactly like the original.
+    return [round(val, 5) for val in (peaks / max_val).tolist()]
+
+
+def stream_peaks(url) -> list[float]:
+    """
+    Generate the peaks of the audio at the given URL, decoding it as it is
+    downloaded instead of writing it to the disk.
+
+    :param url: the URL to the audio file
+    :returns: the list of peaks
+    """
+
+    logger = parent_logger.getChild("stream_peaks")
+    logger.info(f"streaming file url={url}")
+
+    headers = {"User-Agent": UA_STRING}
+    timeout = (settings.WAVEFORM_CONNECT_TIMEOUT, settings.WAVEFORM_READ_TIMEOUT)
+    with requests.get(url, stream=True, headers=headers, timeout=timeout) as res:
+        res.raise_for_status()
+        samples = decode_audio(res.iter_content(chunk_size=CHUNK_SIZE))
+    return peaks_from_samples(samples)
+
+
+def peaks_from_file(file_name, duration) -> list[float]:
+    """
+    Generate the peaks of a downloaded audio file, then delete the file.
+
+    :param file_name: the name of the downloaded audio file
+    :param duration: the duration of the audio to determine pixels per second
+    :returns: the list of peaks
+    """
+
     try:
-        file_name = download_audio(audio.url, audio.identifier)
-        awf_out = generate_waveform(file_name, audio.duration)
+        if settings.WAVEFORM_EXTRACTOR == "numpy":
+            with open(TMP_DIR.joinpath(file_name), "rb") as file:
+                return peaks_from_samples(
+                    decode_audio(iter(partial(file.read, CHUNK_SIZE), b""))
+                )
+        awf_out = generate_waveform(file_name, duration)
         return process_waveform_output(awf_out)
     finally:
-        if file_name is not None:
-            cleanup(file_name)
+        cleanup(file_name)
+
+
+def generate_peaks(audio) -> list[float]:
+    if settings.WAVEFORM_EXTRACTOR == "numpy":
+        return stream_peaks(audio.url)
+    file_name = download_audio(audio.url, audio.identifier)
+    return peaks_from_file(file_name, audio.duration)
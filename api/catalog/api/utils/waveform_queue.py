@@ -0,0 +1,58 @@
+"""Redis queue of audio awaiting waveform generation outside of the request."""
+
+import logging
+
+from django_redis.client.default import Redis
+
+from catalog.api.models import Audio
+from catalog.api.utils.work_queue import WorkQueue
+
+
+parent_logger = logging.getLogger(__name__)
+
+
+queue = WorkQueue("waveform")
+QUEUE_KEY = queue.key
+FAILED_PREFIX = queue.failed_prefix
+
+
+def enqueue(redis: Redis, identifier: str) -> bool:
+    """
+    Queue the generation of a waveform, unless it is already queued.
+
+    :param redis: the Redis connection
+    :param identifier: the identifier of the audio
+    :return: whether the audio was added to the queue
+    """
+    return bool(queue.enqueue(redis, [(identifier, identifier)]))
+
+
+def has_failed(redis: Redis, identifier: str) -> bool:
+    """Whether generating the waveform of the audio failed recently."""
+
+    return queue.has_failed(redis, identifier)
+
+
+def generate_queued_waveform(redis: Redis, timeout: int) -> bool:
+    """
+    Generate the waveform of the oldest queued audio.
+
+    Blocks for up to ``timeout`` seconds until an audio is queued.
+
+    :param redis: the Redis connection
+    :param timeout: the number of seconds to wait for an audio
+    :return: whether an audio was taken from the queue
+    """
+    logger = parent_logger.getChild("generate_queued_waveform")
+    if not (identifiers := queue.dequeue(redis, batch_size=1, timeout=timeout)):
+        return False
+
+    identifier = identifiers[0]
+    try:
+        # The waveform is not generated again if it already exists.
+        Audio.objects.get(identifier=identifier).get_or_create_waveform()
+    except Exception as exc:
+        logger.warning(f"Failed to generate waveform identifier={identifier}: {exc}")
+        queue.mark_failed(redis, identifier)
+    queue.clear_pending(redis, [identifier])
+    return True
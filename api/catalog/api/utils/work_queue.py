@@ -0,0 +1,115 @@
+"""Redis queues of work done by a worker command outside of the request."""
+
+from django_redis.client.default import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+
+class WorkQueue:
+    """
+    A Redis list of work items, deduplicated while they are pending.
+
+    Each item has a key, for example a URL or an identifier, and a payload that
+    is passed to the worker. An item is not queued again while an item with the
+    same key is pending, that is, until the worker clears it or ``pending_ttl``
+    elapses, for example because no worker is running. Keys can also be marked as
+    failed so that the requests do not queue them again for ``failed_ttl``.
+
+    The oldest items are dropped rather than letting the queue grow beyond
+    ``max_length``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pending_ttl: int = 60 * 10,
+        failed_ttl: int = 60 * 60,
+        max_length: int = 10000,
+    ):
+        self.key = f"{name}:queue"
+        self.pending_prefix = f"{name}:pending:"
+        self.failed_prefix = f"{name}:failed:"
+        self.pending_ttl = pending_ttl
+        self.failed_ttl = failed_ttl
+        self.max_length = max_length
+
+    def enqueue(self, redis: Redis, items: list[tuple[str, str]]) -> int:
+        """
+        Queue work items, skipping those whose key is already pending.
+
+        :param redis: the Redis connection
+        :param items: tuples of the key and payload of each item
+        :return: the number of items added to the queue
+        """
+        pipe = redis.pipeline()
+        for key, _ in items:
+            pipe.set(f"{self.pending_prefix}{key}", 1, nx=True, ex=self.pending_ttl)
+        newly_pending = pipe.execute()
+
+        payloads = self._get_new_payloads(items, newly_pending)
+        if payloads:
+            pipe.lpush(self.key, *payloads)
+            pipe.ltrim(self.key, 0, self.max_length - 1)
+            pipe.execute()
+        return len(payloads)
+
+    async def aenqueue(self, redis: AsyncRedis, items: list[tuple[str, str]]) -> int:
+        """Async variant of ``enqueue``."""
+
+        pipe = redis.pipeline()
+        for key, _ in items:
+            pipe.set(f"{self.pending_prefix}{key}", 1, nx=True, ex=self.pending_ttl)
+        newly_pending = await pipe.execute()
+
+        payloads = self._get_new_payloads(items, newly_pending)
+        if payloads:
+            pipe.lpush(self.key, *payloads)
+            pipe.ltrim(self.key, 0, self.max_length - 1)
+            await pipe.execute()
+        return len(payloads)
+
+    @staticmethod
+    def _get_new_payloads(
+        items: list[tuple[str, str]], newly_pending: list[bool]
+    ) -> list[str]:
+        return [payload for (_, payload), is_new in zip(items, newly_pending) if is_new]
+
+    def dequeue(self, redis: Redis, batch_size: int, timeout: int) -> list[str]:
+        """
+        Take up to ``batch_size`` of the oldest queued items.
+
+        Blocks for up to ``timeout`` seconds until at least one item is available.
+
+        :param redis: the Redis connection
+        :param batch_size: the maximum number of items to take
+        :param timeout: the number of seconds to wait for an item
+        :return: the payloads of the items, empty if the timeout elapsed
+        """
+        first = redis.brpop(self.key, timeout=timeout)
+        if first is None:
+            return []
+
+        payloads = [first[1]]
+        if (remaining := batch_size - 1) > 0:
+            pipe = redis.pipeline(transaction=True)
+            pipe.lrange(self.key, -remaining, -1)
+            pipe.ltrim(self.key, 0, -remaining - 1)
+            rest, _ = pipe.execute()
+            payloads.extend(reversed(rest))
+
+        return [payload.decode() for payload in payloads]
+
+    def clear_pending(self, redis: Redis, keys: list[str]) -> None:
+        """Allow items with the given keys to be queued again."""
+
+        if keys:
+            redis.delete(*[f"{self.pending_prefix}{key}" for key in keys])
+
+    def mark_failed(self, redis: Redis, key: str) -> None:
+        """Record that processing the item failed, see ``has_failed``."""
+
+        redis.set(f"{self.failed_prefix}{key}", 1, ex=self.failed_ttl)
+
+    def has_failed(self, redis: Redis, key: str) -> bool:
+        """Whether processing an item with the given key failed recently."""
+
+        return bool(redis.exists(f"{self.failed_prefix}{key}"))
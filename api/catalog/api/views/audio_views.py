@@ -1,13 +1,16 @@
 from django.conf import settings
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.exceptions import APIException, NotFound
 from rest_framework.response import Response
 
+import django_redis
 from drf_spectacular.utils import extend_schema, extend_schema_view
 
 from catalog.api.constants.media_types import AUDIO_TYPE
 from catalog.api.docs.audio_docs import (
     detail,
+    export,
     related,
     report,
     search,
@@ -16,6 +19,7 @@ from catalog.api.docs.audio_docs import (
     waveform,
 )
 from catalog.api.models import Audio
+from catalog.api.models.audio import AudioAddOn
 from catalog.api.serializers.audio_serializers import (
     AudioReportRequestSerializer,
     AudioSearchRequestSerializer,
@@ -23,11 +27,12 @@ from catalog.api.serializers.audio_serializers import (
     AudioWaveformSerializer,
 )
 from catalog.api.serializers.media_serializers import MediaThumbnailRequestSerializer
+from catalog.api.utils import waveform_queue
 from catalog.api.utils.throttle import (
     AnonThumbnailRateThrottle,
     OAuth2IdThumbnailRateThrottle,
 )
-from catalog.api.views.media_views import MediaViewSet
+from catalog.api.views.media_views import AsyncSearchMixin, MediaViewSet
 
 
 @extend_schema(tags=["audio"])
@@ -36,6 +41,7 @@ from catalog.api.views.media_views import MediaViewSet
     stats=stats,
     retrieve=detail,
     related=related,
+    export=export,
 )
 class AudioViewSet(MediaViewSet):
     """Viewset for all endpoints pertaining to audio."""
@@ -48,6 +54,8 @@ class AudioViewSet(MediaViewSet):
     serializer_class = AudioSerializer
 
     def get_queryset(self):
+        # Django cannot defer columns while traversing the ``audioset``
+        # ``ForeignObject``, so ``deferred_db_fields`` is left empty.
         return super().get_queryset().select_related("mature_audio", "audioset")
 
     # Extra actions
@@ -91,10 +99,17 @@ class AudioViewSet(MediaViewSet):
         The peaks are provided as a list of numbers, each of these numbers being
         a fraction between 0 and 1. The list contains approximately 1000 numbers,
         although it can be slightly higher or lower, depending on the track's length.
+
+        If the waveform has not been generated yet, it may be generated in the
+        background, in which case the response has the status 202 and a
+        `Retry-After` header with the number of seconds to wait before retrying.
         """
 
         audio = self.get_object()
 
+        if settings.ENABLE_ASYNC_WAVEFORMS:
+            return self._get_or_queue_waveform(audio)
+
         try:
             obj = {"points": audio.get_or_create_waveform()}
             serializer = self.get_serializer(obj)
@@ -118,3 +133,43 @@ class AudioViewSet(MediaViewSet):
         """
 
         return super().report(request, identifier)
+
+    # Helper functions
+
+    def _get_or_queue_waveform(self, audio: Audio) -> Response:
+        """
+        Respond with the waveform if it exists, otherwise queue its generation for
+        the ``generatequeuedwaveforms`` worker, so that this request does not wait
+        for the audio to be downloaded.
+        """
+
+        # Unlike ``Audio.get_waveform``, tell missing peaks apart from empty ones, which
+        # were generated for a silent or very short track and must not be queued again.
+        points = (
+            AudioAddOn.objects.filter(audio_identifier=audio.identifier)
+            .values_list("waveform_peaks", flat=True)
+            .first()
+        )
+        if points is not None:
+            serializer = self.get_serializer({"points": points})
+            return Response(status=status.HTTP_200_OK, data=serializer.data)
+
+        identifier = str(audio.identifier)
+        redis = django_redis.get_redis_connection("default")
+        if waveform_queue.has_failed(redis, identifier):
+            raise APIException("Could not generate the waveform.")
+
+        waveform_queue.enqueue(redis, identifier)
+        retry_after = settings.WAVEFORM_RETRY_AFTER
+        return Response(
+            status=status.HTTP_202_ACCEPTED,
+            data={
+                "detail": "The waveform is being generated, "
+                f"retry after {retry_after} seconds."
+            },
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class AsyncAudioViewSet(AsyncSearchMixin, AudioViewSet):
+    """Viewset for the audio endpoints, with async search and related audio."""
@@ -16,6 +16,7 @@ from PIL import Image as PILImage
 from catalog.api.constants.media_types import IMAGE_TYPE
 from catalog.api.docs.image_docs import (
     detail,
+    export,
     oembed,
     related,
     report,
@@ -39,7 +40,7 @@ from catalog.api.utils.throttle import (
     OAuth2IdThumbnailRateThrottle,
 )
 from catalog.api.utils.watermark import watermark
-from catalog.api.views.media_views import MediaViewSet
+from catalog.api.views.media_views import AsyncSearchMixin, MediaViewSet
 
 
 @extend_schema(tags=["images"])
@@ -48,6 +49,7 @@ from catalog.api.views.media_views import MediaViewSet
     stats=stats,
     retrieve=detail,
     related=related,
+    export=export,
 )
 class ImageViewSet(MediaViewSet):
     """Viewset for all endpoints pertaining to images."""
@@ -56,6 +58,15 @@ class ImageViewSet(MediaViewSet):
     query_serializer_class = ImageSearchRequestSerializer
     default_index = settings.MEDIA_INDEX_MAPPING[IMAGE_TYPE]
     qa_index = "search-qa-image"
+    deferred_db_fields = [
+        "updated_on",
+        "foreign_identifier",
+        "thumbnail",
+        "watermarked",
+        "last_synced_with_source",
+        "removed_from_source",
+        "view_count",
+    ]
 
     serializer_class = ImageSerializer
 
@@ -220,3 +231,7 @@ class ImageViewSet(MediaViewSet):
             pil_img.save(destination, "jpeg", exif=exif_bytes)
         else:
             pil_img.save(destination, "jpeg")
+
+
+class AsyncImageViewSet(AsyncSearchMixin, ImageViewSet):
+    """Viewset for the image endpoints, with async search and related images."""
@@ -1,20 +1,78 @@
+import json
 import logging
+from itertools import chain
 
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.text import compress_sequence
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.exceptions import APIException
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
 from catalog.api.controllers import search_controller
-from catalog.api.models import ContentProvider
 from catalog.api.serializers.provider_serializers import ProviderSerializer
-from catalog.api.utils import photon
+from catalog.api.utils import hydration, photon, pillow_thumbnail, search_cursor, timing
 from catalog.api.utils.pagination import StandardPagination
 
 
 parent_logger = logging.getLogger(__name__)
 
+THUMBNAIL_BACKENDS = {
+    "photon": photon,
+    "pillow": pillow_thumbnail,
+}
+
+
+class IsAuthenticatedClient(BasePermission):
+    """
+    Allow requests made with an API key.
+
+    API keys are client credentials tokens, which authenticate the application but
+    not a user, so ``request.user`` is ``None`` and ``IsAuthenticated`` rejects them.
+    """
+
+    def has_permission(self, request, view):
+        return request.auth is not None or bool(
+            request.user and request.user.is_authenticated
+        )
+
+
+class SyncToAsyncIterator:
+    """
+    Iterate over the content of a streaming response from the event loop, getting
+    each chunk in the thread of the request.
+
+    Under ASGI, Django reads the whole content of a response with a sync iterator
+    into memory before sending it, so the export and the thumbnails would no longer
+    be streamed.
+    """
+
+    _end = object()
+
+    def __init__(self, iterator):
+        self.iterator = iterator
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        chunk = await sync_to_async(next)(self.iterator, self._end)
+        if chunk is self._end:
+            raise StopAsyncIteration
+        return chunk
+
+    def close(self):
+        if close := getattr(self.iterator, "close", None):
+            close()
+
 
 class MediaViewSet(ReadOnlyModelViewSet):
     lookup_field = "identifier"
@@ -30,6 +88,8 @@ class MediaViewSet(ReadOnlyModelViewSet):
     query_serializer_class = None
     default_index = None
     qa_index = None
+    deferred_db_fields = []
+    """columns not used by the serializer, to skip when fetching search results"""
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -59,24 +119,30 @@ class MediaViewSet(ReadOnlyModelViewSet):
         req_serializer.is_valid(raise_exception=True)
         return req_serializer
 
-    def get_db_results(self, results):
-        identifiers = []
-        hits = []
-        for hit in results:
-            identifiers.append(hit.identifier)
-            hits.append(hit)
-
-        results = list(self.get_queryset().filter(identifier__in=identifiers))
-        results.sort(key=lambda x: identifiers.index(str(x.identifier)))
-        for result, hit in zip(results, hits):
-            result.fields_matched = getattr(hit, "fields_matched", None)
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if (
+            isinstance(request._request, ASGIRequest)
+            and response.streaming
+            and not response.is_async
+        ):
+            response.streaming_content = SyncToAsyncIterator(
+                iter(response.streaming_content)
+            )
+        return response
 
-        return results
+    def get_db_results(self, results):
+        queryset = self.get_queryset()
+        if self.deferred_db_fields:
+            queryset = queryset.defer(*self.deferred_db_fields)
+        with timing.span("hydration"):
+            return hydration.get_db_results(queryset, results)
 
     # Standard actions
 
     def list(self, request, *_, **__):
-        params = self._get_request_serializer(request)
+        with timing.span("validation"):
+            params = self._get_request_serializer(request)
 
         page_size = self.paginator.page_size = params.data["page_size"]
         page = self.paginator.page = params.data["page"]
@@ -86,6 +152,9 @@ class MediaViewSet(ReadOnlyModelViewSet):
         filter_dead = params.validated_data["filter_dead"]
 
         search_index = self.qa_index if qa else self.default_index
+        if params.validated_data["cursor"] is not None:
+            return self._list_with_cursor(params, search_index, page_size)
+
         try:
             results, num_pages, num_results = search_controller.search(
                 params,
@@ -101,12 +170,31 @@ class MediaViewSet(ReadOnlyModelViewSet):
         except ValueError as e:
             raise APIException(getattr(e, "message", str(e)))
 
+        return self._get_results_response(params, results)
+
+    def _list_with_cursor(self, params, search_index, page_size):
+        try:
+            results, num_results, next_cursor = search_controller.search_with_cursor(
+                params, search_index, page_size
+            )
+        except search_cursor.InvalidCursor as e:
+            raise ValidationError({"cursor": [str(e)]})
+        except ValueError as e:
+            raise APIException(getattr(e, "message", str(e)))
+        self.paginator.use_cursor = True
+        self.paginator.result_count = num_results
+        self.paginator.next_cursor = next_cursor
+
+        return self._get_results_response(params, results)
+
+    def _get_results_response(self, params, results):
         serializer_class = self.get_serializer()
         if params.needs_db or serializer_class.needs_db:
             results = self.get_db_results(results)
 
-        serializer = self.get_serializer(results, many=True)
-        return self.get_paginated_response(serializer.data)
+        with timing.span("serialization"):
+            data = self.get_serializer(results, many=True).data
+        return self.get_paginated_response(data)
 
     # Extra actions
 
@@ -117,17 +205,68 @@ class MediaViewSet(ReadOnlyModelViewSet):
             "source_counts": source_counts,
         }
 
-        providers = ContentProvider.objects.filter(
-            media_type=self.default_index, filter_content=False
-        )
+        providers = [
+            provider
+            for provider in search_controller.get_content_providers()
+            if provider.media_type == self.default_index and not provider.filter_content
+        ]
         serializer = self.get_serializer(providers, many=True, context=context)
         return Response(serializer.data)
 
+    @action(
+        detail=False, permission_classes=[IsAuthenticatedClient], pagination_class=None
+    )
+    def export(self, request, *_, **__):
+        """
+        Stream all the results of a search as newline-delimited JSON.
+
+        The response is compressed with gzip if the client accepts it.
+        """
+        params = self._get_request_serializer(request)
+        qa = params.validated_data["qa"]
+        search_index = self.qa_index if qa else self.default_index
+        needs_db = params.needs_db or self.get_serializer().needs_db
+
+        batches = search_controller.export(params, search_index)
+        try:
+            # Fetch the first batch before responding, so that errors in the query
+            # are reported with the right status.
+            first_batch = next(batches, None)
+        except ValueError as e:
+            raise APIException(getattr(e, "message", str(e)))
+
+        def serialize(batches):
+            for results in batches:
+                if needs_db:
+                    results = self.get_db_results(results)
+                data = self.get_serializer(results, many=True).data
+                yield "".join(f"{json.dumps(item, cls=JSONEncoder)}\n" for item in data)
+
+        response = StreamingHttpResponse(
+            serialize(chain([first_batch] if first_batch else [], batches)),
+            content_type="application/x-ndjson",
+        )
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            response.streaming_content = compress_sequence(response.streaming_content)
+            response.headers["Content-Encoding"] = "gzip"
+        return response
+
     @action(detail=True)
     def related(self, request, identifier=None, *_, **__):
+        # Documents are indexed under the ID of their DB row, so the recommendations
+        # can be fetched without first searching for the item by its identifier.
+        document_id = (
+            self.model_class.objects.filter(identifier=identifier)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if document_id is None:
+            raise APIException("Could not find items.", 404)
+
         try:
             results, num_results = search_controller.related_media(
-                uuid=identifier,
+                document_id=document_id,
                 index=self.default_index,
                 request=request,
                 filter_dead=True,
@@ -138,12 +277,10 @@ class MediaViewSet(ReadOnlyModelViewSet):
             self.paginator.page_size = 10
         except ValueError as e:
             raise APIException(getattr(e, "message", str(e)))
-        # If there are no hits in the search controller
-        except IndexError:
-            raise APIException("Could not find items.", 404)
 
-        serializer = self.get_serializer(results, many=True)
-        return self.get_paginated_response(serializer.data)
+        with timing.span("serialization"):
+            data = self.get_serializer(results, many=True).data
+        return self.get_paginated_response(data)
 
     def report(self, request, identifier):
         serializer = self.get_serializer(data=request.data | {"identifier": identifier})
@@ -155,11 +292,16 @@ class MediaViewSet(ReadOnlyModelViewSet):
     def thumbnail(self, image_url, request, *_, **__):
         serializer = self.get_serializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
-        return photon.get(
+        backend = THUMBNAIL_BACKENDS[settings.THUMBNAIL_BACKEND]
+        response = backend.get(
             image_url,
             accept_header=request.headers.get("Accept", "image/*"),
             **serializer.validated_data,
         )
+        if etag := response.get("ETag"):
+            # Reply with 304 if the client already has this version of the thumbnail.
+            response = get_conditional_response(request, etag=etag, response=response)
+        return response
 
     # Helper functions
 
@@ -181,3 +323,115 @@ class MediaViewSet(ReadOnlyModelViewSet):
         else:
             ip = request.META.get("REMOTE_ADDR")
         return ip
+
+
+class AsyncSearchMixin:
+    """
+    Serve the search and related media of a ``MediaViewSet`` with async views.
+
+    Elasticsearch, Redis and the providers of the results are queried on the event
+    loop, so a worker can hold many searches in flight at once. Authentication,
+    throttling, the validation of the parameters and the serialization of the
+    results still use the sync clients and the ORM, in a thread, as do the other
+    actions of the viewset. Only serve these views under ASGI, see ``catalog.asgi``.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        # The view returns the coroutine of ``dispatch``, for Django to await.
+        return markcoroutinefunction(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        """Async variant of ``APIView.dispatch``."""
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def list(self, request, *_, **__):
+        with timing.span("validation"):
+            params = await sync_to_async(self._get_request_serializer)(request)
+
+        page_size = self.paginator.page_size = params.data["page_size"]
+        page = self.paginator.page = params.data["page"]
+
+        hashed_ip = hash(self._get_user_ip(request))
+        qa = params.validated_data["qa"]
+        filter_dead = params.validated_data["filter_dead"]
+
+        search_index = self.qa_index if qa else self.default_index
+        if params.validated_data["cursor"] is not None:
+            return await sync_to_async(self._list_with_cursor)(
+                params, search_index, page_size
+            )
+
+        try:
+            results, num_pages, num_results = await search_controller.asearch(
+                params,
+                search_index,
+                page_size,
+                hashed_ip,
+                request,
+                filter_dead,
+                page,
+            )
+            self.paginator.page_count = num_pages
+            self.paginator.result_count = num_results
+        except ValueError as e:
+            raise APIException(getattr(e, "message", str(e)))
+
+        return await sync_to_async(self._get_results_response)(params, results)
+
+    @action(detail=True)
+    async def related(self, request, identifier=None, *_, **__):
+        document_id = await (
+            self.model_class.objects.filter(identifier=identifier)
+            .values_list("id", flat=True)
+            .afirst()
+        )
+        if document_id is None:
+            raise APIException("Could not find items.", 404)
+
+        try:
+            results, num_results = await search_controller.arelated_media(
+                document_id=document_id,
+                index=self.default_index,
+                request=request,
+                filter_dead=True,
+            )
+            self.paginator.result_count = num_results
+            self.paginator.page_count = 1
+            # `page_size` refers to the maximum number of related images to return.
+            self.paginator.page_size = 10
+        except ValueError as e:
+            raise APIException(getattr(e, "message", str(e)))
+
+        with timing.span("serialization"):
+            data = await sync_to_async(
+                lambda: self.get_serializer(results, many=True).data
+            )()
+        return self.get_paginated_response(data)
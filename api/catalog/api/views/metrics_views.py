@@ -0,0 +1,19 @@
+from django.http import HttpResponse
+from django.views import View
+
+from catalog.api.utils.timing import render_metrics
+
+
+class SearchTimingMetrics(View):
+    """
+    Return the histograms of the durations of the stages of search requests, in the
+    Prometheus text format.
+
+    The histograms are aggregated in Redis across all the API workers, when
+    ``ENABLE_SEARCH_TIMING`` is set.
+    """
+
+    def get(self, request):
+        return HttpResponse(
+            render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -4,8 +4,8 @@ import smtplib
 from textwrap import dedent
 
 from django.conf import settings
-from django.core.cache import cache
 from django.core.mail import send_mail
+from django.db import transaction
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.views import APIView
@@ -20,8 +20,8 @@ from catalog.api.serializers.oauth2_serializers import (
     OAuth2KeyInfoSerializer,
     OAuth2RegistrationSerializer,
 )
-from catalog.api.utils.oauth2_helper import get_token_info
-from catalog.api.utils.throttle import OnePerSecond, TenPerDay
+from catalog.api.utils.oauth2_helper import get_request_token_info
+from catalog.api.utils.throttle import OnePerSecond, TenPerDay, get_request_count
 
 
 @extend_schema(tags=["auth"])
@@ -115,8 +115,9 @@ class VerifyEmail(APIView):
     def get(self, request, code, format=None):
         try:
             verification = OAuth2Verification.objects.get(code=code)
-            application_pk = verification.associated_application.pk
-            ThrottledApplication.objects.filter(pk=application_pk).update(verified=True)
+            application = verification.associated_application
+            ThrottledApplication.objects.filter(pk=application.pk).update(verified=True)
+            transaction.on_commit(application.invalidate_token_info)
             verification.delete()
             return Response(
                 status=200,
@@ -177,43 +178,26 @@ class CheckRates(APIView):
         if not request.auth:
             return Response(status=403, data="Forbidden")
 
-        access_token = str(request.auth)
-        client_id, rate_limit_model, verified = get_token_info(access_token)
+        client_id, rate_limit_model, verified = get_request_token_info(request)
 
         if not client_id:
             return Response(status=403, data="Forbidden")
 
         throttle_type = rate_limit_model
-        throttle_key = "throttle_{scope}_{client_id}"
         if throttle_type == "standard":
-            sustained_throttle_key = throttle_key.format(
-                scope="oauth2_client_credentials_sustained", client_id=client_id
-            )
-            burst_throttle_key = throttle_key.format(
-                scope="oauth2_client_credentials_burst", client_id=client_id
-            )
+            sustained_scope = "oauth2_client_credentials_sustained"
+            burst_scope = "oauth2_client_credentials_burst"
         elif throttle_type == "enhanced":
-            sustained_throttle_key = throttle_key.format(
-                scope="enhanced_oauth2_client_credentials_sustained",
-                client_id=client_id,
-            )
-            burst_throttle_key = throttle_key.format(
-                scope="enhanced_oauth2_client_credentials_burst", client_id=client_id
-            )
+            sustained_scope = "enhanced_oauth2_client_credentials_sustained"
+            burst_scope = "enhanced_oauth2_client_credentials_burst"
         elif throttle_type == "exempt":
-            burst_throttle_key = sustained_throttle_key = throttle_key.format(
-                scope="exempt_oauth2_client_credentials_burst", client_id=client_id
-            )
+            burst_scope = sustained_scope = "exempt_oauth2_client_credentials_burst"
         else:
             # TODO: Replace 500 response with exception.
             return Response(status=500, data="Unknown API key rate limit type")
 
-        sustained_requests_list = cache.get(sustained_throttle_key)
-        sustained_requests = (
-            len(sustained_requests_list) if sustained_requests_list else None
-        )
-        burst_requests_list = cache.get(burst_throttle_key)
-        burst_requests = len(burst_requests_list) if burst_requests_list else None
+        sustained_requests = get_request_count(sustained_scope, client_id)
+        burst_requests = get_request_count(burst_scope, client_id)
 
         response_data = OAuth2KeyInfoSerializer(
             {
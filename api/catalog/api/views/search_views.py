@@ -0,0 +1,116 @@
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.utils import extend_schema
+
+from catalog.api.constants.media_types import AUDIO_TYPE, IMAGE_TYPE
+from catalog.api.controllers import search_controller
+from catalog.api.docs.search_docs import batch_search
+from catalog.api.serializers.search_serializers import (
+    MAX_BATCH_SEARCHES,
+    BatchSearchRequestSerializer,
+)
+from catalog.api.utils.pagination import StandardPagination
+from catalog.api.views.audio_views import AudioViewSet
+from catalog.api.views.image_views import ImageViewSet
+from catalog.api.views.media_views import MediaViewSet
+
+
+@extend_schema(tags=["search"])
+class BatchSearch(APIView):
+    viewsets = {
+        AUDIO_TYPE: AudioViewSet,
+        IMAGE_TYPE: ImageViewSet,
+    }
+
+    def get_throttle_cost(self, request) -> int:
+        """
+        Count each search of the batch against the rate limits, as if it were made
+        with its own request. Malformed batches count as a single request.
+        """
+
+        searches = (
+            request.data.get("searches") if isinstance(request.data, dict) else None
+        )
+        if not isinstance(searches, list):
+            return 1
+        return min(max(len(searches), 1), MAX_BATCH_SEARCHES)
+
+    @batch_search
+    def post(self, request, format=None):
+        """
+        Perform several image and audio searches at once.
+
+        Each search accepts the same parameters as the search endpoint of its media
+        type, and its results are returned in the same shape. All the searches are
+        sent to the search backend together, which is faster than making the
+        requests one after the other. Each search counts against the rate limits
+        like a request of its own.
+        """
+
+        batch = BatchSearchRequestSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+
+        views, specs, errors = [], [], {}
+        for position, search in enumerate(batch.validated_data["searches"]):
+            view = self.viewsets[search["media_type"]](
+                request=request, format_kwarg=None
+            )
+            params = view.query_serializer_class(
+                data=search["params"], context={"request": request}
+            )
+            if not params.is_valid():
+                errors[position] = {"params": params.errors}
+                continue
+            if params.validated_data["cursor"] is not None:
+                errors[position] = {
+                    "params": {"cursor": ["Cursors are not supported in batches."]}
+                }
+                continue
+
+            search_index = view.qa_index if params.validated_data["qa"] else None
+            views.append((view, params))
+            specs.append(
+                search_controller.SearchSpec(
+                    params,
+                    search_index or view.default_index,
+                    params.data["page_size"],
+                    params.validated_data["filter_dead"],
+                    params.data["page"],
+                )
+            )
+        if errors:
+            raise ValidationError({"searches": errors})
+
+        hashed_ip = hash(MediaViewSet._get_user_ip(request))
+        try:
+            search_results = search_controller.search_many(specs, hashed_ip, request)
+        except ValueError as e:
+            raise APIException(getattr(e, "message", str(e)))
+
+        data = []
+        for (view, params), spec, (results, num_pages, num_results) in zip(
+            views, specs, search_results
+        ):
+            if params.needs_db or view.serializer_class.needs_db:
+                results = view.get_db_results(results)
+            serializer = view.serializer_class(
+                results,
+                many=True,
+                context={
+                    "request": request,
+                    "format": format,
+                    "view": view,
+                    "validated_data": params.validated_data,
+                },
+            )
+
+            paginator = StandardPagination()
+            paginator.page_size = spec.page_size
+            paginator.page = spec.page
+            paginator.page_count = num_pages
+            paginator.result_count = num_results
+            data.append(paginator.get_paginated_response(serializer.data).data)
+
+        return Response({"results": data})
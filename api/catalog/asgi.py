@@ -0,0 +1,32 @@
+"""
+ASGI config for catalog project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+serving the same API as ``catalog.wsgi`` but with the search and related media
+endpoints served by async views, see ``catalog.urls.asgi``. Run it with an ASGI
+server, for example ``uvicorn catalog.asgi:application``.
+
+The other views are sync, and still stream the export and the thumbnails, as
+``MediaViewSet`` gives their streaming responses async iterators.
+"""
+import os
+
+import django
+from django.core.handlers.asgi import ASGIHandler
+
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "catalog.settings")
+
+ASYNC_URLCONF = "catalog.urls.asgi"
+
+
+class AsyncSearchASGIHandler(ASGIHandler):
+    """Resolve the requests with the URL configuration of the async views."""
+
+    async def get_response_async(self, request):
+        request.urlconf = ASYNC_URLCONF
+        return await super().get_response_async(request)
+
+
+django.setup(set_prefix=False)
+application = AsyncSearchASGIHandler()
@@ -1,10 +1,13 @@
 """This file contains configuration pertaining to Elasticsearch."""
 
+import asyncio
+import weakref
+
 from django.conf import settings
 
 from aws_requests_auth.aws_auth import AWSRequestsAuth
 from decouple import config
-from elasticsearch import Elasticsearch, RequestsHttpConnection
+from elasticsearch import AsyncElasticsearch, Elasticsearch, RequestsHttpConnection
 from elasticsearch_dsl import connections
 
 from catalog.api.constants.media_types import MEDIA_TYPES
@@ -43,6 +46,33 @@ def _elasticsearch_connect():
     return _es
 
 
+# The connections of an async client are bound to the event loop that opened them.
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, AsyncElasticsearch
+] = weakref.WeakKeyDictionary()
+
+
+def get_async_es() -> AsyncElasticsearch:
+    """
+    Get the async Elasticsearch client of the running event loop.
+
+    The client connects to the same domain as ``ES``, but its requests are not
+    signed for AWS, so the domain must accept unsigned requests from the API.
+
+    :return: An async Elasticsearch client.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = AsyncElasticsearch(
+            host=config("ELASTICSEARCH_URL", default="localhost"),
+            port=config("ELASTICSEARCH_PORT", default=9200, cast=int),
+            timeout=10,
+            max_retries=1,
+            retry_on_timeout=True,
+        )
+    return _async_clients[loop]
+
+
 SETUP_ES = config("SETUP_ES", default=True, cast=bool)
 if SETUP_ES:
     ES = _elasticsearch_connect()
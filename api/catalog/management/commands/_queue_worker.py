@@ -0,0 +1,51 @@
+from django_tqdm import BaseCommand
+
+
+class QueueWorkerCommand(BaseCommand):
+    """
+    Base of the commands that work through a Redis work queue alongside the API.
+
+    Subclasses implement ``process``, and set ``noun`` to the plural of what is
+    queued for their messages. The command runs until it is interrupted, or until
+    the queue is empty if ``--exit_when_empty`` is passed.
+    """
+
+    noun = "items"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            help=f"The number of seconds to wait for {self.noun} to be queued.",
+            type=int,
+            default=5,
+        )
+        parser.add_argument(
+            "--exit_when_empty",
+            help=f"Stop once no {self.noun} are queued instead of waiting for more.",
+            action="store_true",
+        )
+
+    def process(self, timeout: int, **options) -> int:
+        """
+        Process the oldest queued items.
+
+        :param timeout: the number of seconds to wait for items to be queued
+        :param options: the other options of the command
+        :return: the number of items processed, 0 if the timeout elapsed
+        """
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        self.info(self.style.NOTICE(f"Processing queued {self.noun}"))
+
+        processed = 0
+        try:
+            while True:
+                count = self.process(**options)
+                processed += count
+                if not count and options["exit_when_empty"]:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        self.info(self.style.SUCCESS(f"Processed {processed:,} {self.noun}"))
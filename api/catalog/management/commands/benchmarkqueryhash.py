@@ -0,0 +1,107 @@
+import statistics
+import time
+
+from django.test import RequestFactory
+from rest_framework.views import APIView
+
+from deepdiff import DeepHash
+from django_tqdm import BaseCommand
+
+from catalog.api.controllers import search_controller
+from catalog.api.serializers.audio_serializers import AudioSearchRequestSerializer
+from catalog.api.serializers.image_serializers import ImageSearchRequestSerializer
+
+
+SERIALIZERS = {
+    "image": ImageSearchRequestSerializer,
+    "audio": AudioSearchRequestSerializer,
+}
+
+QUERIES = [
+    {"q": "cat"},
+    {"q": "mountain lake", "license_type": "commercial,modification"},
+    {"q": "dog", "license": "by,cc0", "extension": "jpg", "page": "3"},
+    {"q": "new york", "category": "photograph", "mature": "true"},
+    {"creator": "nasa", "title": "mars", "tags": "space", "page_size": "20"},
+    {"q": "music -piano", "sort_by": "indexed_on", "aspect_ratio": "wide"},
+]
+
+
+def _deep_hash(s) -> str:
+    """Hash the ``Search`` object like the dead link mask did before."""
+
+    serialized_search_obj = s.to_dict()
+    serialized_search_obj.pop("from", None)
+    serialized_search_obj.pop("size", None)
+    return DeepHash(serialized_search_obj)[serialized_search_obj]
+
+
+class Command(BaseCommand):
+    help = "Compares the time to hash search queries for their dead link masks."
+    """
+    Hashes realistic search queries by serializing the Elasticsearch query with
+    ``DeepHash``, as done for every page of results with ``filter_dead`` before, and
+    by fingerprinting the validated search parameters, and reports the median time
+    per hash. ``DeepHash`` used to run once more for every backfill of a page.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--media_type",
+            help="The type of media to search.",
+            choices=list(SERIALIZERS),
+            default="image",
+        )
+        parser.add_argument(
+            "--repeat",
+            help="The number of times to hash each query.",
+            type=int,
+            default=200,
+        )
+
+    def _validate(self, serializer_class, data):
+        request = APIView().initialize_request(RequestFactory().get("/", data))
+        serializer = serializer_class(data=data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def _time(self, hash_query, searches) -> float:
+        durations = []
+        for search_params in searches:
+            started_at = time.perf_counter()
+            hash_query(search_params)
+            durations.append(time.perf_counter() - started_at)
+        return statistics.median(durations)
+
+    def handle(self, *args, **options):
+        index = options["media_type"]
+        serializer_class = SERIALIZERS[index]
+        # Warm up the cache of content providers, used by both hashes.
+        search_controller.get_content_providers()
+
+        for query in QUERIES:
+            # Validate every repetition separately, as the serialized data is cached.
+            searches = [
+                self._validate(serializer_class, query)
+                for _ in range(options["repeat"])
+            ]
+            built = {
+                id(search_params): search_controller._build_search(search_params, index)
+                for search_params in searches
+            }
+            deep_hash = self._time(
+                lambda search_params: _deep_hash(built[id(search_params)]), searches
+            )
+            fingerprint = self._time(
+                lambda search_params: search_controller._get_search_query_hash(
+                    search_params, index
+                ),
+                searches,
+            )
+            self.info(
+                self.style.SUCCESS(
+                    f"{query}: DeepHash={deep_hash * 1e6:.0f}us "
+                    f"fingerprint={fingerprint * 1e6:.0f}us "
+                    f"speedup={deep_hash / fingerprint:.1f}x"
+                )
+            )
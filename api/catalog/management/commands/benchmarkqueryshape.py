@@ -0,0 +1,94 @@
+import statistics
+import time
+
+from django.test import RequestFactory, override_settings
+from rest_framework.views import APIView
+
+from django_tqdm import BaseCommand
+
+from catalog.api.controllers import search_controller
+from catalog.api.serializers.audio_serializers import AudioSearchRequestSerializer
+from catalog.api.serializers.image_serializers import ImageSearchRequestSerializer
+
+
+SERIALIZERS = {
+    "image": ImageSearchRequestSerializer,
+    "audio": AudioSearchRequestSerializer,
+}
+
+QUERIES = [
+    {"license": "by,cc0"},
+    {"license_type": "commercial", "extension": "jpg"},
+    {"category": "photograph", "aspect_ratio": "wide"},
+    {"q": "cat"},
+    {"q": "mountain lake", "license_type": "commercial,modification"},
+    {"creator": "nasa", "title": "mars"},
+]
+
+# The settings to compare, each one adding to the previous.
+SHAPES = {
+    "highlight": {"ENABLE_NAMED_QUERIES": False, "ENABLE_ES_REQUEST_CACHE": False},
+    "named_queries": {"ENABLE_NAMED_QUERIES": True, "ENABLE_ES_REQUEST_CACHE": False},
+    "request_cache": {"ENABLE_NAMED_QUERIES": True, "ENABLE_ES_REQUEST_CACHE": True},
+}
+
+
+class Command(BaseCommand):
+    help = "Compares the time Elasticsearch takes to run the shapes of search queries."
+    """
+    Runs realistic search queries against Elasticsearch, finding the fields matched
+    by highlighting, then by named queries, then also using the shard request cache
+    for filter-only searches, and reports the median ``took`` of Elasticsearch and
+    the median round trip per query. Filters are in the filter context of all the
+    shapes. Run against an index of realistic size, as the caches of a small index
+    hide the differences.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--media_type",
+            help="The type of media to search.",
+            choices=list(SERIALIZERS),
+            default="image",
+        )
+        parser.add_argument(
+            "--repeat",
+            help="The number of times to run each query.",
+            type=int,
+            default=20,
+        )
+
+    def _validate(self, serializer_class, data):
+        request = APIView().initialize_request(RequestFactory().get("/", data))
+        serializer = serializer_class(data=data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def _time(self, search_params, index, repeat) -> tuple[float, float]:
+        s, _ = search_controller._build_hashed_search(
+            search_params, index, ip=0, filter_dead=False
+        )
+        s = s[: search_params.data["page_size"]]
+        took = []
+        durations = []
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            response = s.execute()
+            durations.append(time.perf_counter() - started_at)
+            took.append(response.took / 1000)
+        return statistics.median(took), statistics.median(durations)
+
+    def handle(self, *args, **options):
+        index = options["media_type"]
+        serializer_class = SERIALIZERS[index]
+
+        for query in QUERIES:
+            search_params = self._validate(serializer_class, query)
+            timings = []
+            for shape, shape_settings in SHAPES.items():
+                with override_settings(**shape_settings):
+                    took, duration = self._time(search_params, index, options["repeat"])
+                timings.append(
+                    f"{shape}: took={took * 1000:.1f}ms wall={duration * 1000:.1f}ms"
+                )
+            self.info(self.style.SUCCESS(f"{query}: {', '.join(timings)}"))
@@ -0,0 +1,94 @@
+import statistics
+import time
+from itertools import cycle, islice
+from unittest import mock
+
+from django.test import RequestFactory
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+
+from django_tqdm import BaseCommand
+
+from catalog.api.serializers.audio_serializers import AudioSerializer
+from catalog.api.serializers.base import CompiledSerializerMixin
+from catalog.api.serializers.image_serializers import ImageSerializer
+from catalog.api.utils.drf_renderer import ORJSONRenderer
+
+
+SERIALIZERS = {
+    "image": ImageSerializer,
+    "audio": AudioSerializer,
+}
+
+
+class Command(BaseCommand):
+    help = "Compares the time to serialize and render a page of search results."
+    """
+    Serializes pages of media from the database with DRF's field by field
+    serialization and the stock JSON renderer, then with the compiled serializer
+    and the ``orjson`` renderer, and reports the median time per page. Rows are
+    repeated to fill the pages if the database has fewer rows than a page.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--media_type",
+            help="The type of media to serialize.",
+            choices=list(SERIALIZERS),
+            default="image",
+        )
+        parser.add_argument(
+            "--page_sizes",
+            help="The numbers of results per page.",
+            type=int,
+            nargs="+",
+            default=[20, 500],
+        )
+        parser.add_argument(
+            "--repeat",
+            help="The number of times to serialize each page.",
+            type=int,
+            default=20,
+        )
+
+    def _time_page(self, serializer_class, renderer, media, repeat) -> float:
+        request = APIView().initialize_request(RequestFactory().get("/"))
+        context = {"request": request, "validated_data": {}}
+        durations = []
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            data = serializer_class(media, many=True, context=context).data
+            renderer.render({"results": data})
+            durations.append(time.perf_counter() - started_at)
+        return statistics.median(durations)
+
+    def handle(self, *args, **options):
+        serializer_class = SERIALIZERS[options["media_type"]]
+        rows = list(
+            serializer_class.Meta.model.objects.all()[: max(options["page_sizes"])]
+        )
+        if not rows:
+            self.error(f"No {options['media_type']} in the database")
+            return
+
+        for page_size in options["page_sizes"]:
+            media = list(islice(cycle(rows), page_size))
+            with mock.patch.object(
+                CompiledSerializerMixin,
+                "to_representation",
+                serializers.Serializer.to_representation,
+            ):
+                drf = self._time_page(
+                    serializer_class, JSONRenderer(), media, options["repeat"]
+                )
+            compiled = self._time_page(
+                serializer_class, ORJSONRenderer(), media, options["repeat"]
+            )
+            self.info(
+                self.style.SUCCESS(
+                    f"page_size={page_size}: DRF={drf * 1000:.1f}ms/page "
+                    f"compiled={compiled * 1000:.1f}ms/page "
+                    f"speedup={drf / compiled:.1f}x"
+                )
+            )
@@ -0,0 +1,97 @@
+import statistics
+import time
+
+from django.test import override_settings
+
+from django_tqdm import BaseCommand
+
+from catalog.api.utils import photon, pillow_thumbnail
+from catalog.api.utils.photon import UpstreamThumbnailException
+
+
+BACKENDS = {
+    "photon": photon,
+    "pillow": pillow_thumbnail,
+}
+
+
+class Command(BaseCommand):
+    help = "Compares the latency and CPU time of the thumbnail backends."
+    """
+    Renders each image with each backend and reports the wall clock latency and
+    the CPU time spent in this process per thumbnail. Pillow renders in this
+    process for the benchmark, so that its CPU time is measured; for Photon, the
+    CPU time only covers the proxying done by the API.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("image_urls", help="The images to render.", nargs="+")
+        parser.add_argument(
+            "--backends",
+            help="The backends to compare.",
+            nargs="+",
+            choices=list(BACKENDS),
+            default=list(BACKENDS),
+        )
+        parser.add_argument(
+            "--repeat",
+            help="The number of times to render each image with each backend.",
+            type=int,
+            default=5,
+        )
+        parser.add_argument(
+            "--accept",
+            help="The Accept header sent by the client.",
+            default="image/*",
+        )
+
+    def _render(self, backend, image_url: str, accept: str) -> int:
+        response = backend.get(image_url, accept_header=accept)
+        content = response.getvalue() if response.streaming else response.content
+        return len(content)
+
+    def handle(self, *args, **options):
+        for name in options["backends"]:
+            backend = BACKENDS[name]
+            latencies, cpu_times, sizes = [], [], []
+            failures = 0
+            with override_settings(
+                THUMBNAIL_BACKEND=name,
+                THUMBNAIL_RENDER_PROCESSES=0,
+                ENABLE_THUMBNAIL_CACHE=False,
+                ENABLE_THUMBNAIL_FAILURE_CACHE=False,
+            ):
+                for image_url in options["image_urls"]:
+                    for _ in range(options["repeat"]):
+                        started_at, cpu_started_at = (
+                            time.perf_counter(),
+                            time.process_time(),
+                        )
+                        try:
+                            sizes.append(
+                                self._render(backend, image_url, options["accept"])
+                            )
+                        except UpstreamThumbnailException as exc:
+                            self.error(f"{name} failed to render {image_url}: {exc}")
+                            failures += 1
+                            continue
+                        latencies.append(time.perf_counter() - started_at)
+                        cpu_times.append(time.process_time() - cpu_started_at)
+
+            if not latencies:
+                self.error(self.style.ERROR(f"{name}: every render failed"))
+                continue
+            p95 = (
+                statistics.quantiles(latencies, n=20)[-1]
+                if len(latencies) > 1
+                else latencies[0]
+            )
+            self.info(
+                self.style.SUCCESS(
+                    f"{name}: {len(latencies)} thumbnails, {failures} failures, "
+                    f"latency p50={statistics.median(latencies) * 1000:.1f}ms "
+                    f"p95={p95 * 1000:.1f}ms, "
+                    f"CPU={statistics.mean(cpu_times) * 1000:.1f}ms/thumbnail, "
+                    f"size={statistics.mean(sizes) / 1024:.1f}KiB"
+                )
+            )
@@ -0,0 +1,92 @@
+import os
+import statistics
+import time
+from uuid import uuid4
+
+import numpy as np
+from django_tqdm import BaseCommand
+
+from catalog.api.utils.waveform import (
+    cleanup,
+    download_audio,
+    generate_waveform,
+    peaks_from_samples,
+    process_waveform_output,
+    stream_peaks,
+)
+
+
+def _audiowaveform_peaks(url: str, duration: int) -> list[float]:
+    file_name = download_audio(url, uuid4())
+    try:
+        return process_waveform_output(generate_waveform(file_name, duration))
+    finally:
+        cleanup(file_name)
+
+
+def _cpu_time() -> float:
+    """Get the CPU time of this process and of its finished subprocesses."""
+
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class Command(BaseCommand):
+    help = "Compares the latency and CPU time of the waveform extractors."
+    """
+    Generates the waveform of each audio file with ``audiowaveform`` and with
+    NumPy, and reports the wall clock latency and the CPU time per waveform,
+    including the time spent in ``audiowaveform`` and ``ffmpeg``. Also reports
+    how far apart the peaks of both extractors are, as they decode the audio
+    differently.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("audio_urls", help="The audio files to use.", nargs="+")
+        parser.add_argument(
+            "--duration",
+            help="The duration of the audio files, in milliseconds, used to "
+            "determine the resolution of `audiowaveform`.",
+            type=int,
+            required=True,
+        )
+        parser.add_argument(
+            "--repeat",
+            help="The number of times to process each file with each extractor.",
+            type=int,
+            default=3,
+        )
+
+    def handle(self, *args, **options):
+        extractors = {
+            "audiowaveform": lambda url: _audiowaveform_peaks(url, options["duration"]),
+            "numpy": stream_peaks,
+        }
+        peaks = {}
+        for name, extract in extractors.items():
+            latencies, cpu_times = [], []
+            for url in options["audio_urls"]:
+                for _ in range(options["repeat"]):
+                    started_at, cpu_started_at = time.perf_counter(), _cpu_time()
+                    peaks[name, url] = extract(url)
+                    latencies.append(time.perf_counter() - started_at)
+                    cpu_times.append(_cpu_time() - cpu_started_at)
+
+            self.info(
+                self.style.SUCCESS(
+                    f"{name}: latency p50={statistics.median(latencies) * 1000:.1f}ms "
+                    f"max={max(latencies) * 1000:.1f}ms, "
+                    f"CPU={statistics.mean(cpu_times) * 1000:.1f}ms/waveform"
+                )
+            )
+
+        for url in options["audio_urls"]:
+            # Resample the peaks of `audiowaveform` to the same count to compare them.
+            reference = peaks["audiowaveform", url]
+            resampled = peaks_from_samples(
+                np.array(reference), len(peaks["numpy", url])
+            )
+            difference = statistics.mean(
+                abs(a - b) for a, b in zip(resampled, peaks["numpy", url])
+            )
+            self.info(f"{url}: mean peak difference={difference:.4f}")
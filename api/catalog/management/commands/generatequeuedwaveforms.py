@@ -0,0 +1,19 @@
+import django_redis
+
+from catalog.api.utils.waveform_queue import generate_queued_waveform
+from catalog.management.commands._queue_worker import QueueWorkerCommand
+
+
+class Command(QueueWorkerCommand):
+    help = "Generates the waveforms queued by requests when async waveforms are on."
+    """
+    Run alongside the API with ``ENABLE_ASYNC_WAVEFORMS`` set. The waveform
+    endpoint answers 202 for audio without a waveform and queues it, so that the
+    download and the generation happen here instead of in the API workers.
+    """
+
+    noun = "waveforms"
+
+    def process(self, timeout: int, **options) -> int:
+        redis = django_redis.get_redis_connection("default")
+        return int(generate_queued_waveform(redis, timeout))
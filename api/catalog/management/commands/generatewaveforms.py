@@ -1,87 +1,194 @@
+import asyncio
 import logging
+import os
 import subprocess
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 
+from django.core.cache import cache
+
+import aiohttp
 from django_tqdm import BaseCommand
-from limit import limit
 
 from catalog.api.models.audio import Audio, AudioAddOn
+from catalog.api.utils.waveform import download_audio_async, peaks_from_file
 
 
-def paginate_reducing_query(get_query_set, page_size=10):
-    """
-    Iterate over the given query set yielding a specific number of entries each time.
-
-    We can't use `Paginator` because it can't handle the situation
-    where the query result changes each time a page is accessed.
-    Because the `audios` QuerySet result is naturally getting smaller
-    each time we successfully process waveforms, we can just take
-    the first ten for each "page" until the page comes back empty.
-    This should theoretically be faster/less DB latency inducing
-    anyway as we're never going to have huge OFFSET values to
-    access deep pages.
-    """
-    page = list(get_query_set()[0:page_size])
-    while len(page):
-        yield page
-        page = list(get_query_set()[0:page_size])
+# The ID of the last audio processed, to resume from after an interruption
+PROGRESS_KEY = "generatewaveforms:last_id"
+
+
+class ProviderRateLimiter:
+    """Space out the downloads from each provider by at least ``interval`` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._locks = defaultdict(asyncio.Lock)
+        self._next_allowed = defaultdict(float)
+
+    async def wait(self, provider: str):
+        if not self.interval:
+            return
+        async with self._locks[provider]:
+            if (delay := self._next_allowed[provider] - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            self._next_allowed[provider] = time.monotonic() + self.interval
 
 
 class Command(BaseCommand):
     help = "Generates waveforms for all audio records to populate the cache."
     """
-    Note: We rely on the file download and waveform generation times
-    taking long enough to prevent us from either making too many requests
-    to the upstream provider or inserting into our database too quickly and
-    causing a slow down. In local tests and in tests run on the staging server
-    it appeared to take on average around 6 to 8 seconds for each audio file.
-    That should be enough latency to not cause any problems.
+    Audio files are downloaded concurrently, with the downloads from each provider
+    spaced out to avoid overwhelming them, and their waveforms are generated in a
+    pool of processes. Audio is walked by ID, and the last ID processed is saved
+    after each batch, so that an interrupted run resumes where it stopped.
+    Audio that fails to process is skipped, and only retried with ``--restart``.
     """
 
     def add_arguments(self, parser):
         parser.add_argument(
-            "--no_rate_limit", help="Remove self impose rate limits for testing."
+            "--no_rate_limit",
+            help="Remove self impose rate limits for testing.",
+            action="store_true",
         )
         parser.add_argument(
             "--max_records", help="Limit the number of waveforms to create.", type=int
         )
+        parser.add_argument(
+            "--batch_size",
+            help="The number of waveforms to generate before saving them.",
+            type=int,
+            default=100,
+        )
+        parser.add_argument(
+            "--downloads",
+            help="The number of audio files to download concurrently.",
+            type=int,
+            default=20,
+        )
+        parser.add_argument(
+            "--workers",
+            help="The number of processes generating waveforms, 0 to use threads.",
+            type=int,
+            default=os.cpu_count(),
+        )
+        parser.add_argument(
+            "--rate_limit",
+            help="The minimum number of seconds between downloads from a provider.",
+            type=float,
+            default=2,
+        )
+        parser.add_argument(
+            "--restart",
+            help="Start from the first audio instead of resuming the last run.",
+            action="store_true",
+        )
 
-    def get_audio_handler(self, options):
-        if options["no_rate_limit"]:
-            return lambda audio: audio.get_or_create_waveform()
+    @staticmethod
+    def _after(audios, last_id: int | None):
+        return audios if last_id is None else audios.filter(id__gt=last_id)
+
+    @staticmethod
+    def _get_executor(workers: int) -> Executor:
+        if workers:
+            return ProcessPoolExecutor(max_workers=workers)
+        return ThreadPoolExecutor()
+
+    async def _process_batch(
+        self,
+        audios: list[dict],
+        session: aiohttp.ClientSession,
+        limiter: ProviderRateLimiter,
+        executor: Executor,
+    ) -> list[list[float] | BaseException]:
+        loop = asyncio.get_running_loop()
+
+        async def process(audio):
+            await limiter.wait(audio["provider"])
+            file_name = await download_audio_async(
+                session, audio["url"], audio["identifier"]
+            )
+            # Each waveform is generated as soon as its file is downloaded.
+            return await loop.run_in_executor(
+                executor, peaks_from_file, file_name, audio["duration"]
+            )
+
+        return await asyncio.gather(
+            *(process(audio) for audio in audios), return_exceptions=True
+        )
 
-        @limit(limit=1, every=2)  # Call once per two seconds maximum
-        def limited(audio):
-            audio.get_or_create_waveform()
+    def _save_batch(self, audios: list[dict], results: list) -> list:
+        errored_identifiers = []
+        add_ons = []
+        for audio, result in zip(audios, results):
+            if isinstance(result, subprocess.CalledProcessError):
+                errored_identifiers.append(audio["identifier"])
+                self.error(
+                    f"Unable to process {audio['identifier']}: "
+                    f"{result.stderr.decode().strip()}"
+                )
+            elif isinstance(result, BaseException):
+                errored_identifiers.append(audio["identifier"])
+                self.error(f"Unable to process {audio['identifier']}: {result}")
+            else:
+                add_ons.append(
+                    AudioAddOn(
+                        audio_identifier=audio["identifier"], waveform_peaks=result
+                    )
+                )
+
+        AudioAddOn.objects.bulk_create(
+            add_ons,
+            update_conflicts=True,
+            unique_fields=["audio_identifier"],
+            update_fields=["waveform_peaks", "updated_on"],
+        )
+        cache.set(PROGRESS_KEY, audios[-1]["id"], timeout=None)
+        return errored_identifiers
 
-        return limited
+    @staticmethod
+    async def _open_session(downloads: int) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=downloads))
 
-    def _process_wavelengths(self, audios, audio_handler, count_to_process):
+    def _process_waveforms(self, audios, count_to_process, options) -> list:
         errored_identifiers = []
+        last_id = cache.get(PROGRESS_KEY)
+        limiter = ProviderRateLimiter(
+            0 if options["no_rate_limit"] else options["rate_limit"]
+        )
+        # The event loop only runs the downloads, so that the DB is queried from
+        # this thread.
+        loop = asyncio.new_event_loop()
+        session = loop.run_until_complete(self._open_session(options["downloads"]))
         processed = 0
-        with self.tqdm(total=count_to_process) as progress:
-            paginator = paginate_reducing_query(
-                get_query_set=lambda: audios.exclude(identifier__in=errored_identifiers)
-            )
-            for page in paginator:
-                for audio in page:
-                    if processed > count_to_process:
-                        return errored_identifiers
-                    try:
-                        processed += 1
-                        audio_handler(audio)
-                    except subprocess.CalledProcessError as err:
-                        errored_identifiers.append(audio.identifier)
-                        self.error(
-                            f"Unable to process {audio.identifier}: "
-                            f"{err.stderr.decode().strip()}"
-                        )
-                    except KeyboardInterrupt:
-                        errored_identifiers.append(audio.identifier)
-                        return errored_identifiers
-                    except BaseException as err:
-                        errored_identifiers.append(audio.identifier)
-                        self.error(f"Unable to process {audio.identifier}: " f"{err}")
-                    progress.update(1)
+        try:
+            with (
+                self.tqdm(total=count_to_process) as progress,
+                self._get_executor(options["workers"]) as executor,
+            ):
+                while processed < count_to_process:
+                    batch_size = min(
+                        options["batch_size"], count_to_process - processed
+                    )
+                    # Keyset pagination stays fast however deep into the table.
+                    page = list(
+                        self._after(audios, last_id).values(
+                            "id", "identifier", "url", "duration", "provider"
+                        )[:batch_size]
+                    )
+                    if not page:
+                        break
+                    results = loop.run_until_complete(
+                        self._process_batch(page, session, limiter, executor)
+                    )
+                    errored_identifiers += self._save_batch(page, results)
+                    last_id = page[-1]["id"]
+                    processed += len(page)
+                    progress.update(len(page))
+        finally:
+            loop.run_until_complete(session.close())
+            loop.close()
 
         return errored_identifiers
 
@@ -97,8 +204,13 @@ class Command(BaseCommand):
             identifier__in=existing_waveform_audio_identifiers_query
         ).order_by("id")
 
+        if options["restart"]:
+            cache.delete(PROGRESS_KEY)
+        elif last_id := cache.get(PROGRESS_KEY):
+            self.info(self.style.NOTICE(f"Resuming after audio with ID {last_id}"))
+
         max_records = options["max_records"]
-        count = audios.count()
+        count = self._after(audios, cache.get(PROGRESS_KEY)).count()
 
         count_to_process = count
 
@@ -109,11 +221,15 @@ class Command(BaseCommand):
             self.style.NOTICE(f"Generating waveforms for {count_to_process:,} records")
         )
 
-        audio_handler = self.get_audio_handler(options)
-
-        errored_identifiers = self._process_wavelengths(
-            audios, audio_handler, count_to_process
-        )
+        try:
+            errored_identifiers = self._process_waveforms(
+                audios, count_to_process, options
+            )
+        except KeyboardInterrupt:
+            self.info(
+                self.style.WARNING("Interrupted, run the command again to resume.")
+            )
+            return
 
         self.info(self.style.SUCCESS("Finished generating waveforms!"))
 
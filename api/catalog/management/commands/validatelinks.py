@@ -0,0 +1,25 @@
+from catalog.api.utils.check_dead_links import validate_queued_links
+from catalog.management.commands._queue_worker import QueueWorkerCommand
+
+
+class Command(QueueWorkerCommand):
+    help = "Validates the links queued by searches when background validation is on."
+    """
+    Run alongside the API with ``ENABLE_BACKGROUND_LINK_VALIDATION`` set. Links
+    found dead are masked out of the query that returned them, so that following
+    pages of that query no longer include them.
+    """
+
+    noun = "links"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--batch_size",
+            help="The number of links to validate concurrently.",
+            type=int,
+            default=100,
+        )
+
+    def process(self, timeout: int, **options) -> int:
+        return validate_queued_links(options["batch_size"], timeout)
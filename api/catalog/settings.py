@@ -13,9 +13,10 @@ https://docs.djangoproject.com/en/2.0/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 from socket import gethostbyname, gethostname
+from tempfile import gettempdir
 
 import sentry_sdk
-from decouple import config
+from decouple import Choices, config
 from sentry_sdk.integrations.django import DjangoIntegration
 from sentry_sdk.integrations.logging import ignore_logger
 
@@ -42,6 +43,51 @@ ENABLE_FILTERED_INDEX_QUERIES = config(
     "ENABLE_FILTERED_INDEX_QUERIES", cast=bool, default=False
 )
 
+# Cache full pages of search results keyed by the normalized search parameters.
+# Fresh entries are served as-is; stale entries are served while being recomputed
+# in the background, until they expire. All timeouts are in seconds.
+ENABLE_SEARCH_RESULT_CACHE = config(
+    "ENABLE_SEARCH_RESULT_CACHE", cast=bool, default=False
+)
+SEARCH_RESULT_CACHE_FRESH_TTL = config(
+    "SEARCH_RESULT_CACHE_FRESH_TTL", cast=int, default=60 * 5
+)
+SEARCH_RESULT_CACHE_STALE_TTL = config(
+    "SEARCH_RESULT_CACHE_STALE_TTL", cast=int, default=60 * 60
+)
+
+# Cache the DB rows of search results until the index is refreshed (in seconds)
+ENABLE_HYDRATION_CACHE = config("ENABLE_HYDRATION_CACHE", cast=bool, default=False)
+HYDRATION_CACHE_TTL = config("HYDRATION_CACHE_TTL", cast=int, default=60 * 60)
+
+# Cache provider configuration in each process, in front of Redis (in seconds)
+ENABLE_LOCAL_CACHE = config("ENABLE_LOCAL_CACHE", cast=bool, default=False)
+LOCAL_CACHE_TTL = config("LOCAL_CACHE_TTL", cast=int, default=10)
+LOCAL_CACHE_MAX_ENTRIES = config("LOCAL_CACHE_MAX_ENTRIES", cast=int, default=1000)
+
+# Buffer provider tallies in each process and add them to Redis in the background,
+# every interval (in seconds) or once the number of buffered tallies is reached
+ENABLE_BUFFERED_TALLIES = config("ENABLE_BUFFERED_TALLIES", cast=bool, default=False)
+TALLIES_FLUSH_INTERVAL = config("TALLIES_FLUSH_INTERVAL", cast=int, default=10)
+TALLIES_FLUSH_SIZE = config("TALLIES_FLUSH_SIZE", cast=int, default=1000)
+
+# Time the stages of search requests, report them in the `Server-Timing` header and
+# aggregate them into histograms served at `/metrics/`, flushed to Redis like the
+# buffered tallies
+ENABLE_SEARCH_TIMING = config("ENABLE_SEARCH_TIMING", cast=bool, default=False)
+SEARCH_TIMING_FLUSH_INTERVAL = config(
+    "SEARCH_TIMING_FLUSH_INTERVAL", cast=int, default=10
+)
+SEARCH_TIMING_FLUSH_SIZE = config("SEARCH_TIMING_FLUSH_SIZE", cast=int, default=1000)
+
+# Cache the related media of each item until the index is refreshed (in seconds)
+ENABLE_RELATED_MEDIA_CACHE = config(
+    "ENABLE_RELATED_MEDIA_CACHE", cast=bool, default=False
+)
+RELATED_MEDIA_CACHE_TTL = config(
+    "RELATED_MEDIA_CACHE_TTL", cast=int, default=60 * 60 * 24
+)
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.0/howto/deployment/checklist/
 
@@ -120,6 +166,11 @@ if not DEBUG and DJANGO_DB_LOGGING:
         "catalog.api.middleware.force_debug_cursor_middleware.force_debug_cursor_middleware"  # noqa: E501
     )
 
+if ENABLE_SEARCH_TIMING:
+    MIDDLEWARE.append(
+        "catalog.api.middleware.server_timing_middleware.server_timing_middleware"
+    )
+
 
 SWAGGER_SETTINGS = {
     "DEFAULT_INFO": "catalog.urls.swagger.open_api_info",
@@ -149,7 +200,7 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.URLPathVersioning",
     "DEFAULT_RENDERER_CLASSES": (
-        "rest_framework.renderers.JSONRenderer",
+        "catalog.api.utils.drf_renderer.ORJSONRenderer",
         "catalog.api.utils.drf_renderer.BrowsableAPIRendererWithoutForms",
     ),
     "DEFAULT_THROTTLE_CLASSES": (
@@ -236,6 +287,56 @@ THUMBNAIL_TIMEOUT_PREFIX = config(
     "THUMBNAIL_TIMEOUT_PREFIX", default="thumbnail_timeout:"
 )
 
+# Render thumbnails with Photon, or in-process with Pillow. Pillow renders in a pool
+# of ``THUMBNAIL_RENDER_PROCESSES`` processes, or in the request thread if 0.
+THUMBNAIL_BACKEND = config(
+    "THUMBNAIL_BACKEND", cast=Choices(["photon", "pillow"]), default="photon"
+)
+THUMBNAIL_RENDER_PROCESSES = config("THUMBNAIL_RENDER_PROCESSES", cast=int, default=2)
+THUMBNAIL_RENDER_TIMEOUT = config("THUMBNAIL_RENDER_TIMEOUT", cast=float, default=10)
+THUMBNAIL_MAX_INPUT_PIXELS = config(
+    "THUMBNAIL_MAX_INPUT_PIXELS", cast=int, default=50_000_000
+)
+THUMBNAIL_MAX_INPUT_BYTES = config(
+    "THUMBNAIL_MAX_INPUT_BYTES", cast=int, default=50 * 1024 * 1024
+)
+
+# Timeouts (in seconds) and number of pooled connections of the requests to Photon
+THUMBNAIL_CONNECT_TIMEOUT = config("THUMBNAIL_CONNECT_TIMEOUT", cast=float, default=5)
+THUMBNAIL_READ_TIMEOUT = config("THUMBNAIL_READ_TIMEOUT", cast=float, default=15)
+THUMBNAIL_POOL_MAXSIZE = config("THUMBNAIL_POOL_MAXSIZE", cast=int, default=10)
+
+# Fail fast on thumbnails that failed recently, for ``THUMBNAIL_FAILURE_TTL`` seconds,
+# and on hosts that timed out ``THUMBNAIL_DOMAIN_TIMEOUT_THRESHOLD`` times within
+# ``THUMBNAIL_DOMAIN_TIMEOUT_WINDOW`` seconds.
+ENABLE_THUMBNAIL_FAILURE_CACHE = config(
+    "ENABLE_THUMBNAIL_FAILURE_CACHE", cast=bool, default=False
+)
+THUMBNAIL_FAILURE_TTL = config("THUMBNAIL_FAILURE_TTL", cast=int, default=60 * 60)
+THUMBNAIL_DOMAIN_TIMEOUT_THRESHOLD = config(
+    "THUMBNAIL_DOMAIN_TIMEOUT_THRESHOLD", cast=int, default=5
+)
+THUMBNAIL_DOMAIN_TIMEOUT_WINDOW = config(
+    "THUMBNAIL_DOMAIN_TIMEOUT_WINDOW", cast=int, default=5 * 60
+)
+
+# Cache rendered thumbnails on the local disk and, optionally, in Redis. Sizes are
+# in bytes and durations in seconds; a Redis TTL of 0 disables the Redis tier.
+ENABLE_THUMBNAIL_CACHE = config("ENABLE_THUMBNAIL_CACHE", cast=bool, default=False)
+THUMBNAIL_CACHE_DIR = config(
+    "THUMBNAIL_CACHE_DIR", default=str(Path(gettempdir()) / "thumbnails")
+)
+THUMBNAIL_CACHE_MAX_BYTES = config(
+    "THUMBNAIL_CACHE_MAX_BYTES", cast=int, default=1024 * 1024 * 1024
+)
+THUMBNAIL_CACHE_FRESH_TTL = config(
+    "THUMBNAIL_CACHE_FRESH_TTL", cast=int, default=60 * 60 * 24
+)
+THUMBNAIL_CACHE_REDIS_TTL = config("THUMBNAIL_CACHE_REDIS_TTL", cast=int, default=0)
+THUMBNAIL_CACHE_REDIS_MAX_BYTES = config(
+    "THUMBNAIL_CACHE_REDIS_MAX_BYTES", cast=int, default=256 * 1024
+)
+
 AUTHENTICATION_BACKENDS = (
     "oauth2_provider.backends.OAuth2Backend",
     "django.contrib.auth.backends.ModelBackend",
@@ -333,6 +434,25 @@ CONTACT_EMAIL = config("CONTACT_EMAIL", default="openverse@wordpress.org")
 
 WATERMARK_ENABLED = config("WATERMARK_ENABLED", default=False, cast=bool)
 
+# Answer 202 for waveforms that do not exist yet, and queue them for the
+# ``generatequeuedwaveforms`` worker instead of generating them in the request. The
+# worker must run alongside the API, e.g. as the ``waveform_worker`` Compose service.
+ENABLE_ASYNC_WAVEFORMS = config("ENABLE_ASYNC_WAVEFORMS", cast=bool, default=False)
+# The number of seconds clients are told to wait before requesting the waveform again
+WAVEFORM_RETRY_AFTER = config("WAVEFORM_RETRY_AFTER", cast=int, default=5)
+
+# Generate waveforms with the ``audiowaveform`` binary, or by decoding audio with
+# ``ffmpeg`` and computing the peaks with NumPy, without writing the audio to disk.
+WAVEFORM_EXTRACTOR = config(
+    "WAVEFORM_EXTRACTOR",
+    cast=Choices(["audiowaveform", "numpy"]),
+    default="audiowaveform",
+)
+# The timeouts of the requests streaming audio to the ``numpy`` extractor, in seconds.
+# The read timeout applies to each chunk, not to the whole download.
+WAVEFORM_CONNECT_TIMEOUT = config("WAVEFORM_CONNECT_TIMEOUT", cast=float, default=5)
+WAVEFORM_READ_TIMEOUT = config("WAVEFORM_READ_TIMEOUT", cast=float, default=30)
+
 EMAIL_SENDER = config("EMAIL_SENDER", default="")
 EMAIL_HOST = config("EMAIL_HOST", default="")
 EMAIL_PORT = config("EMAIL_PORT", default=587, cast=int)
@@ -353,6 +473,13 @@ VERBOSE_ES_RESPONSE = config("DEBUG_SCORES", default=False, cast=bool)
 # Whether to boost results by authority and popularity
 USE_RANK_FEATURES = config("USE_RANK_FEATURES", default=True, cast=bool)
 
+# Let Elasticsearch cache the responses of filter-only searches and related media in
+# its shard request cache, which is cleared when the index is refreshed
+ENABLE_ES_REQUEST_CACHE = config("ENABLE_ES_REQUEST_CACHE", default=False, cast=bool)
+
+# Find the `fields_matched` of the results with named queries instead of highlighting
+ENABLE_NAMED_QUERIES = config("ENABLE_NAMED_QUERIES", default=False, cast=bool)
+
 # The scheme to use for the hyperlinks in the API responses
 API_LINK_SCHEME = config("API_LINK_SCHEME", default=None)
 
@@ -393,6 +520,35 @@ if not DEBUG and SENTRY_DSN:
 # for links with HTTP status 200 to 1 day
 LINK_VALIDATION_CACHE_EXPIRY_CONFIGURATION = LinkValidationCacheExpiryConfiguration()
 
+# The seconds to wait to connect to a host and for each read of its response, and
+# the seconds after which the links not validated yet are given up on, which bounds
+# the time a search request spends validating links
+LINK_VALIDATION_TIMEOUT = config("LINK_VALIDATION_TIMEOUT", cast=float, default=1)
+LINK_VALIDATION_DEADLINE = config("LINK_VALIDATION_DEADLINE", cast=float, default=2)
+
+# Link validation connection pool, shared by the requests of each worker
+LINK_VALIDATION_MAX_CONNECTIONS = config(
+    "LINK_VALIDATION_MAX_CONNECTIONS", cast=int, default=100
+)
+LINK_VALIDATION_MAX_CONNECTIONS_PER_HOST = config(
+    "LINK_VALIDATION_MAX_CONNECTIONS_PER_HOST", cast=int, default=10
+)
+# Stop requesting a host for the cooldown (in seconds) after this many consecutive
+# rate limited, blocked or failed requests
+LINK_VALIDATION_CIRCUIT_BREAKER_THRESHOLD = config(
+    "LINK_VALIDATION_CIRCUIT_BREAKER_THRESHOLD", cast=int, default=5
+)
+LINK_VALIDATION_CIRCUIT_BREAKER_COOLDOWN = config(
+    "LINK_VALIDATION_CIRCUIT_BREAKER_COOLDOWN", cast=int, default=60
+)
+
+# Queue links without a cached status for the ``validatelinks`` worker instead of
+# validating them while the search request waits. The worker must run alongside the
+# API, e.g. as the ``link_validator`` service of the Docker Compose stack.
+ENABLE_BACKGROUND_LINK_VALIDATION = config(
+    "ENABLE_BACKGROUND_LINK_VALIDATION", cast=bool, default=False
+)
+
 MAX_ANONYMOUS_PAGE_SIZE = 20
 MAX_AUTHED_PAGE_SIZE = 500
 MAX_PAGINATION_DEPTH = 20
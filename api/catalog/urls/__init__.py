@@ -21,7 +21,9 @@ from catalog.api.utils.status_code_view import get_status_code_view
 from catalog.api.views.audio_views import AudioViewSet
 from catalog.api.views.health_views import HealthCheck
 from catalog.api.views.image_views import ImageViewSet
+from catalog.api.views.metrics_views import SearchTimingMetrics
 from catalog.api.views.oauth2_views import CheckRates
+from catalog.api.views.search_views import BatchSearch
 from catalog.urls.auth_tokens import urlpatterns as auth_tokens_patterns
 
 
@@ -38,6 +40,8 @@ versioned_paths = [
     # Authentication endpoints
     path("rate_limit/", CheckRates.as_view(), name="key_info"),
     path("auth_tokens/", include(auth_tokens_patterns)),
+    # Search endpoints
+    path("search/batch/", BatchSearch.as_view(), name="batch-search"),
     # Deprecated, redirects to new URL
     path(
         "sources",
@@ -78,6 +82,7 @@ urlpatterns = [
     path("", RedirectView.as_view(pattern_name="root")),
     path("admin/", admin.site.urls),
     path("healthcheck/", HealthCheck.as_view()),
+    path("metrics/", SearchTimingMetrics.as_view()),
     # API
     path("v1/", include(versioned_paths)),
 ]
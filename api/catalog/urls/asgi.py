@@ -0,0 +1,21 @@
+"""
+The URL configuration of the ASGI application.
+
+Routes the media endpoints to the viewsets with async search, and everything else
+to the same views as ``catalog.urls``.
+"""
+
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
+
+from catalog.api.views.audio_views import AsyncAudioViewSet
+from catalog.api.views.image_views import AsyncImageViewSet
+from catalog.urls import urlpatterns as sync_urlpatterns
+
+
+router = SimpleRouter()
+router.register("audio", AsyncAudioViewSet, basename="audio")
+router.register("images", AsyncImageViewSet, basename="image")
+
+# The first matching pattern wins, so these take precedence over the sync viewsets.
+urlpatterns = [path("v1/", include(router.urls))] + sync_urlpatterns
@@ -63,14 +63,14 @@ def empty_validation_cache(monkeypatch):
 
 
 _MAKE_HEAD_REQUESTS_MODULE_PATH = (
-    "catalog.api.utils.check_dead_links._make_head_requests"
+    "catalog.api.utils.check_dead_links.validator.validate"
 )
 
 
 def _patch_make_head_requests():
-    def _make_head_requests(urls):
+    def _make_head_requests(links):
         responses = []
-        for idx, url in enumerate(urls):
+        for idx, (url, _) in enumerate(links):
             status_code = 200 if idx % 10 != 0 else 404
             responses.append((url, status_code))
         return responses
@@ -81,10 +81,10 @@ def _patch_make_head_requests():
 def patch_link_validation_dead_for_count(count):
     total_res_count = 0
 
-    def _make_head_requests(urls):
+    def _make_head_requests(links):
         nonlocal total_res_count
         responses = []
-        for idx, url in enumerate(urls):
+        for idx, (url, _) in enumerate(links):
             total_res_count += 1
             status_code = 404 if total_res_count <= count else 200
             responses.append((url, status_code))
@@ -4,14 +4,19 @@ from enum import Enum, auto
 from unittest import mock
 from uuid import uuid4
 
+from django.core.cache import cache
+
 import pytest
+from asgiref.sync import async_to_sync
 from django_redis import get_redis_connection
+from elasticsearch.exceptions import NotFoundError
 from elasticsearch_dsl import Search
+from elasticsearch_dsl.response import Response
 
 from catalog.api.controllers import search_controller
 from catalog.api.serializers.media_serializers import MediaSearchRequestSerializer
-from catalog.api.utils import tallies
-from catalog.api.utils.dead_link_mask import get_query_hash, save_query_mask
+from catalog.api.utils import search_cache, search_cursor, tallies
+from catalog.api.utils.dead_link_mask import save_query_mask
 
 
 pytestmark = pytest.mark.django_db
@@ -75,14 +80,8 @@ def test_get_result_and_page_count(
 
 
 @pytest.fixture
-def unique_search() -> Search:
-    s = Search()
-    s = s.query(
-        "simple_query_string",
-        query=str(uuid4()),
-        fields=["title"],
-    )
-    return s
+def unique_query_hash() -> str:
+    return str(uuid4())
 
 
 @pytest.mark.parametrize(
@@ -97,7 +96,7 @@ def unique_search() -> Search:
     ),
 )
 def test_paginate_with_dead_link_mask_new_search(
-    unique_search, page_size, page, expected_end
+    unique_query_hash, page_size, page, expected_end
 ):
     """
     Testing "branch 1" in the function code.
@@ -144,7 +143,7 @@ def test_paginate_with_dead_link_mask_new_search(
     start = 0
 
     assert search_controller._paginate_with_dead_link_mask(
-        s=unique_search, page_size=page_size, page=page
+        query_hash=unique_query_hash, page_size=page_size, page=page
     ) == (start, expected_end)
 
 
@@ -156,17 +155,16 @@ class CreateMaskConfig(Enum):
 
 
 @pytest.fixture(name="create_mask")
-def create_mask_fixture() -> Callable[[Search, int, int], None]:
+def create_mask_fixture() -> Callable[[str, int, int], None]:
     created_masks = []
 
     def create_mask(
-        s: Search,
+        query_hash: str,
         liveness_count: int | None,
         mask: list[int] | None = None,
         mask_size: int | None = None,
         config: tuple[CreateMaskConfig] = (),
     ):
-        query_hash = get_query_hash(s)
         created_masks.append(query_hash)
         if mask:
             save_query_mask(query_hash, mask)
@@ -209,7 +207,13 @@ def create_mask_fixture() -> Callable[[Search, int, int], None]:
     yield create_mask
 
     with get_redis_connection("default") as redis:
-        redis.delete(*[f"{h}:dead_link_mask" for h in created_masks])
+        redis.delete(
+            *[
+                f"{h}:dead_link_mask_{suffix}"
+                for h in created_masks
+                for suffix in ("bits", "length")
+            ]
+        )
 
 
 @pytest.mark.parametrize(
@@ -231,7 +235,7 @@ def create_mask_fixture() -> Callable[[Search, int, int], None]:
     ),
 )
 def test_paginate_with_dead_link_mask_query_mask_is_not_large_enough(
-    unique_search,
+    unique_query_hash,
     create_mask,
     page_size,
     page,
@@ -252,9 +256,11 @@ def test_paginate_with_dead_link_mask_query_mask_is_not_large_enough(
     page will skip forward to avoid any dead links at the start of the results list.
     """
     start = mask_size
-    create_mask(s=unique_search, mask_size=mask_size, liveness_count=liveness_count)
+    create_mask(
+        query_hash=unique_query_hash, mask_size=mask_size, liveness_count=liveness_count
+    )
     assert search_controller._paginate_with_dead_link_mask(
-        s=unique_search, page_size=page_size, page=page
+        query_hash=unique_query_hash, page_size=page_size, page=page
     ) == (start, expected_end)
 
 
@@ -326,7 +332,7 @@ def test_paginate_with_dead_link_mask_query_mask_is_not_large_enough(
     ),
 )
 def test_paginate_with_dead_link_mask_query_mask_overlaps_query_window(
-    unique_search,
+    unique_query_hash,
     create_mask,
     page_size,
     page,
@@ -362,7 +368,7 @@ def test_paginate_with_dead_link_mask_query_mask_overlaps_query_window(
     possibility of end_B.
     """
     create_mask_kwargs = {
-        "s": unique_search,
+        "query_hash": unique_query_hash,
         "liveness_count": liveness_count,
         "config": (
             (create_mask_config,)
@@ -377,7 +383,7 @@ def test_paginate_with_dead_link_mask_query_mask_overlaps_query_window(
 
     create_mask(**create_mask_kwargs)
     actual_range = search_controller._paginate_with_dead_link_mask(
-        s=unique_search, page_size=page_size, page=page
+        query_hash=unique_query_hash, page_size=page_size, page=page
     )
     assert (
         actual_range == expected_range
@@ -551,3 +557,408 @@ def test_resolves_index(
     )
 
     search_class.assert_called_once_with(index=searched_index)
+
+
+@parametrize_index
+@mock.patch.object(tallies, "count_provider_occurrences")
+@mock.patch("catalog.api.controllers.search_controller._execute_search")
+def test_search_uses_result_cache(
+    mock_execute_search,
+    count_provider_occurrences_mock: mock.MagicMock,
+    index,
+    settings,
+    request_factory,
+):
+    settings.ENABLE_SEARCH_RESULT_CACHE = True
+    mock_execute_search.return_value = ([{"provider": "a provider"}], 1, 1)
+
+    serializer = MediaSearchRequestSerializer(data={"q": str(uuid4())})
+    serializer.is_valid()
+
+    for _ in range(2):
+        results, page_count, result_count = search_controller.search(
+            search_params=serializer,
+            ip=0,
+            index=index,
+            page=1,
+            page_size=20,
+            request=request_factory.get("/"),
+            filter_dead=False,
+        )
+        assert results == [{"provider": "a provider"}]
+        assert (page_count, result_count) == (1, 1)
+
+    mock_execute_search.assert_called_once()
+    # Cached pages still count towards provider tallies
+    assert count_provider_occurrences_mock.call_count == 2
+
+
+def _cursor_serializer(**data):
+    request = mock.MagicMock(user=mock.MagicMock(is_anonymous=False))
+    serializer = MediaSearchRequestSerializer(data=data, context={"request": request})
+    serializer.is_valid(raise_exception=True)
+    return serializer
+
+
+def _hits_response(count, pit_id):
+    hits = [
+        {
+            "_index": "image-abc",
+            "_id": str(i),
+            "_source": {"identifier": str(uuid4()), "url": f"https://example.com/{i}"},
+            "sort": [1.0, i],
+        }
+        for i in range(count)
+    ]
+    return {"hits": {"total": {"value": 5}, "hits": hits}, "pit_id": pit_id}
+
+
+@mock.patch.object(Search, "execute", autospec=True)
+def test_search_with_cursor_walks_point_in_time(mock_execute, settings):
+    settings.ENABLE_FILTERED_INDEX_QUERIES = False
+    settings.ES = mock.MagicMock()
+    settings.ES.open_point_in_time.return_value = {"id": "pit-1"}
+    requests = []
+
+    def execute(s):
+        requests.append(s.to_dict())
+        count, pit_id = [(3, "pit-2"), (2, "pit-3")][len(requests) - 1]
+        return Response(s, _hits_response(count, pit_id))
+
+    mock_execute.side_effect = execute
+
+    results, result_count, cursor = search_controller.search_with_cursor(
+        _cursor_serializer(q="dogs", cursor=""), "image", 3
+    )
+    assert (len(results), result_count) == (3, 5)
+    settings.ES.open_point_in_time.assert_called_once_with(
+        index="image", keep_alive=search_controller.CURSOR_KEEP_ALIVE
+    )
+
+    results, result_count, next_cursor = search_controller.search_with_cursor(
+        _cursor_serializer(q="dogs", cursor=cursor), "image", 3
+    )
+    assert (len(results), result_count, next_cursor) == (2, 5, None)
+    settings.ES.open_point_in_time.assert_called_once()
+    settings.ES.close_point_in_time.assert_called_once_with(body={"id": "pit-3"})
+
+    first, second = requests
+    assert first["pit"]["id"] == "pit-1"
+    assert "search_after" not in first
+    assert "from" not in first
+    assert second["pit"]["id"] == "pit-2"
+    assert second["search_after"] == [1.0, 2]
+    assert second["size"] == 3
+
+
+@mock.patch.object(Search, "execute", autospec=True)
+def test_search_with_cursor_handles_expired_point_in_time(mock_execute, settings):
+    settings.ES = mock.MagicMock()
+    settings.ES.open_point_in_time.return_value = {"id": "pit-1"}
+    mock_execute.side_effect = lambda s: Response(s, _hits_response(3, "pit-1"))
+    _, _, cursor = search_controller.search_with_cursor(
+        _cursor_serializer(q="dogs", cursor=""), "image", 3
+    )
+
+    mock_execute.side_effect = NotFoundError(404, "search_context_missing_exception")
+    with pytest.raises(search_cursor.InvalidCursor):
+        search_controller.search_with_cursor(
+            _cursor_serializer(q="dogs", cursor=cursor), "image", 3
+        )
+
+
+@mock.patch.object(Search, "execute", autospec=True)
+def test_export_iterates_over_all_batches(mock_execute, settings):
+    settings.ES = mock.MagicMock()
+    settings.ES.open_point_in_time.return_value = {"id": "pit-1"}
+    requests = []
+
+    def execute(s):
+        requests.append(s.to_dict())
+        return Response(s, _hits_response(2 if len(requests) < 3 else 1, "pit-2"))
+
+    mock_execute.side_effect = execute
+
+    batches = list(search_controller.export(_cursor_serializer(q="dogs"), "image", 2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [request.get("search_after") for request in requests] == [
+        None,
+        [1.0, 1],
+        [1.0, 1],
+    ]
+    settings.ES.close_point_in_time.assert_called_once_with(body={"id": "pit-2"})
+
+
+@mock.patch.object(Search, "execute", autospec=True)
+def test_export_closes_point_in_time_when_stopped_early(mock_execute, settings):
+    settings.ES = mock.MagicMock()
+    settings.ES.open_point_in_time.return_value = {"id": "pit-1"}
+    mock_execute.side_effect = lambda s: Response(s, _hits_response(2, "pit-1"))
+
+    batches = search_controller.export(_cursor_serializer(q="dogs"), "image", 2)
+    next(batches)
+    batches.close()
+
+    settings.ES.close_point_in_time.assert_called_once_with(body={"id": "pit-1"})
+
+
+@mock.patch.object(tallies, "count_provider_occurrences")
+@mock.patch("elasticsearch_dsl.search.get_connection")
+def test_search_many_sends_a_single_multi_search(
+    mock_get_connection, count_provider_occurrences_mock, settings, request_factory
+):
+    settings.ENABLE_FILTERED_INDEX_QUERIES = False
+    es = mock_get_connection.return_value
+    es.msearch.return_value = {
+        "responses": [_hits_response(3, None), _hits_response(2, None)]
+    }
+    request = request_factory.get("/")
+    specs = [
+        search_controller.SearchSpec(
+            _cursor_serializer(q="dogs"), "image", 3, filter_dead=False
+        ),
+        search_controller.SearchSpec(
+            _cursor_serializer(q="cats"), "audio", 2, filter_dead=False, page=2
+        ),
+    ]
+
+    (images, *image_counts), (audio, *audio_counts) = search_controller.search_many(
+        specs, 1234, request
+    )
+
+    es.msearch.assert_called_once()
+    _, kwargs = es.msearch.call_args
+    assert kwargs["request_timeout"] == 7
+    image_header, image_body, audio_header, audio_body = kwargs["body"]
+    assert image_header == {"index": ["image"], "preference": "1234"}
+    assert (image_body["from"], image_body["size"]) == (0, 3)
+    assert audio_header == {"index": ["audio"], "preference": "1234"}
+    assert (audio_body["from"], audio_body["size"]) == (2, 2)
+    assert (len(images), image_counts) == (3, [2, 5])
+    assert (len(audio), audio_counts) == (2, [3, 5])
+    assert count_provider_occurrences_mock.call_count == 2
+
+
+def test_build_search_keeps_filters_in_filter_context(settings):
+    settings.USE_RANK_FEATURES = True
+    settings.ENABLE_NAMED_QUERIES = False
+
+    s = search_controller._build_search(_cursor_serializer(license="by"), "image")
+
+    query = s.to_dict()
+    bool_query = query["query"]["bool"]
+    license_filter = {"terms": {"license.keyword": ["by"]}}
+    assert {"bool": {"should": [license_filter]}} in bool_query["filter"]
+    assert bool_query["must"] == [{"match_all": {}}]
+    # Filter-only searches have no terms to highlight.
+    assert "highlight" not in query
+
+
+def test_build_search_uses_named_queries_instead_of_highlighting(settings):
+    settings.ENABLE_NAMED_QUERIES = True
+
+    s = search_controller._build_search(_cursor_serializer(q="cat"), "image")
+
+    query = s.to_dict()
+    assert "highlight" not in query
+    names = [
+        clause["simple_query_string"]["_name"]
+        for clause in query["query"]["bool"]["should"]
+        if "_name" in clause.get("simple_query_string", {})
+    ]
+    assert names == ["tags.name", "title", "description"]
+
+    hit = {
+        "_index": "image",
+        "_id": "1",
+        "_source": {"url": "https://example.com/1"},
+        "matched_queries": ["title", "description"],
+    }
+    results, _ = search_controller._collect_results(
+        Response(s, {"hits": {"total": {"value": 1}, "hits": [hit]}})
+    )
+    assert results[0].fields_matched == ["description", "title"]
+
+
+@pytest.mark.parametrize(
+    ("data", "request_cache"),
+    (
+        pytest.param({"license": "by"}, True, id="filter_only"),
+        pytest.param({"q": "cat", "license": "by"}, False, id="text"),
+        pytest.param({"creator": "nasa"}, False, id="advanced"),
+    ),
+)
+def test_request_cache_is_used_for_filter_only_searches(data, request_cache, settings):
+    settings.ENABLE_ES_REQUEST_CACHE = True
+
+    s, _ = search_controller._build_hashed_search(
+        _cursor_serializer(**data), "image", 1234, filter_dead=False
+    )
+
+    assert s._params.get("request_cache", False) == request_cache
+
+
+@pytest.fixture
+def related_media_cache(settings):
+    settings.ENABLE_RELATED_MEDIA_CACHE = True
+    settings.ES = mock.MagicMock()
+    settings.ES.indices.get_alias.return_value = {"image-abc": {}}
+    yield
+    cache.delete_pattern("related_media:*")
+    cache.delete_pattern(f"{search_cache.CACHE_PREFIX}*")
+
+
+def _related_hits(ids):
+    hits = [
+        {"_index": "image-abc", "_id": _id, "_source": {"url": f"https://e.com/{_id}"}}
+        for _id in ids
+    ]
+    return {"hits": {"total": {"value": 30}, "hits": hits}}
+
+
+def _related_response(s, ids):
+    return Response(s, _related_hits(ids))
+
+
+def _related_multi_search(precomputed, lookup_ids, related_ids):
+    document = [{"_index": "image-abc", "_id": "1", "_source": precomputed}]
+    return {
+        "responses": [
+            {"hits": {"total": {"value": 1}, "hits": document}},
+            _related_hits(lookup_ids),
+            _related_hits(related_ids),
+        ]
+    }
+
+
+@mock.patch("elasticsearch_dsl.search.get_connection")
+@mock.patch.object(Search, "execute", autospec=True)
+def test_related_media_caches_related_ids(
+    mock_execute, mock_get_connection, related_media_cache, settings
+):
+    es = mock_get_connection.return_value
+    es.msearch.return_value = _related_multi_search({}, [], [str(i) for i in range(20)])
+    # Documents are not returned in the order of the related IDs.
+    mock_execute.side_effect = lambda s: _related_response(
+        s, [str(i) for i in reversed(range(20))]
+    )
+
+    for _ in range(2):
+        results, result_count = search_controller.related_media(
+            1, "image", None, filter_dead=False
+        )
+        assert [res.meta.id for res in results] == [str(i) for i in range(10)]
+        assert result_count == 30
+
+    # The related documents are found in one round trip on a cache miss, and are
+    # fetched by ID afterwards.
+    es.msearch.assert_called_once()
+    _, kwargs = es.msearch.call_args
+    assert "more_like_this" in str(kwargs["body"][-1])
+    (s,), _ = mock_execute.call_args
+    assert "more_like_this" not in str(s.to_dict())
+    mock_execute.assert_called_once()
+
+
+@mock.patch("elasticsearch_dsl.search.get_connection")
+@mock.patch.object(Search, "execute", autospec=True)
+def test_related_media_uses_precomputed_ids(
+    mock_execute, mock_get_connection, related_media_cache, settings
+):
+    es = mock_get_connection.return_value
+    es.msearch.return_value = _related_multi_search(
+        {"related": ["3", "2", "1"]}, ["1", "2", "3"], ["4", "5"]
+    )
+
+    results, result_count = search_controller.related_media(
+        1, "image", None, filter_dead=False
+    )
+
+    assert [res.meta.id for res in results] == ["3", "2", "1"]
+    assert result_count == 3
+    es.msearch.assert_called_once()
+    mock_execute.assert_not_called()
+    _, kwargs = es.msearch.call_args
+    _, document, _, lookup, *_ = kwargs["body"]
+    assert document["_source"] == ["related"]
+    assert lookup["query"]["bool"]["filter"][0] == {
+        "terms": {"_id": {"index": "image", "id": "1", "path": "related"}}
+    }
+
+
+@pytest.fixture
+def async_es():
+    with mock.patch.object(search_controller, "get_async_es") as get_async_es:
+        yield get_async_es.return_value
+
+
+def _provider_hits_response(count):
+    hits = [
+        {
+            "_index": "image",
+            "_id": str(i),
+            "_source": {
+                "identifier": str(uuid4()),
+                "url": f"https://example.com/{i}",
+                "provider": "flickr",
+            },
+        }
+        for i in range(count)
+    ]
+    return {"hits": {"total": {"value": 50}, "hits": hits}}
+
+
+@mock.patch.object(tallies, "acount_provider_occurrences")
+def test_asearch_queries_async_client(
+    acount_provider_occurrences_mock, async_es, settings, request_factory
+):
+    settings.ENABLE_FILTERED_INDEX_QUERIES = False
+    async_es.search = mock.AsyncMock(return_value=_provider_hits_response(3))
+    serializer = _cursor_serializer(q="dogs")
+
+    results, page_count, result_count = async_to_sync(search_controller.asearch)(
+        serializer, "image", 3, 1234, request_factory.get("/"), filter_dead=False
+    )
+
+    _, kwargs = async_es.search.call_args
+    assert kwargs["index"] == ["image"]
+    assert (kwargs["body"]["from"], kwargs["body"]["size"]) == (0, 3)
+    assert (kwargs["preference"], kwargs["request_timeout"]) == ("1234", 7)
+    assert (len(results), page_count, result_count) == (3, 17, 50)
+    acount_provider_occurrences_mock.assert_awaited_once_with(results, "image")
+
+
+@mock.patch.object(tallies, "acount_provider_occurrences")
+@mock.patch.object(search_controller, "acheck_dead_links")
+def test_asearch_backfills_dead_links(
+    acheck_dead_links_mock,
+    acount_provider_occurrences_mock,
+    async_es,
+    settings,
+    request_factory,
+):
+    settings.ENABLE_FILTERED_INDEX_QUERIES = False
+    async_es.search = mock.AsyncMock(
+        side_effect=[_provider_hits_response(4), _provider_hits_response(6)]
+    )
+    query_hashes = []
+
+    async def check_dead_links(query_hash, start, results, to_validate):
+        query_hashes.append(query_hash)
+        if len(query_hashes) == 1:
+            # All but one of the results of the first query are dead.
+            del results[1:]
+
+    acheck_dead_links_mock.side_effect = check_dead_links
+    serializer = _cursor_serializer(q=str(uuid4()))
+
+    results, _, _ = async_to_sync(search_controller.asearch)(
+        serializer, "image", 2, 1234, request_factory.get("/"), filter_dead=True
+    )
+
+    sizes = [kwargs["body"]["size"] for _, kwargs in async_es.search.call_args_list]
+    assert sizes == [4, 6]
+    assert len(results) == 2
+    # The query is hashed once, and the same hash is used for the backfill.
+    assert len(set(query_hashes)) == 1
@@ -1,42 +1,86 @@
+import asyncio
 import subprocess
 from io import StringIO
 from test.factory.faker import WaveformProvider
 from test.factory.models.audio import AudioAddOnFactory, AudioFactory
 from unittest import mock
 
+from django.core.cache import cache
 from django.core.management import call_command
-from django.db import connections
-from django.test.utils import CaptureQueriesContext
 
 import psycopg2
 import pytest
 
 from catalog.api.models.audio import Audio, AudioAddOn
+from catalog.management.commands.generatewaveforms import (
+    PROGRESS_KEY,
+    Command,
+    ProviderRateLimiter,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_progress():
+    cache.delete(PROGRESS_KEY)
+    yield
+    cache.delete(PROGRESS_KEY)
+
+
+@pytest.fixture(autouse=True)
+def mock_download_audio():
+    with mock.patch(
+        "catalog.management.commands.generatewaveforms.download_audio_async"
+    ) as mock_download_audio:
+        mock_download_audio.side_effect = lambda session, url, identifier: (
+            f"audio-{identifier}.mp3"
+        )
+        yield mock_download_audio
 
 
-@mock.patch("catalog.api.models.audio.generate_peaks")
-def call_generatewaveforms(mock_generate_peaks: mock.MagicMock) -> tuple[str, str]:
-    mock_generate_peaks.side_effect = lambda _: WaveformProvider.generate_waveform()
+@pytest.fixture
+def mock_peaks_from_file():
+    with mock.patch(
+        "catalog.management.commands.generatewaveforms.peaks_from_file"
+    ) as mock_peaks_from_file:
+        mock_peaks_from_file.side_effect = (
+            lambda file_name, duration: WaveformProvider.generate_waveform()
+        )
+        yield mock_peaks_from_file
+
+
+def call_generatewaveforms(**options) -> tuple[str, str]:
     out = StringIO()
     err = StringIO()
-    call_command("generatewaveforms", no_rate_limit=True, stdout=out, stderr=err)
+    call_command(
+        "generatewaveforms",
+        no_rate_limit=True,
+        workers=0,
+        stdout=out,
+        stderr=err,
+        **options,
+    )
 
     return out.getvalue(), err.getvalue()
 
 
 def assert_all_audio_have_waveforms():
-    assert (
-        list(
-            AudioAddOn.objects.filter(waveform_peaks__isnull=False).values_list(
-                "audio_identifier"
-            )
-        ).sort()
-        == list(Audio.objects.all().values_list("identifier")).sort()
+    assert sorted(
+        AudioAddOn.objects.filter(waveform_peaks__isnull=False).values_list(
+            "audio_identifier", flat=True
+        )
+    ) == sorted(Audio.objects.all().values_list("identifier", flat=True))
+
+
+def get_failed_audio():
+    return Audio.objects.exclude(
+        identifier__in=AudioAddOn.objects.filter(
+            waveform_peaks__isnull=False
+        ).values_list("audio_identifier", flat=True)
     )
 
 
 @pytest.mark.django_db
-def test_creates_waveforms_for_audio():
+def test_creates_waveforms_for_audio(mock_peaks_from_file):
     AudioFactory.create_batch(153)
 
     assert AudioAddOn.objects.count() == 0
@@ -47,7 +91,7 @@ def test_creates_waveforms_for_audio():
 
 
 @pytest.mark.django_db
-def test_does_not_reprocess_existing_waveforms():
+def test_does_not_reprocess_existing_waveforms(mock_peaks_from_file):
     waveformless_audio = AudioFactory.create_batch(3)
 
     # AudioAddOnFactory will create associated Audio objects as well
@@ -63,86 +107,68 @@ def test_does_not_reprocess_existing_waveforms():
     out, err = call_generatewaveforms()
 
     assert f"Generating waveforms for {len(waveformless_audio)} records" in out
+    assert mock_peaks_from_file.call_count == len(waveformless_audio)
     assert_all_audio_have_waveforms()
 
 
 @pytest.mark.django_db
-@mock.patch("catalog.api.models.audio.generate_peaks")
 def test_paginates_audio_waveforms_to_generate(
-    mock_generate_peaks, django_assert_num_queries
+    mock_peaks_from_file, django_assert_num_queries
 ):
-    mock_generate_peaks.return_value = WaveformProvider.generate_waveform()
-
-    audio_count = 53  # 6 pages
+    audio_count = 53
     pages = 6
     AudioFactory.create_batch(audio_count)
 
-    test_audio = AudioFactory.create()
-    with CaptureQueriesContext(connections["default"]) as capture:
-        test_audio.get_or_create_waveform()
-    test_audio.delete()
-
-    queries_per_iteration = len(capture.captured_queries)
-
-    # 1 per page + the final empty page's query
-    pagination_queries = pages + 1
-
     # initializes the count for tqdm
     count_queries = 1
 
-    # queries inside get_or_create_waveform
-    interation_queries = queries_per_iteration * audio_count
-
-    expected_queries = interation_queries + pagination_queries + count_queries
+    # 1 to fetch each page and 1 to save its waveforms
+    page_queries = pages * 2
 
-    with django_assert_num_queries(expected_queries):
-        call_generatewaveforms()
+    with django_assert_num_queries(count_queries + page_queries):
+        call_generatewaveforms(batch_size=10)
 
     assert_all_audio_have_waveforms()
 
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
-    ("exception_class", "exception_args", "exception_kwargs"),
+    ("exception_class", "exception_args", "exception_kwargs", "message"),
     (
         (
             subprocess.CalledProcessError,
             (1, "audiowaveform"),
             {"stderr": b"This is an error string"},
+            "This is an error string",
         ),
         (
             psycopg2.errors.NotNullViolation,
             tuple(),
             dict(),
+            "",
         ),
     ),
 )
-@mock.patch("catalog.api.models.audio.generate_peaks")
 def test_logs_and_continues_if_waveform_generation_fails(
-    mock_generate_peaks, exception_class, exception_args, exception_kwargs
+    mock_peaks_from_file, exception_class, exception_args, exception_kwargs, message
 ):
     audio_count = 23
-    return_values = [
-        exception_class(*exception_args, **exception_kwargs)
-        if i == 9
-        else WaveformProvider.generate_waveform()
-        for i in range(audio_count)
-    ]
-    mock_generate_peaks.side_effect = return_values
     AudioFactory.create_batch(audio_count)
+    failing_file = f"audio-{Audio.objects.order_by('id')[9].identifier}.mp3"
 
-    out = StringIO()
-    err = StringIO()
-    call_command("generatewaveforms", no_rate_limit=True, stdout=out, stderr=err)
+    def peaks_from_file(file_name, duration):
+        if file_name == failing_file:
+            raise exception_class(*exception_args, **exception_kwargs)
+        return WaveformProvider.generate_waveform()
 
-    failed_audio = Audio.objects.exclude(
-        identifier__in=AudioAddOn.objects.filter(
-            waveform_peaks__isnull=False
-        ).values_list("audio_identifier", flat=True)
-    )
+    mock_peaks_from_file.side_effect = peaks_from_file
 
+    out, err = call_generatewaveforms(batch_size=10)
+
+    failed_audio = get_failed_audio()
     assert failed_audio.count() == 1
-    assert f"Unable to process {failed_audio.first().identifier}" in err.getvalue()
+    assert f"Unable to process {failed_audio.first().identifier}: {message}" in err
+    assert str(failed_audio.first().identifier) in out
 
     assert (
         AudioAddOn.objects.filter(waveform_peaks__isnull=False).count()
@@ -151,32 +177,95 @@ def test_logs_and_continues_if_waveform_generation_fails(
 
 
 @pytest.mark.django_db
-@mock.patch("catalog.api.models.audio.generate_peaks")
-def test_keyboard_interrupt_should_halt_processing(mock_generate_peaks):
+def test_logs_and_continues_if_download_fails(
+    mock_download_audio, mock_peaks_from_file
+):
+    audios = AudioFactory.create_batch(5)
+    mock_download_audio.side_effect = lambda session, url, identifier: (
+        _raise(ValueError("Could not identify media extension"))
+        if identifier == audios[2].identifier
+        else f"audio-{identifier}.mp3"
+    )
+
+    out, err = call_generatewaveforms()
+
+    assert list(get_failed_audio()) == [audios[2]]
+    assert "Could not identify media extension" in err
+
+
+def _raise(exc):
+    raise exc
+
+
+@pytest.mark.django_db
+def test_resumes_after_last_processed_audio(mock_peaks_from_file):
     audio_count = 23
-    interrupt_at = 9
-    return_values = [
-        KeyboardInterrupt()
-        if i == interrupt_at
-        else WaveformProvider.generate_waveform()
-        for i in range(audio_count)
-    ]
-
-    mock_generate_peaks.side_effect = return_values
     AudioFactory.create_batch(audio_count)
 
-    out = StringIO()
-    err = StringIO()
-    call_command("generatewaveforms", no_rate_limit=True, stdout=out, stderr=err)
+    call_generatewaveforms(batch_size=10, max_records=10)
 
-    failed_audio = Audio.objects.exclude(
-        identifier__in=AudioAddOn.objects.filter(
-            waveform_peaks__isnull=False
-        ).values_list("audio_identifier", flat=True)
-    )
+    assert cache.get(PROGRESS_KEY) == Audio.objects.order_by("id")[9].id
+    assert AudioAddOn.objects.count() == 10
 
-    assert failed_audio.count() == audio_count - interrupt_at
+    out, _ = call_generatewaveforms(batch_size=10)
 
-    assert (
-        AudioAddOn.objects.filter(waveform_peaks__isnull=False).count() == interrupt_at
+    assert "Resuming after audio" in out
+    assert f"Generating waveforms for {audio_count - 10} records" in out
+    assert mock_peaks_from_file.call_count == audio_count
+    assert_all_audio_have_waveforms()
+
+
+@pytest.mark.django_db
+def test_restart_retries_failed_audio(mock_peaks_from_file):
+    audio_count = 5
+    AudioFactory.create_batch(audio_count)
+    mock_peaks_from_file.side_effect = ValueError("Broken audio")
+    call_generatewaveforms()
+
+    mock_peaks_from_file.side_effect = (
+        lambda file_name, duration: WaveformProvider.generate_waveform()
     )
+    out, _ = call_generatewaveforms()
+    assert "Generating waveforms for 0 records" in out
+
+    out, _ = call_generatewaveforms(restart=True)
+    assert f"Generating waveforms for {audio_count} records" in out
+    assert_all_audio_have_waveforms()
+
+
+@pytest.mark.django_db
+def test_keyboard_interrupt_should_halt_processing(mock_peaks_from_file):
+    audio_count = 23
+    AudioFactory.create_batch(audio_count)
+    processed_batches = 0
+
+    def save_batch(self, audios, results):
+        nonlocal processed_batches
+        if processed_batches == 1:
+            raise KeyboardInterrupt()
+        processed_batches += 1
+        return original_save_batch(self, audios, results)
+
+    original_save_batch = Command._save_batch
+    with mock.patch.object(Command, "_save_batch", save_batch):
+        out, _ = call_generatewaveforms(batch_size=10)
+
+    assert "Interrupted" in out
+    assert AudioAddOn.objects.count() == 10
+    assert get_failed_audio().count() == audio_count - 10
+
+
+def test_provider_rate_limiter_spaces_out_downloads():
+    limiter = ProviderRateLimiter(interval=60)
+
+    async def download(*providers):
+        for provider in providers:
+            await limiter.wait(provider)
+
+    with mock.patch("asyncio.sleep") as mock_sleep:
+        asyncio.run(download("jamendo", "freesound"))
+        mock_sleep.assert_not_called()
+
+        asyncio.run(download("jamendo"))
+        mock_sleep.assert_called_once()
+        assert 59 < mock_sleep.call_args.args[0] <= 60
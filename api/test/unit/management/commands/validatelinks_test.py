@@ -0,0 +1,19 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+
+def test_validatelinks_exits_when_queue_is_empty():
+    out = StringIO()
+    with mock.patch(
+        "catalog.management.commands.validatelinks.validate_queued_links",
+        side_effect=[100, 20, 0],
+    ) as validate_queued_links:
+        call_command(
+            "validatelinks", batch_size=100, timeout=1, exit_when_empty=True, stdout=out
+        )
+
+    validate_queued_links.assert_called_with(100, 1)
+    assert validate_queued_links.call_count == 3
+    assert "Processed 120 links" in out.getvalue()
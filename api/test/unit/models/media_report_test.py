@@ -1,3 +1,4 @@
+import json
 import uuid
 from test.factory.models.audio import AudioFactory
 from test.factory.models.image import ImageFactory
@@ -8,6 +9,8 @@ from django.core.exceptions import ObjectDoesNotExist
 
 import pytest
 from elasticsearch import TransportError
+from elasticsearch.helpers import BulkIndexError
+from elasticsearch.serializer import JSONSerializer
 
 from catalog.api.models import (
     Audio,
@@ -28,6 +31,7 @@ from catalog.api.models.media import (
     PENDING,
     AbstractDeletedMedia,
     AbstractMatureMedia,
+    perform_bulk_index_update,
 )
 
 
@@ -404,3 +408,155 @@ def test_mature_media_reraises_elasticsearch_400_errors(
         # The order does not matter
         any_order=True,
     )
+
+
+@pytest.fixture
+def bulk_es(settings):
+    settings.ES = MagicMock()
+    # The bulk helpers serialize the actions with the client's serializer.
+    settings.ES.transport.serializer = JSONSerializer()
+    settings.ES.bulk.side_effect = _bulk_response
+    return settings.ES
+
+
+def _bulk_response(*args, body, **kwargs):
+    """Mock the response to a ``_bulk`` request, with the status of each action."""
+
+    items = []
+    for line in body.splitlines():
+        action = json.loads(line)
+        if "doc" in action:
+            continue
+        ((op_type, meta),) = action.items()
+        items.append({op_type: meta | {"status": 200}})
+    return {"errors": False, "items": items}
+
+
+@pytest.mark.parametrize(
+    "media_type, report_class, mature_class, model_factory",
+    [
+        ("image", ImageReport, MatureImage, ImageFactory),
+        ("audio", AudioReport, MatureAudio, AudioFactory),
+    ],
+)
+def test_moderate_marks_media_mature_with_one_bulk_request(
+    bulk_es, media_type: MediaType, report_class, mature_class, model_factory
+):
+    media = model_factory.create_batch(2)
+    reports = [
+        report_class.objects.create(media_obj=item, reason=MATURE) for item in media
+    ]
+    # Pending reports for the same media and reason are closed with the others.
+    duplicate = report_class.objects.create(media_obj=media[0], reason=MATURE)
+    other = report_class.objects.create(media_obj=media[0], reason=DMCA)
+
+    count = report_class.moderate(
+        report_class.objects.filter(pk__in=[report.pk for report in reports]),
+        MATURE_FILTERED,
+    )
+
+    assert count == 2
+    bulk_es.update.assert_not_called()
+    bulk_es.bulk.assert_called_once()
+    _, kwargs = bulk_es.bulk.call_args
+    assert kwargs["refresh"] == "wait_for"
+    actions = [json.loads(line) for line in kwargs["body"].splitlines()]
+    assert {
+        (action["update"]["_index"], action["update"]["_id"]) for action in actions[::2]
+    } == {
+        (index, item.id)
+        for index in (media_type, f"{media_type}-filtered")
+        for item in media
+    }
+    assert all(action == {"doc": {"mature": True}} for action in actions[1::2])
+
+    assert mature_class.objects.filter(media_obj__in=media).count() == 2
+    for report in [*reports, duplicate]:
+        report.refresh_from_db()
+        assert report.status == MATURE_FILTERED
+    other.refresh_from_db()
+    assert other.status == PENDING
+
+
+@pytest.mark.parametrize(
+    "media_type, media_class, report_class, deleted_class, model_factory",
+    [
+        ("image", Image, ImageReport, DeletedImage, ImageFactory),
+        ("audio", Audio, AudioReport, DeletedAudio, AudioFactory),
+    ],
+)
+def test_moderate_deindexes_media_with_one_bulk_request(
+    bulk_es,
+    media_type: MediaType,
+    media_class,
+    report_class,
+    deleted_class,
+    model_factory,
+):
+    media = model_factory.create_batch(2)
+    identifiers = [item.identifier for item in media]
+    for item in media:
+        report_class.objects.create(media_obj=item, reason=DMCA)
+
+    count = report_class.moderate(report_class.objects.all(), DEINDEXED, refresh=False)
+
+    assert count == 2
+    bulk_es.delete.assert_not_called()
+    _, kwargs = bulk_es.bulk.call_args
+    assert kwargs["refresh"] is False
+    assert len(kwargs["body"].splitlines()) == 4
+    assert deleted_class.objects.filter(media_obj_id__in=identifiers).count() == 2
+    assert not media_class.objects.filter(identifier__in=identifiers).exists()
+    assert set(report_class.objects.values_list("status", flat=True)) == {DEINDEXED}
+
+
+def test_bulk_index_update_ignores_elasticsearch_404_errors(bulk_es):
+    bulk_es.bulk.side_effect = None
+    bulk_es.bulk.return_value = {
+        "errors": True,
+        "items": [
+            {"delete": {"_index": "image", "_id": "1", "status": 200}},
+            {"delete": {"_index": "image-filtered", "_id": "1", "status": 404}},
+        ],
+    }
+    actions = [
+        {"_op_type": "delete", "_index": index, "_id": 1}
+        for index in ("image", "image-filtered")
+    ]
+
+    perform_bulk_index_update(actions)
+
+
+def test_bulk_index_update_raises_elasticsearch_400_errors(bulk_es):
+    bulk_es.bulk.side_effect = None
+    bulk_es.bulk.return_value = {
+        "errors": True,
+        "items": [{"update": {"_index": "image", "_id": "1", "status": 400}}],
+    }
+    actions = [
+        {"_op_type": "update", "_index": "image", "_id": 1, "doc": {"mature": True}}
+    ]
+
+    with pytest.raises(BulkIndexError):
+        perform_bulk_index_update(actions)
+
+
+def test_admin_action_moderates_selected_reports(bulk_es, admin_client):
+    reports = [
+        ImageReport.objects.create(media_obj=image, reason=MATURE)
+        for image in ImageFactory.create_batch(3)
+    ]
+
+    res = admin_client.post(
+        "/admin/api/imagereport/",
+        {
+            "action": "mark_mature_filtered",
+            "_selected_action": [report.pk for report in reports[:2]],
+        },
+    )
+
+    assert res.status_code == 302
+    assert list(
+        ImageReport.objects.order_by("pk").values_list("status", flat=True)
+    ) == [MATURE_FILTERED, MATURE_FILTERED, PENDING]
+    bulk_es.bulk.assert_called_once()
@@ -1,8 +1,12 @@
 import uuid
+from test.factory.models.audio import AudioFactory
+from test.factory.models.image import ImageFactory
 from test.factory.models.oauth2 import AccessTokenFactory
+from unittest import mock
 from unittest.mock import MagicMock
 
 from django.conf import settings
+from rest_framework import serializers
 from rest_framework.exceptions import NotAuthenticated, ValidationError
 from rest_framework.test import force_authenticate
 from rest_framework.views import APIView
@@ -10,6 +14,7 @@ from rest_framework.views import APIView
 import pytest
 
 from catalog.api.serializers.audio_serializers import AudioSerializer
+from catalog.api.serializers.base import CompiledSerializerMixin
 from catalog.api.serializers.image_serializers import ImageSerializer
 from catalog.api.serializers.media_serializers import MediaSearchRequestSerializer
 
@@ -139,3 +144,72 @@ def test_search_request_serializer_include_sensitive_results_validation_well_for
 def test_search_request_serializer_include_sensitive_results_malformed_request(data):
     serializer = MediaSearchRequestSerializer(data=data)
     assert not serializer.is_valid()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("data", "authenticated"),
+    (
+        ({"cursor": ""}, True),
+        pytest.param(
+            {"cursor": ""}, False, marks=pytest.mark.raises(exception=NotAuthenticated)
+        ),
+        pytest.param(
+            {"cursor": "", "page": 2},
+            True,
+            marks=pytest.mark.raises(exception=ValidationError),
+        ),
+        pytest.param(
+            {"cursor": "not-a-cursor"},
+            True,
+            marks=pytest.mark.raises(exception=ValidationError),
+        ),
+    ),
+)
+def test_cursor_validation(data, authenticated, anon_request, authed_request):
+    request = authed_request if authenticated else anon_request
+    serializer = MediaSearchRequestSerializer(context={"request": request}, data=data)
+    assert serializer.is_valid(raise_exception=True)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("serializer_class", "media_factory", "media_kwargs"),
+    (
+        (ImageSerializer, ImageFactory, {"width": 640, "height": 480}),
+        (
+            AudioSerializer,
+            AudioFactory,
+            {
+                "genres": ["rock"],
+                "alt_files": [{"url": "https://example.com/a.ogg", "filesize": 1}],
+                "audio_set_foreign_identifier": "set",
+                "duration": 1000,
+            },
+        ),
+    ),
+)
+def test_compiled_serializer_matches_drf_serializer(
+    serializer_class, media_factory, media_kwargs, anon_request
+):
+    media = [
+        media_factory.create(
+            tags=[{"name": "cat", "accuracy": 0.9}, {"name": "dog"}],
+            creator="Creator",
+            creator_url="example.com/creator",
+            **media_kwargs,
+        ),
+        media_factory.create(tags=None, license_version="4.0", **media_kwargs),
+    ]
+    context = {"request": anon_request, "validated_data": {"peaks": True}}
+
+    compiled = serializer_class(media, many=True, context=context).data
+    with mock.patch.object(
+        CompiledSerializerMixin,
+        "to_representation",
+        serializers.Serializer.to_representation,
+    ):
+        reference = serializer_class(media, many=True, context=context).data
+
+    assert compiled == reference
+    assert compiled[0]["detail_url"].endswith(f"/{media[0].identifier}/")
@@ -4,8 +4,26 @@ from unittest import mock
 import aiohttp
 import pook
 import pytest
+from asgiref.sync import async_to_sync
 
-from catalog.api.utils.check_dead_links import HEADERS, check_dead_links
+from catalog.api.utils import check_dead_links as check_dead_links_module
+from catalog.api.utils import dead_link_mask
+from catalog.api.utils.check_dead_links import (
+    HEADERS,
+    acheck_dead_links,
+    check_dead_links,
+    validate_queued_links,
+)
+from catalog.api.utils.check_dead_links.link_validator import LinkValidator
+from catalog.api.utils.check_dead_links.validation_queue import QUEUE_KEY
+
+
+@pytest.fixture(autouse=True)
+def validator(monkeypatch):
+    validator = LinkValidator(HEADERS)
+    monkeypatch.setattr(check_dead_links_module, "validator", validator)
+    yield validator
+    validator.close()
 
 
 @mock.patch.object(aiohttp, "ClientSession", wraps=aiohttp.ClientSession)
@@ -30,7 +48,9 @@ def test_sends_user_agent(wrapped_client_session: mock.AsyncMock):
     for url in image_urls:
         assert url in requested_urls
 
-    wrapped_client_session.assert_called_once_with(headers=HEADERS, timeout=mock.ANY)
+    wrapped_client_session.assert_called_once_with(
+        headers=HEADERS, timeout=mock.ANY, connector=mock.ANY
+    )
 
 
 def test_handles_timeout():
@@ -83,3 +103,73 @@ def test_403_considered_dead(provider):
 
     # All the provider's results should be filtered out, leaving only the "other" provider
     assert all([r["provider"] == other_provider for r in results])
+
+
+@pytest.fixture
+def background_validation(settings, redis, monkeypatch):
+    settings.ENABLE_BACKGROUND_LINK_VALIDATION = True
+    # ``FakeRedis`` instances share their data, including the queue.
+    redis.flushall()
+    monkeypatch.setattr(dead_link_mask, "get_redis_connection", lambda *_: redis)
+
+
+@pook.on
+def test_background_validation_queues_unknown_links(background_validation, redis):
+    query_hash = "test_background_validation_queues_unknown_links"
+    results = [{"identifier": i, "provider": "best_provider_ever"} for i in range(4)]
+    image_urls = [f"https://example.com/{i}" for i in range(len(results))]
+    redis.set("valid:https://example.com/1", 404)
+
+    check_dead_links(query_hash, 20, results, image_urls)
+
+    # Only the link with a cached status is filtered, without any request.
+    assert [r["identifier"] for r in results] == [0, 2, 3]
+    assert redis.llen(QUEUE_KEY) == 3
+
+    # Links that are already queued are not queued again.
+    results = [{"identifier": i, "provider": "best_provider_ever"} for i in range(4)]
+    check_dead_links(query_hash, 20, results, image_urls)
+    assert redis.llen(QUEUE_KEY) == 3
+
+
+@pook.on
+def test_validate_queued_links_updates_mask(background_validation, redis):
+    query_hash = "test_validate_queued_links_updates_mask"
+    results = [{"identifier": i, "provider": "best_provider_ever"} for i in range(4)]
+    image_urls = [f"https://example.com/{i}" for i in range(len(results))]
+    check_dead_links(query_hash, 0, results, image_urls)
+
+    pook.head("https://example.com/0").reply(200)
+    pook.head("https://example.com/1").reply(404)
+    pook.head("https://example.com/2").reply(429)
+    pook.head("https://example.com/3").reply(301)
+
+    assert validate_queued_links(batch_size=10, timeout=1) == 4
+
+    assert dead_link_mask.get_query_mask(query_hash) == [1, 0, 1, 0]
+    assert redis.get("valid:https://example.com/1") == b"404"
+    assert redis.llen(QUEUE_KEY) == 0
+    # Validated links can be queued again once their cached status expires.
+    assert not redis.keys("link_validation:pending:*")
+
+
+def test_validate_queued_links_returns_when_queue_is_empty(background_validation):
+    assert validate_queued_links(batch_size=10, timeout=1) == 0
+
+
+@pook.on
+def test_async_check_dead_links_matches_sync(async_redis, redis, monkeypatch):
+    monkeypatch.setattr(dead_link_mask, "get_redis_connection", lambda *_: redis)
+    query_hash = "test_async_check_dead_links_matches_sync"
+    results = [{"identifier": i, "provider": "best_provider_ever"} for i in range(4)]
+    image_urls = [f"https://example.com/{i}" for i in range(len(results))]
+    redis.set("valid:https://example.com/1", 404)
+    pook.head("https://example.com/0").reply(200)
+    pook.head("https://example.com/2").reply(404)
+    pook.head("https://example.com/3").reply(200)
+
+    async_to_sync(acheck_dead_links)(query_hash, 0, results, image_urls)
+
+    assert [r["identifier"] for r in results] == [0, 3]
+    assert dead_link_mask.get_query_mask(query_hash) == [1, 0, 0, 1]
+    assert redis.get("valid:https://example.com/2") == b"404"
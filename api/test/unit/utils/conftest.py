@@ -2,12 +2,17 @@ import json
 from pathlib import Path
 
 import pytest
-from fakeredis import FakeRedis
+from fakeredis import FakeRedis, FakeServer, aioredis
+
+
+@pytest.fixture
+def redis_server() -> FakeServer:
+    return FakeServer()
 
 
 @pytest.fixture(autouse=True)
-def redis(monkeypatch) -> FakeRedis:
-    fake_redis = FakeRedis()
+def redis(monkeypatch, redis_server) -> FakeRedis:
+    fake_redis = FakeRedis(server=redis_server)
 
     def get_redis_connection(*args, **kwargs):
         return fake_redis
@@ -18,6 +23,18 @@ def redis(monkeypatch) -> FakeRedis:
     fake_redis.client().close()
 
 
+@pytest.fixture
+def async_redis(monkeypatch, redis_server):
+    """Patch the async Redis clients to share the data of the ``redis`` fixture."""
+
+    def get_redis_connection(*args, **kwargs):
+        return aioredis.FakeRedis(server=redis_server)
+
+    monkeypatch.setattr(
+        "catalog.api.utils.async_redis.get_redis_connection", get_redis_connection
+    )
+
+
 @pytest.fixture(scope="session")
 def mock_image_data():
     mock_image_path = Path(__file__).parent / ".." / ".." / "factory"
@@ -0,0 +1,140 @@
+import random
+from itertools import accumulate
+from unittest import mock
+
+import pytest
+
+from catalog.api.utils.dead_link_mask import (
+    get_query_hash,
+    get_query_mask,
+    get_query_slice,
+    save_query_mask,
+)
+
+
+QUERY_HASH = "fake_query_hash"
+
+
+@pytest.fixture(autouse=True)
+def mask_redis(monkeypatch, redis):
+    monkeypatch.setattr(
+        "catalog.api.utils.dead_link_mask.get_redis_connection", lambda *_: redis
+    )
+
+
+@pytest.mark.parametrize(
+    "mask",
+    (
+        [1],
+        [0],
+        [1, 0, 1, 1, 0, 0, 1, 0, 1],
+        # Trailing dead results must survive the round trip
+        [1] * 9 + [0] * 20,
+    ),
+)
+def test_save_query_mask_round_trips(mask):
+    save_query_mask(QUERY_HASH, mask)
+
+    assert get_query_mask(QUERY_HASH) == mask
+
+
+def test_save_query_mask_merges_from_start():
+    save_query_mask(QUERY_HASH, [1] * 20)
+    save_query_mask(QUERY_HASH, [0, 1, 0], start=5)
+
+    assert get_query_mask(QUERY_HASH) == [1] * 5 + [0, 1, 0]
+
+
+def test_save_query_mask_appends_beyond_existing_mask():
+    save_query_mask(QUERY_HASH, [1, 0])
+    save_query_mask(QUERY_HASH, [0, 1], start=10)
+
+    assert get_query_mask(QUERY_HASH) == [1, 0, 0, 1]
+
+
+def test_save_query_mask_sets_expiry(redis):
+    save_query_mask(QUERY_HASH, [1, 0])
+
+    assert redis.ttl(f"{QUERY_HASH}:dead_link_mask_bits") > 0
+    assert redis.ttl(f"{QUERY_HASH}:dead_link_mask_length") > 0
+
+
+def test_get_query_slice_without_mask():
+    assert get_query_slice(QUERY_HASH, 20, 2, 80) == (0, 80)
+
+
+def _expected_slice(mask, page_size, page, unmasked_end):
+    accumulated = list(accumulate(mask))
+    live_count = sum(mask)
+
+    skipped = page_size * (page - 1)
+    if skipped > live_count:
+        return len(mask), unmasked_end
+
+    start = 0
+    if page > 1:
+        if skipped + 1 in accumulated:
+            start = accumulated.index(skipped + 1)
+        else:
+            start = accumulated.index(skipped) + 1
+    if page_size * page > live_count:
+        end = unmasked_end
+    else:
+        end = accumulated.index(page_size * page) + 1
+    return start, end
+
+
+@pytest.mark.parametrize("page_size", (1, 2, 3, 5))
+@pytest.mark.parametrize("page", (1, 2, 3, 4))
+def test_get_query_slice_matches_accumulated_mask(page_size, page):
+    mask = [1, 0, 0, 1, 1, 0, 1, 0, 0, 0, 1, 1, 1, 0, 1, 1, 0, 1, 0, 0]
+    save_query_mask(QUERY_HASH, mask)
+
+    assert get_query_slice(QUERY_HASH, page_size, page, -1) == _expected_slice(
+        mask, page_size, page, -1
+    )
+
+
+@pytest.mark.parametrize("page_size", (7, 20, 50))
+def test_get_query_slice_matches_accumulated_mask_over_many_bytes(page_size):
+    rng = random.Random(page_size)
+    # Runs of dead results span whole bytes of the bitstring.
+    mask = [int(rng.random() < 0.7) for _ in range(500)] + [0] * 40 + [1] * 60
+    save_query_mask(QUERY_HASH, mask)
+
+    for page in range(1, 600 // page_size + 2):
+        assert get_query_slice(QUERY_HASH, page_size, page, -1) == _expected_slice(
+            mask, page_size, page, -1
+        )
+
+
+def test_scripts_are_registered_once_per_client(redis):
+    with mock.patch.object(
+        redis, "register_script", wraps=redis.register_script
+    ) as register_script:
+        for page in range(1, 4):
+            save_query_mask(QUERY_HASH, [1, 0, 1])
+            get_query_slice(QUERY_HASH, 1, page, -1)
+
+    assert register_script.call_count == 2
+
+
+def test_get_query_hash_ignores_key_order():
+    params = {"q": "cat", "license": "by,cc0", "extension": "jpg"}
+    reordered = dict(reversed(params.items()))
+
+    assert get_query_hash(params, "image") == get_query_hash(reordered, "image")
+
+
+@pytest.mark.parametrize(
+    "other_params, other_index",
+    (
+        ({"q": "dog", "license": "by,cc0"}, "image"),
+        ({"q": "cat", "license": "by"}, "image"),
+        ({"q": "cat", "license": "by,cc0"}, "audio"),
+    ),
+)
+def test_get_query_hash_differs_by_query(other_params, other_index):
+    params = {"q": "cat", "license": "by,cc0"}
+
+    assert get_query_hash(params, "image") != get_query_hash(other_params, other_index)
@@ -1,9 +1,17 @@
+import datetime
+import decimal
+import uuid
+
+from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
 from rest_framework.views import APIView
 
 import pytest
 
-from catalog.api.utils.drf_renderer import BrowsableAPIRendererWithoutForms
+from catalog.api.utils.drf_renderer import (
+    BrowsableAPIRendererWithoutForms,
+    ORJSONRenderer,
+)
 
 
 @pytest.fixture
@@ -62,3 +70,28 @@ def test_without_forms_renderer_get_rendered_html_form_empty(method, api_request
     data = {}
 
     assert cls.get_rendered_html_form(data, view, method, api_request) == ""
+
+
+@pytest.mark.parametrize("accepted_media_type", (None, "application/json; indent=4"))
+def test_orjson_renderer_renders_like_json_renderer(accepted_media_type):
+    data = {
+        "results": [
+            {
+                "id": uuid.uuid4(),
+                "created_on": datetime.datetime(
+                    2022, 1, 1, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc
+                ),
+                "title": "Café \u2028 ☕",
+                "accuracy": 0.5,
+                "filesize": decimal.Decimal("1.5"),
+                "tags": [],
+                "mature": False,
+            }
+        ],
+        "page": 1,
+        "page_count": None,
+    }
+
+    assert ORJSONRenderer().render(data, accepted_media_type) == JSONRenderer().render(
+        data, accepted_media_type
+    )
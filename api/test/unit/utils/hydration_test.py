@@ -0,0 +1,117 @@
+import uuid
+from test.factory.models.audio import AudioFactory
+from test.factory.models.image import ImageFactory
+from unittest.mock import MagicMock
+
+from django.core.cache import cache
+
+import pytest
+import pytest_django.asserts
+from elasticsearch_dsl.response import Hit
+
+from catalog.api.models import Audio, Image, MatureImage
+from catalog.api.serializers.audio_serializers import AudioSerializer
+from catalog.api.serializers.image_serializers import ImageSerializer
+from catalog.api.utils import hydration
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def hydration_cache(settings):
+    settings.ENABLE_HYDRATION_CACHE = True
+    yield
+    cache.delete_pattern(f"{hydration.CACHE_PREFIX}*")
+
+
+def _hit(identifier, index="image-abc", **kwargs) -> Hit:
+    return Hit(
+        {
+            "_index": index,
+            "_id": str(uuid.uuid4()),
+            "_source": {"identifier": str(identifier), **kwargs},
+        }
+    )
+
+
+def test_get_db_results_keeps_order_of_hits():
+    images = ImageFactory.create_batch(10)
+    hits = [_hit(image.identifier) for image in reversed(images)]
+
+    results = hydration.get_db_results(Image.objects.all(), hits)
+
+    assert [result.identifier for result in results] == [
+        image.identifier for image in reversed(images)
+    ]
+
+
+def test_get_db_results_drops_hits_without_rows():
+    images = ImageFactory.create_batch(2)
+    hits = [
+        _hit(images[0].identifier, fields_matched=["title"]),
+        _hit(uuid.uuid4(), fields_matched=["tags.name"]),
+        _hit(images[1].identifier, fields_matched=["description"]),
+    ]
+
+    results = hydration.get_db_results(Image.objects.all(), hits)
+
+    assert [(result.identifier, result.fields_matched) for result in results] == [
+        (images[0].identifier, ["title"]),
+        (images[1].identifier, ["description"]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "factory, serializer_class, queryset",
+    (
+        (
+            ImageFactory,
+            ImageSerializer,
+            lambda: Image.objects.select_related("mature_image").defer("view_count"),
+        ),
+        (
+            AudioFactory,
+            AudioSerializer,
+            lambda: Audio.objects.select_related("mature_audio", "audioset"),
+        ),
+    ),
+)
+def test_get_db_results_serves_cached_rows(
+    hydration_cache, request_factory, factory, serializer_class, queryset
+):
+    hits = [_hit(media.identifier) for media in factory.create_batch(5)]
+    expected = hydration.get_db_results(queryset(), hits)
+
+    request = request_factory.get("/")
+    with pytest_django.asserts.assertNumQueries(0):
+        results = hydration.get_db_results(queryset(), hits)
+        data = serializer_class(results, many=True, context={"request": request}).data
+
+    assert results == expected
+    assert [item["id"] for item in data] == [hit.identifier for hit in hits]
+
+
+def test_get_db_results_refetches_rows_for_refreshed_index(hydration_cache):
+    image = ImageFactory.create()
+    hydration.get_db_results(Image.objects.all(), [_hit(image.identifier)])
+
+    with pytest_django.asserts.assertNumQueries(1):
+        hydration.get_db_results(
+            Image.objects.all(), [_hit(image.identifier, index="image-def")]
+        )
+
+
+def test_invalidate_removes_cached_rows(hydration_cache, settings):
+    image = ImageFactory.create()
+    hydration.get_db_results(Image.objects.all(), [_hit(image.identifier)])
+    settings.ES = MagicMock()
+    settings.ES.indices.get_alias.return_value = {"image-abc": {}}
+
+    MatureImage.objects.create(media_obj=image)
+
+    with pytest_django.asserts.assertNumQueries(1):
+        (result,) = hydration.get_db_results(
+            Image.objects.select_related("mature_image"), [_hit(image.identifier)]
+        )
+    assert result.mature
@@ -0,0 +1,129 @@
+import asyncio
+from unittest import mock
+
+import aiohttp
+import pook
+import pytest
+from freezegun import freeze_time
+
+from catalog.api.utils.check_dead_links.link_validator import (
+    CircuitBreaker,
+    LinkValidator,
+)
+
+
+@pytest.fixture
+def validator():
+    validator = LinkValidator({"User-Agent": "test"}, breaker_threshold=2)
+    yield validator
+    validator.close()
+
+
+@pook.on
+def test_reuses_session_across_calls(validator):
+    pook.head("https://example.net/1").reply(200)
+    pook.head("https://example.net/2").reply(404)
+
+    with mock.patch.object(
+        aiohttp, "ClientSession", wraps=aiohttp.ClientSession
+    ) as wrapped_client_session:
+        assert validator.validate([("https://example.net/1", "flickr")]) == [
+            ("https://example.net/1", 200)
+        ]
+        assert validator.validate([("https://example.net/2", "flickr")]) == [
+            ("https://example.net/2", 404)
+        ]
+
+    wrapped_client_session.assert_called_once()
+
+
+def test_limits_connections_per_host(validator):
+    validator.validate([("https://example.net/1", "flickr")])
+
+    assert validator._session.connector.limit == validator.max_connections
+    assert (
+        validator._session.connector.limit_per_host
+        == validator.max_connections_per_host
+    )
+
+
+@pook.on
+def test_skips_host_after_consecutive_failures(validator):
+    pook.head("https://blocking.example.net/1").reply(429)
+    pook.head("https://blocking.example.net/2").reply(429)
+    pook.head("https://example.net/1").reply(200)
+
+    validator.validate([("https://blocking.example.net/1", "flickr")])
+    validator.validate([("https://blocking.example.net/2", "flickr")])
+
+    assert validator.validate(
+        [("https://blocking.example.net/3", "flickr"), ("https://example.net/1", "")]
+    ) == [("https://blocking.example.net/3", None), ("https://example.net/1", 200)]
+
+
+@pook.on
+def test_uses_provider_status_mapping_for_failures(validator):
+    # 403 means rate limiting for most providers, but not for Flickr.
+    pook.head("https://example.net/1").times(3).reply(403)
+
+    for _ in range(3):
+        assert validator.validate([("https://example.net/1", "flickr")]) == [
+            ("https://example.net/1", 403)
+        ]
+
+
+def test_gives_up_on_requests_after_deadline(validator):
+    validator.deadline = 0.1
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(1)
+
+    with mock.patch("aiohttp.client.ClientSession._request", side_effect=hang):
+        assert validator.validate([("https://example.net/1", "flickr")]) == [
+            ("https://example.net/1", None)
+        ]
+
+
+def test_circuit_breaker_closes_after_cooldown():
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+
+    with freeze_time("2023-01-01 00:00:00") as frozen_time:
+        breaker.record(failed=True)
+        assert not breaker.is_open
+        breaker.record(failed=True)
+        assert breaker.is_open
+
+        frozen_time.tick(61)
+        assert not breaker.is_open
+        # A single failure opens the circuit again.
+        breaker.record(failed=True)
+        assert breaker.is_open
+
+
+def test_circuit_breaker_resets_on_success():
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+
+    breaker.record(failed=True)
+    breaker.record(failed=False)
+    breaker.record(failed=True)
+
+    assert not breaker.is_open
+
+
+def test_request_timeouts_fit_in_the_deadline(settings):
+    validator = LinkValidator(
+        {"User-Agent": "test"},
+        timeout=settings.LINK_VALIDATION_TIMEOUT,
+        deadline=settings.LINK_VALIDATION_DEADLINE,
+    )
+
+    async def get_timeout():
+        session = validator._get_session()
+        await session.close()
+        return session.timeout
+
+    timeout = asyncio.run(get_timeout())
+
+    assert validator.deadline == 2
+    # A host that connects and then stalls is given up on within the deadline.
+    assert timeout.sock_connect + timeout.sock_read <= validator.deadline
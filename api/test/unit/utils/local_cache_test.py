@@ -0,0 +1,91 @@
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+import pytest
+from django_redis import get_redis_connection
+from freezegun import freeze_time
+
+from catalog.api.models import ContentProvider
+from catalog.api.utils import local_cache
+from catalog.api.utils.local_cache import LocalCache
+
+
+@pytest.fixture
+def enable_local_cache(settings):
+    settings.ENABLE_LOCAL_CACHE = True
+    local_cache._local.clear()
+    yield
+    local_cache._local.clear()
+    cache.delete_many(["key", ContentProvider.cache_key])
+
+
+def _wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_local_cache_evicts_least_recently_used_entries():
+    local = LocalCache(max_entries=2, ttl=10)
+    local.set("a", 1)
+    local.set("b", 2)
+    local.get("a")
+    local.set("c", 3)
+
+    assert (local.get("a"), local.get("b"), local.get("c")) == (1, None, 3)
+
+
+def test_local_cache_expires_entries():
+    local = LocalCache(max_entries=2, ttl=10)
+    with freeze_time() as frozen_time:
+        local.set("a", 1)
+        frozen_time.tick(11)
+        assert local.get("a") is None
+
+
+def test_get_or_set_reads_local_then_shared_cache(enable_local_cache):
+    computed = []
+
+    def compute():
+        computed.append(True)
+        return "value"
+
+    assert local_cache.get_or_set("key", compute, timeout=60) == "value"
+    assert local_cache.get_or_set("key", compute, timeout=60) == "value"
+    assert len(computed) == 1
+
+    # Another process only has the value in the shared cache.
+    local_cache._local.clear()
+    assert local_cache.get_or_set("key", compute, timeout=60) == "value"
+    assert len(computed) == 1
+
+
+def test_invalidations_are_published_to_all_processes(enable_local_cache):
+    local_cache.set("key", "value")
+    redis = get_redis_connection("default")
+    _wait_for(lambda: redis.pubsub_numsub(local_cache.CHANNEL)[0][1])
+
+    # Simulate the invalidation of the key by another process.
+    redis.publish(local_cache.CHANNEL, '["key"]')
+
+    _wait_for(lambda: local_cache.get("key") is None)
+
+
+@pytest.mark.django_db
+def test_saving_provider_invalidates_cache(
+    enable_local_cache, django_capture_on_commit_callbacks
+):
+    local_cache.set(ContentProvider.cache_key, [])
+    with django_capture_on_commit_callbacks(execute=True):
+        ContentProvider.objects.create(
+            provider_identifier="provider",
+            provider_name="Provider",
+            created_on=timezone.now(),
+            domain_name="https://example.com",
+            media_type="image",
+        )
+
+    assert local_cache.get(ContentProvider.cache_key) is None
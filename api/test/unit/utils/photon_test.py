@@ -1,3 +1,5 @@
+import os
+from unittest import mock
 from urllib.parse import urlencode
 
 from django.conf import settings
@@ -5,7 +7,9 @@ from django.conf import settings
 import pook
 import pytest
 import requests
+from freezegun import freeze_time
 
+from catalog.api.utils import photon, thumbnail_cache
 from catalog.api.utils.photon import HEADERS, UpstreamThumbnailException
 from catalog.api.utils.photon import get as photon_get
 
@@ -51,7 +55,7 @@ def test_get_successful_no_auth_key_default_args(mock_image_data):
 
     res = photon_get(TEST_IMAGE_URL)
 
-    assert res.content == MOCK_BODY.encode()
+    assert res.getvalue() == MOCK_BODY.encode()
     assert res.status_code == 200
     assert mock_get.matched
 
@@ -76,7 +80,7 @@ def test_get_successful_with_auth_key_default_args(mock_image_data, auth_key):
 
     res = photon_get(TEST_IMAGE_URL)
 
-    assert res.content == MOCK_BODY.encode()
+    assert res.getvalue() == MOCK_BODY.encode()
     assert res.status_code == 200
     assert mock_get.matched
 
@@ -99,7 +103,7 @@ def test_get_successful_no_auth_key_not_compressed(mock_image_data):
 
     res = photon_get(TEST_IMAGE_URL, is_compressed=False)
 
-    assert res.content == MOCK_BODY.encode()
+    assert res.getvalue() == MOCK_BODY.encode()
     assert res.status_code == 200
     assert mock_get.matched
 
@@ -122,7 +126,7 @@ def test_get_successful_no_auth_key_full_size(mock_image_data):
 
     res = photon_get(TEST_IMAGE_URL, is_full_size=True)
 
-    assert res.content == MOCK_BODY.encode()
+    assert res.getvalue() == MOCK_BODY.encode()
     assert res.status_code == 200
     assert mock_get.matched
 
@@ -140,7 +144,7 @@ def test_get_successful_no_auth_key_full_size_not_compressed(mock_image_data):
 
     res = photon_get(TEST_IMAGE_URL, is_full_size=True, is_compressed=False)
 
-    assert res.content == MOCK_BODY.encode()
+    assert res.getvalue() == MOCK_BODY.encode()
     assert res.status_code == 200
     assert mock_get.matched
 
@@ -164,7 +168,7 @@ def test_get_successful_no_auth_key_png_only(mock_image_data):
 
     res = photon_get(TEST_IMAGE_URL, accept_header="image/png")
 
-    assert res.content == MOCK_BODY.encode()
+    assert res.getvalue() == MOCK_BODY.encode()
     assert res.status_code == 200
     assert mock_get.matched
 
@@ -192,7 +196,7 @@ def test_get_successful_forward_query_params(mock_image_data):
 
     res = photon_get(url_with_params)
 
-    assert res.content == MOCK_BODY.encode()
+    assert res.getvalue() == MOCK_BODY.encode()
     assert res.status_code == 200
     assert mock_get.matched
 
@@ -203,7 +207,7 @@ def setup_requests_get_exception(monkeypatch):
         def raise_exc(*args, **kwargs):
             raise exc
 
-        monkeypatch.setattr("requests.get", raise_exc)
+        monkeypatch.setattr("requests.Session.get", raise_exc)
 
     yield do
 
@@ -281,7 +285,7 @@ def test_get_successful_https_image_url_sends_ssl_parameter(mock_image_data):
 
     res = photon_get(https_url)
 
-    assert res.content == MOCK_BODY.encode()
+    assert res.getvalue() == MOCK_BODY.encode()
     assert res.status_code == 200
     assert mock_get.matched
 
@@ -296,3 +300,157 @@ def test_get_unsuccessful_request_raises_exception():
         photon_get(TEST_IMAGE_URL)
 
     assert mock_get.matched
+
+
+@pytest.fixture
+def thumbnail_cache_dir(settings, tmp_path, monkeypatch):
+    settings.ENABLE_THUMBNAIL_CACHE = True
+    monkeypatch.setattr(
+        thumbnail_cache, "disk_cache", thumbnail_cache.DiskCache(tmp_path, 1024)
+    )
+    yield tmp_path
+
+
+@pook.on
+def test_get_serves_cached_thumbnail(thumbnail_cache_dir):
+    mock_get: pook.Mock = (
+        pook.get(PHOTON_URL_FOR_TEST_IMAGE)
+        .reply(200)
+        .header("Content-Type", "image/jpeg")
+        .body(MOCK_BODY)
+        .mock
+    )
+
+    first = photon_get(TEST_IMAGE_URL)
+    second = photon_get(TEST_IMAGE_URL)
+
+    assert mock_get.calls == 1
+    assert first.content == second.content == MOCK_BODY.encode()
+    assert second["Content-Type"] == "image/jpeg"
+    assert second["ETag"] == first["ETag"]
+    assert f"max-age={settings.THUMBNAIL_CACHE_FRESH_TTL}" in second["Cache-Control"]
+    assert second["Vary"] == "Accept"
+
+
+@pook.on
+def test_get_revalidates_stale_thumbnail(thumbnail_cache_dir):
+    pook.get(PHOTON_URL_FOR_TEST_IMAGE).reply(200).header("ETag", '"v1"').body(
+        MOCK_BODY
+    )
+    revalidation: pook.Mock = (
+        pook.get(PHOTON_URL_FOR_TEST_IMAGE)
+        .header("If-None-Match", '"v1"')
+        .reply(304)
+        .mock
+    )
+
+    with freeze_time() as frozen_time, mock.patch.object(
+        requests.Response, "close", autospec=True
+    ) as close_mock:
+        photon_get(TEST_IMAGE_URL)
+        frozen_time.tick(settings.THUMBNAIL_CACHE_FRESH_TTL + 1)
+        res = photon_get(TEST_IMAGE_URL)
+        # The revalidated thumbnail is fresh again.
+        photon_get(TEST_IMAGE_URL)
+
+    assert revalidation.calls == 1
+    assert res.status_code == 200
+    assert res.content == MOCK_BODY.encode()
+    assert res["ETag"] == '"v1"'
+    # The connections of both the 200 and the 304 responses are released.
+    closed = [call.args[0].status_code for call in close_mock.call_args_list]
+    assert closed == [200, 304]
+
+
+@pook.on
+def test_get_relays_other_successful_statuses(thumbnail_cache_dir):
+    mock_get: pook.Mock = (
+        pook.get(PHOTON_URL_FOR_TEST_IMAGE)
+        .times(2)
+        .reply(203)
+        .header("Content-Type", "image/jpeg")
+        .body(MOCK_BODY)
+        .mock
+    )
+
+    res = photon_get(TEST_IMAGE_URL)
+    photon_get(TEST_IMAGE_URL)
+
+    assert res.status_code == 203
+    assert res.content == MOCK_BODY.encode()
+    # Only 200 responses are cached.
+    assert mock_get.calls == 2
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    thumbnail = thumbnail_cache.CachedThumbnail(content=b"x" * 50, content_type="image")
+    size = len(thumbnail.dumps())
+    disk_cache = thumbnail_cache.DiskCache(tmp_path, size * 100)
+    keys = ["aa1", "bb2", "cc3", "dd4"]
+    for mtime, key in enumerate(keys):
+        disk_cache.set(key, thumbnail)
+        os.utime(disk_cache._path(key), (mtime, mtime))
+    # Reading an entry marks it as recently used.
+    disk_cache.get("aa1")
+
+    disk_cache.max_bytes = size * 3
+    disk_cache.evict()
+
+    assert [key for key in keys if disk_cache._path(key).exists()] == ["aa1", "dd4"]
+
+
+def test_get_falls_back_to_redis(thumbnail_cache_dir, settings, tmp_path):
+    settings.THUMBNAIL_CACHE_REDIS_TTL = 60
+    thumbnail = thumbnail_cache.CachedThumbnail(content=b"image", content_type="image")
+    thumbnail_cache.set("key", thumbnail)
+
+    # Another worker only shares Redis.
+    thumbnail_cache.disk_cache = thumbnail_cache.DiskCache(tmp_path / "other", 1024)
+
+    assert thumbnail_cache.get("key") == thumbnail
+
+
+@pook.on
+def test_get_streams_thumbnail_over_pooled_connection():
+    pook.get(PHOTON_URL_FOR_TEST_IMAGE).times(2).reply(200).body(MOCK_BODY)
+
+    first = photon_get(TEST_IMAGE_URL)
+    second = photon_get(TEST_IMAGE_URL)
+
+    assert first.streaming
+    assert first.getvalue() == second.getvalue() == MOCK_BODY.encode()
+    assert photon.get_session() is photon.get_session()
+
+
+@pytest.fixture
+def failure_cache(settings):
+    settings.ENABLE_THUMBNAIL_FAILURE_CACHE = True
+
+
+@pook.on
+def test_get_fails_fast_on_recently_failed_image(failure_cache, capture_exception):
+    mock_get: pook.Mock = pook.get(PHOTON_URL_FOR_TEST_IMAGE).times(2).reply(404).mock
+
+    for _ in range(2):
+        with pytest.raises(UpstreamThumbnailException):
+            photon_get(TEST_IMAGE_URL)
+
+    assert mock_get.calls == 1
+
+
+def test_get_fails_fast_on_host_timing_out_repeatedly(
+    failure_cache, capture_exception, monkeypatch, settings
+):
+    calls = []
+
+    def raise_timeout(*args, **kwargs):
+        calls.append(args)
+        raise requests.ReadTimeout()
+
+    monkeypatch.setattr("requests.Session.get", raise_timeout)
+    threshold = settings.THUMBNAIL_DOMAIN_TIMEOUT_THRESHOLD
+    for index in range(threshold + 1):
+        with pytest.raises(UpstreamThumbnailException, match=r"timed out|timeout"):
+            photon_get(f"{TEST_IMAGE_URL}?{index}")
+
+    assert len(calls) == threshold
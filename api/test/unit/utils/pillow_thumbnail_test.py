@@ -0,0 +1,118 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+
+import pook
+import pytest
+from PIL import Image
+
+from catalog.api.utils import pillow_thumbnail
+from catalog.api.utils.photon import UpstreamThumbnailException
+
+
+TEST_IMAGE_URL = "http://subdomain.example.com/path_part1/part2/image_dot_jpg.jpg"
+
+
+@pytest.fixture(autouse=True)
+def render_inline(settings):
+    settings.THUMBNAIL_RENDER_PROCESSES = 0
+
+
+@pytest.fixture
+def mock_image(monkeypatch, mock_image_data):
+    # pook cannot reply with binary bodies.
+    monkeypatch.setattr(
+        pillow_thumbnail, "_download", lambda image_url: mock_image_data["byes"]
+    )
+
+
+def test_get_resizes_image(mock_image):
+    res = pillow_thumbnail.get(TEST_IMAGE_URL)
+
+    img = Image.open(BytesIO(res.content))
+    assert res["Content-Type"] == "image/jpeg"
+    assert img.format == "JPEG"
+    assert img.width == int(settings.THUMBNAIL_WIDTH_PX)
+    assert "Accept" in res["Vary"]
+
+
+def test_get_keeps_full_size_image(mock_image, mock_image_data):
+    res = pillow_thumbnail.get(TEST_IMAGE_URL, is_full_size=True)
+
+    assert Image.open(BytesIO(res.content)).size == (2687, 2687)
+
+
+def test_get_negotiates_webp(mock_image):
+    res = pillow_thumbnail.get(TEST_IMAGE_URL, accept_header="image/webp,*/*;q=0.8")
+
+    assert res["Content-Type"] == "image/webp"
+    assert Image.open(BytesIO(res.content)).format == "WEBP"
+
+
+@pytest.mark.parametrize(
+    "accept_header, expected_format",
+    [
+        ("image/*", "JPEG"),
+        ("image/webp,image/*;q=0.8", "WEBP"),
+        ("text/html, image/webp ; q=0.9", "WEBP"),
+    ],
+)
+def test_get_output_format(accept_header, expected_format):
+    assert pillow_thumbnail.get_output_format(accept_header) == expected_format
+
+
+def test_get_rejects_images_with_too_many_pixels(mock_image, settings):
+    settings.THUMBNAIL_MAX_INPUT_PIXELS = 1000 * 1000
+
+    with pytest.raises(UpstreamThumbnailException, match=r"too large"):
+        pillow_thumbnail.get(TEST_IMAGE_URL)
+
+
+@pook.on
+def test_get_rejects_images_that_cannot_be_decoded():
+    pook.get(TEST_IMAGE_URL).reply(200).body("not an image")
+
+    with pytest.raises(UpstreamThumbnailException, match=r"Could not decode"):
+        pillow_thumbnail.get(TEST_IMAGE_URL)
+
+
+@pook.on
+def test_get_raises_on_upstream_error(capture_exception):
+    pook.get(TEST_IMAGE_URL).reply(404)
+
+    with pytest.raises(UpstreamThumbnailException):
+        pillow_thumbnail.get(TEST_IMAGE_URL)
+
+    capture_exception.assert_called_once()
+
+
+def test_render_in_pool(mock_image_data, settings):
+    settings.THUMBNAIL_RENDER_PROCESSES = 1
+    pool, _ = pillow_thumbnail._get_pool()
+
+    thumbnail = pool.submit(
+        pillow_thumbnail.render,
+        mock_image_data["byes"],
+        100,
+        80,
+        "JPEG",
+        settings.THUMBNAIL_MAX_INPUT_PIXELS,
+    ).result(timeout=30)
+
+    assert Image.open(BytesIO(thumbnail)).width == 100
+
+
+def test_get_recovers_from_broken_pool(mock_image, settings, capture_exception):
+    settings.THUMBNAIL_RENDER_PROCESSES = 1
+    pool, _ = pillow_thumbnail._get_pool()
+    # Crash the rendering process, as the OOM killer would.
+    pool.submit(os._exit, 1)
+
+    with pytest.raises(UpstreamThumbnailException):
+        pillow_thumbnail.get(TEST_IMAGE_URL)
+
+    capture_exception.assert_called_once()
+    res = pillow_thumbnail.get(TEST_IMAGE_URL)
+    assert res.status_code == 200
+    assert pillow_thumbnail._get_pool()[0] is not pool
@@ -0,0 +1,114 @@
+from unittest import mock
+from uuid import uuid4
+
+from django.core.cache import cache
+
+import pytest
+from elasticsearch.exceptions import NotFoundError
+from freezegun import freeze_time
+
+from catalog.api.serializers.media_serializers import MediaSearchRequestSerializer
+from catalog.api.utils import search_cache
+
+
+class SynchronousThread:
+    def __init__(self, target, **_):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+
+@pytest.fixture
+def key():
+    key = f"{search_cache.CACHE_PREFIX}test:{uuid4()}"
+    yield key
+    cache.delete(key)
+
+
+@pytest.fixture
+def sync_thread(monkeypatch):
+    monkeypatch.setattr(search_cache.threading, "Thread", SynchronousThread)
+
+
+def _serializer(**data):
+    serializer = MediaSearchRequestSerializer(data=data)
+    assert serializer.is_valid()
+    return serializer
+
+
+def test_get_or_compute_caches_computed_value(key):
+    compute = mock.MagicMock(return_value=(["a", "b"], 1, 2))
+
+    assert search_cache.get_or_compute(key, compute) == (["a", "b"], 1, 2)
+    assert search_cache.get_or_compute(key, compute) == (["a", "b"], 1, 2)
+    compute.assert_called_once()
+
+
+def test_get_or_compute_serves_stale_value_and_revalidates(key, settings, sync_thread):
+    settings.SEARCH_RESULT_CACHE_FRESH_TTL = 10
+    with freeze_time("2023-01-01 00:00:00"):
+        search_cache.get_or_compute(key, lambda: "old")
+
+    with freeze_time("2023-01-01 00:00:11"):
+        assert search_cache.get_or_compute(key, lambda: "new") == "old"
+        assert search_cache.get_or_compute(key, lambda: "newer") == "new"
+
+
+def test_get_or_compute_revalidates_once_at_a_time(key, settings):
+    settings.SEARCH_RESULT_CACHE_FRESH_TTL = 10
+    with freeze_time("2023-01-01 00:00:00"):
+        search_cache.get_or_compute(key, lambda: "old")
+
+    with (
+        freeze_time("2023-01-01 00:00:11"),
+        mock.patch.object(search_cache.threading, "Thread") as thread,
+    ):
+        search_cache.get_or_compute(key, lambda: "new")
+        search_cache.get_or_compute(key, lambda: "new")
+
+    thread.assert_called_once()
+    cache.delete(f"{key}:revalidating")
+
+
+def test_get_cache_key_normalizes_parameter_order(settings):
+    settings.ES = mock.MagicMock()
+    settings.ES.indices.get_alias.return_value = {"image-abc": {}}
+    index = f"image-{uuid4()}"
+
+    first = search_cache.get_cache_key(
+        _serializer(q="cat", license="by,cc0"), index, 20, 1, True
+    )
+    second = search_cache.get_cache_key(
+        _serializer(license="by,cc0", q="cat"), index, 20, 1, True
+    )
+    other_page = search_cache.get_cache_key(
+        _serializer(q="cat", license="by,cc0"), index, 20, 2, True
+    )
+
+    assert first == second
+    assert first != other_page
+    assert first.startswith(f"{search_cache.CACHE_PREFIX}image-abc:")
+
+
+def test_get_cache_key_changes_when_alias_is_promoted(settings):
+    settings.ES = mock.MagicMock()
+    index = f"image-{uuid4()}"
+    serializer = _serializer(q="cat")
+
+    settings.ES.indices.get_alias.return_value = {"image-old": {}}
+    before = search_cache.get_cache_key(serializer, index, 20, 1, True)
+
+    cache.delete(f"{search_cache.CACHE_PREFIX}generation:{index}")
+    settings.ES.indices.get_alias.return_value = {"image-new": {}}
+    after = search_cache.get_cache_key(serializer, index, 20, 1, True)
+
+    assert before != after
+
+
+def test_get_index_generation_falls_back_to_index_name(settings):
+    settings.ES = mock.MagicMock()
+    settings.ES.indices.get_alias.side_effect = NotFoundError(404, "not found")
+    index = f"search-qa-image-{uuid4()}"
+
+    assert search_cache.get_index_generation(index) == index
@@ -0,0 +1,39 @@
+import pytest
+
+from catalog.api.utils import search_cursor
+
+
+def test_loads_returns_dumped_position():
+    params_hash = search_cursor.get_params_hash({"q": "cat"})
+    cursor = search_cursor.dumps("pit-id", [1.5, 42], params_hash)
+
+    assert search_cursor.loads(cursor, params_hash) == {
+        "pit": "pit-id",
+        "search_after": [1.5, 42],
+        "params": params_hash,
+    }
+
+
+def test_loads_rejects_tampered_cursor():
+    params_hash = search_cursor.get_params_hash({"q": "cat"})
+    cursor = search_cursor.dumps("pit-id", [1.5, 42], params_hash)
+
+    with pytest.raises(search_cursor.InvalidCursor):
+        search_cursor.loads(f"x{cursor}", params_hash)
+
+
+def test_loads_rejects_cursor_of_other_search():
+    cursor = search_cursor.dumps(
+        "pit-id", [1.5, 42], search_cursor.get_params_hash({"q": "cat"})
+    )
+
+    with pytest.raises(search_cursor.InvalidCursor):
+        search_cursor.loads(cursor, search_cursor.get_params_hash({"q": "dog"}))
+
+
+def test_get_params_hash_ignores_cursor_and_page_size():
+    assert search_cursor.get_params_hash(
+        {"q": "cat", "license": "by"}
+    ) == search_cursor.get_params_hash(
+        {"license": "by", "q": "cat", "page_size": "50", "cursor": "abc"}
+    )
@@ -1,4 +1,6 @@
+import time
 from datetime import datetime
+from unittest import mock
 
 import pytest
 from freezegun import freeze_time
@@ -111,3 +113,75 @@ def test_count_provider_occurrences_increments_existing_tallies(redis):
         )
         == b"1"
     )
+
+
+def test_buffered_tallies_are_added_on_flush(redis, settings):
+    settings.ENABLE_BUFFERED_TALLIES = True
+    results = [{"provider": "flickr"} for _ in range(4)]
+
+    with freeze_time(datetime(2023, 1, 19)):
+        tallies.count_provider_occurrences(results, FAKE_MEDIA_TYPE)
+        tallies.count_provider_occurrences(results, FAKE_MEDIA_TYPE)
+
+    key = f"provider_occurrences:{FAKE_MEDIA_TYPE}:2023-01-16:flickr"
+    assert redis.get(key) is None
+
+    tallies._buffer.flush()
+
+    assert redis.get(key) == b"8"
+    assert (
+        redis.get(f"provider_appeared_in_searches:{FAKE_MEDIA_TYPE}:2023-01-16:flickr")
+        == b"2"
+    )
+
+
+def test_tally_buffer_flushes_in_background_once_full():
+    buffer = tallies.TallyBuffer(flush_interval=60, max_keys=2)
+
+    with mock.patch.object(tallies, "_increment") as increment:
+        buffer.add({"a": 1})
+        buffer.add({"a": 1, "b": 3})
+
+        deadline = time.monotonic() + 2
+        while not increment.called:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    increment.assert_called_once_with({"a": 2, "b": 3})
+
+
+def test_tally_buffer_keeps_tallies_if_flush_fails(redis):
+    buffer = tallies.TallyBuffer(flush_interval=60, max_keys=10)
+    buffer.add({"a": 1})
+
+    with mock.patch.object(tallies, "_increment", side_effect=ConnectionError):
+        buffer.flush()
+    buffer.flush()
+
+    assert redis.get("a") == b"1"
+
+
+def test_tally_buffer_drops_tallies_past_backlog(redis):
+    buffer = tallies.TallyBuffer(flush_interval=60, max_keys=10, max_backlog=2)
+    buffer.add({"a": 1, "b": 1, "c": 1})
+
+    with mock.patch.object(tallies, "_increment", side_effect=ConnectionError):
+        assert not buffer.flush()
+    assert buffer.flush()
+
+    assert redis.get("a") is None
+
+
+def test_tally_buffer_waits_before_retrying_failed_flush():
+    increment = mock.Mock(side_effect=ConnectionError)
+    buffer = tallies.TallyBuffer(flush_interval=60, max_keys=1, increment=increment)
+
+    buffer.add({"a": 1})
+    deadline = time.monotonic() + 2
+    while not increment.called:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    # The buffer is still full, but the flush is not retried until the interval.
+    time.sleep(0.2)
+
+    increment.assert_called_once()
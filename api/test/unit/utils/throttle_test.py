@@ -1,18 +1,25 @@
+import time
 from test.factory.models.oauth2 import AccessTokenFactory
+from unittest import mock
 
 from django.core.cache import cache
+from rest_framework.response import Response
 from rest_framework.test import force_authenticate
 from rest_framework.views import APIView
 
 import pytest
 from fakeredis import FakeRedis
+from freezegun import freeze_time
 
 from catalog.api.models.oauth import ThrottledApplication
 from catalog.api.utils.throttle import (
     AbstractAnonRateThrottle,
     AbstractOAuth2IdRateThrottle,
     BurstRateThrottle,
+    EnhancedOAuth2IdBurstRateThrottle,
+    SustainedRateThrottle,
     TenPerDay,
+    get_request_count,
 )
 
 
@@ -75,8 +82,12 @@ def test_anon_rate_throttle_ignores_exempted_ips(
 ):
     request = request_factory.get("/")
     redis.sadd("ip-whitelist", request.META["REMOTE_ADDR"])
-    throttle = throttle_class()
-    assert throttle.get_cache_key(view.initialize_request(request), view) is None
+    throttle = type("DummyThrottle", (throttle_class,), {"rate": "1/hour"})()
+
+    for _ in range(3):
+        assert throttle.allow_request(view.initialize_request(request), view)
+    assert throttle.headers() == {}
+    assert redis.keys("throttle_*") == []
 
 
 @pytest.mark.parametrize(
@@ -174,3 +185,129 @@ def test_rate_limit_headers_when_no_scope(request_factory):
         ("X-RateLimit-Limit-tenperday", "10/day"),
         ("X-RateLimit-Available-tenperday", "9"),
     ] == headers
+
+
+@pytest.mark.django_db
+def test_token_info_is_resolved_once_per_token(
+    authed_request, view, django_assert_num_queries
+):
+    throttles = [
+        throttle_class()
+        for throttle_class in AbstractAnonRateThrottle.__subclasses__()
+        + AbstractOAuth2IdRateThrottle.__subclasses__()
+    ]
+
+    # 1 query for the token and 1 for its application
+    with django_assert_num_queries(2):
+        request = view.initialize_request(authed_request)
+        for throttle in throttles:
+            throttle.get_cache_key(request, view)
+
+    # The token information is cached across requests.
+    with django_assert_num_queries(0):
+        request = view.initialize_request(authed_request)
+        for throttle in throttles:
+            throttle.get_cache_key(request, view)
+
+
+@pytest.mark.django_db
+def test_token_info_is_invalidated_when_application_changes(
+    access_token, authed_request, view, django_capture_on_commit_callbacks
+):
+    throttle = EnhancedOAuth2IdBurstRateThrottle()
+    assert throttle.get_cache_key(view.initialize_request(authed_request), view) is None
+
+    access_token.application.rate_limit_model = "enhanced"
+    with django_capture_on_commit_callbacks(execute=True):
+        access_token.application.save()
+
+    assert (
+        throttle.get_cache_key(view.initialize_request(authed_request), view)
+        is not None
+    )
+
+
+class MultiScopeView(APIView):
+    throttle_classes = [
+        type("Burst", (BurstRateThrottle,), {"rate": "2/minute"}),
+        type("Sustained", (SustainedRateThrottle,), {"rate": "4/day"}),
+    ]
+
+    def get(self, request):
+        return Response()
+
+
+@pytest.mark.django_db
+def test_throttle_scopes_are_evaluated_in_a_single_call(redis, request_factory):
+    view = MultiScopeView().as_view()
+    request = request_factory.get("/")
+    view(request)
+
+    with mock.patch.object(
+        redis, "execute_command", wraps=redis.execute_command
+    ) as execute_command:
+        response = view(request)
+
+    execute_command.assert_called_once()
+    assert response.status_code == 200
+    assert response["X-RateLimit-Available-anon_burst"] == "0"
+    assert response["X-RateLimit-Available-anon_sustained"] == "2"
+
+
+@pytest.mark.django_db
+def test_throttle_denies_requests_until_window_passes(redis, request_factory):
+    view = MultiScopeView().as_view()
+    request = request_factory.get("/")
+
+    with freeze_time("2022-01-01 00:00:00") as frozen_time:
+        assert [view(request).status_code for _ in range(2)] == [200, 200]
+        response = view(request)
+        assert response.status_code == 429
+        assert response["Retry-After"] == "60"
+
+        frozen_time.tick(61)
+        response = view(request)
+        assert response.status_code == 200
+        # The denied requests are not recorded in the scope that denied them.
+        assert response["X-RateLimit-Available-anon_burst"] == "1"
+        # Each scope records the requests it allows.
+        assert response["X-RateLimit-Available-anon_sustained"] == "0"
+
+
+class WeightedView(MultiScopeView):
+    def get_throttle_cost(self, request):
+        return int(request.query_params["cost"])
+
+
+@pytest.mark.django_db
+def test_throttle_counts_requests_by_cost(redis, request_factory):
+    view = WeightedView().as_view()
+
+    with freeze_time("2022-01-01 00:00:00") as frozen_time:
+        response = view(request_factory.get("/?cost=3"))
+        assert response.status_code == 200
+        # A request uses up to the whole quota of a scope.
+        assert response["X-RateLimit-Available-anon_burst"] == "0"
+        assert response["X-RateLimit-Available-anon_sustained"] == "1"
+
+        frozen_time.tick(61)
+        response = view(request_factory.get("/?cost=2"))
+        assert response.status_code == 429
+        assert response["Retry-After"] == str(24 * 60 * 60 - 61)
+
+        frozen_time.tick(61)
+        assert view(request_factory.get("/?cost=1")).status_code == 200
+        assert redis.zcard("throttle_anon_sustained_127.0.0.1") == 4
+
+
+def test_get_request_count_counts_requests_within_window(redis, settings):
+    key = "throttle_oauth2_client_credentials_burst_client"
+    now = time.time() * 1000
+    redis.zadd(key, {"old": now - 61 * 1000, "a": now - 1000, "b": now})
+
+    with mock.patch.dict(
+        AbstractOAuth2IdRateThrottle.THROTTLE_RATES,
+        {"oauth2_client_credentials_burst": "100/min"},
+    ):
+        assert get_request_count("oauth2_client_credentials_burst", "client") == 2
+    assert get_request_count("oauth2_client_credentials_sustained", "client") is None
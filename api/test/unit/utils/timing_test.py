@@ -0,0 +1,58 @@
+from unittest import mock
+
+import pytest
+
+from catalog.api.utils import timing
+
+
+@pytest.fixture
+def timings():
+    timings, token = timing.start()
+    yield timings
+    timing.stop(token)
+
+
+def test_span_is_noop_outside_of_timed_requests():
+    with timing.span("es"):
+        pass
+    timing.add("es_took", 0.01)
+    timing.count("es", backfills=1)
+
+
+def test_header_sums_repeated_stages(timings):
+    with mock.patch("time.perf_counter", side_effect=[0, 0.002, 0.5, 0.5035]):
+        with timing.span("es"):
+            pass
+        timing.count("es", backfills=1)
+        with timing.span("es"):
+            pass
+    timing.add("es_took", 0.003)
+    timing.count("link_validation", cached=18, fetched=2)
+    timing.add("link_validation", 0.0125)
+
+    assert timings.get_header() == (
+        'es;dur=5.5;desc="calls=2 backfills=1", '
+        "es_took;dur=3.0, "
+        'link_validation;dur=12.5;desc="cached=18 fetched=2"'
+    )
+
+
+def test_metrics_are_rendered_as_histograms(redis, timings):
+    timings.add("es", 0.004)
+    timings.count("link_validation", fetched=2)
+    timing.record("image-list", timings)
+    timing.record("image-list", timings)
+    timing._buffer.flush()
+
+    metrics = timing.render_metrics()
+
+    labels = 'view="image-list",stage="es"'
+    assert f'{timing.DURATION_METRIC}_bucket{{{labels},le="0.0025"}} 0' in metrics
+    assert f'{timing.DURATION_METRIC}_bucket{{{labels},le="0.005"}} 2' in metrics
+    assert f'{timing.DURATION_METRIC}_bucket{{{labels},le="+Inf"}} 2' in metrics
+    assert f"{timing.DURATION_METRIC}_sum{{{labels}}} 0.008" in metrics
+    assert f"{timing.DURATION_METRIC}_count{{{labels}}} 2" in metrics
+    assert (
+        f'{timing.EVENT_METRIC}{{view="image-list",stage="link_validation",'
+        f'event="fetched"}} 4'
+    ) in metrics
@@ -1,14 +1,29 @@
 import json
+import os
+import shutil
+import subprocess
+import threading
 from collections.abc import Callable
 from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
 
+from django.conf import settings
+
+import numpy as np
 import pytest
 from requests import Request, Response
+from requests.exceptions import ChunkedEncodingError
 from requests.structures import CaseInsensitiveDict
 
-from catalog.api.utils.waveform import UA_STRING, download_audio
+from catalog.api.utils.waveform import (
+    UA_STRING,
+    decode_audio,
+    download_audio,
+    peaks_from_samples,
+    process_waveform_output,
+    stream_peaks,
+)
 
 
 _MOCK_AUDIO_PATH = Path(__file__).parent / ".." / ".." / "factory"
@@ -39,7 +54,9 @@ def requests(monkeypatch) -> RequestsFixture:
 
     def requests_get(url, **kwargs):
         kwargs.pop("stream")
+        timeout = kwargs.pop("timeout", None)
         req = Request(method="GET", url=url, **kwargs)
+        req.timeout = timeout
         fixture.requests.append(req)
         response = fixture.response_factory(req)
         return response
@@ -55,3 +72,81 @@ def test_download_audio_sends_ua_header(requests):
     assert len(requests.requests) > 0
     for r in requests.requests:
         assert r.headers["User-Agent"] == UA_STRING
+
+
+def _audiowaveform_output(samples: np.ndarray, count: int) -> bytes:
+    """Build the output of ``audiowaveform`` for the same buckets as NumPy."""
+
+    starts = np.linspace(0, samples.size, count, endpoint=False).astype(int)
+    data = []
+    for start, end in zip(starts, [*starts[1:], samples.size]):
+        bucket = samples[start:end].tolist()
+        data += [min(bucket), max(bucket)]
+    return json.dumps({"data": data}).encode()
+
+
+@pytest.mark.parametrize("sample_count", [1000, 12345, 44100 * 3])
+def test_peaks_from_samples_matches_process_waveform_output(sample_count):
+    rng = np.random.default_rng(sample_count)
+    samples = rng.integers(-32768, 32767, sample_count, dtype=np.int16)
+
+    assert peaks_from_samples(samples) == process_waveform_output(
+        _audiowaveform_output(samples, 1000)
+    )
+
+
+def test_peaks_from_samples_handles_short_and_silent_audio():
+    assert peaks_from_samples(np.array([], dtype=np.int16)) == []
+    assert peaks_from_samples(np.array([-5, 10, 5], dtype=np.int16)) == [0, 1, 0.5]
+    assert peaks_from_samples(np.zeros(5000, dtype=np.int16)) == [0.0] * 1000
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="requires ffmpeg")
+def test_stream_peaks_decodes_audio(requests):
+    peaks = stream_peaks("http://example.org")
+
+    assert len(peaks) == 1000
+    assert max(peaks) == 1
+    assert requests.requests[0].headers["User-Agent"] == UA_STRING
+    assert requests.requests[0].timeout == (
+        settings.WAVEFORM_CONNECT_TIMEOUT,
+        settings.WAVEFORM_READ_TIMEOUT,
+    )
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="requires ffmpeg")
+def test_decode_audio_raises_on_invalid_audio():
+    with pytest.raises(subprocess.CalledProcessError):
+        decode_audio([b"not audio"])
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="requires ffmpeg")
+def test_decode_audio_raises_on_interrupted_download():
+    def chunks():
+        yield _MOCK_AUDIO_BYTES[: len(_MOCK_AUDIO_BYTES) // 2]
+        raise ChunkedEncodingError("Connection broken")
+
+    with pytest.raises(ChunkedEncodingError):
+        decode_audio(chunks())
+
+
+def test_decode_audio_does_not_block_on_verbose_errors(monkeypatch, tmp_path):
+    # Logs more errors than a pipe holds before writing any sample.
+    ffmpeg = tmp_path / "ffmpeg"
+    ffmpeg.write_text(
+        "#!/bin/sh\n"
+        "cat > /dev/null\n"
+        "head -c 200000 /dev/zero | tr '\\0' e >&2\n"
+        "printf '\\001\\000'\n"
+    )
+    ffmpeg.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path), prepend=os.pathsep)
+
+    result = []
+    decoder = threading.Thread(
+        target=lambda: result.append(decode_audio([b"not audio"])), daemon=True
+    )
+    decoder.start()
+    decoder.join(timeout=10)
+
+    assert result and result[0].tolist() == [1]
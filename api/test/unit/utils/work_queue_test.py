@@ -0,0 +1,41 @@
+import pytest
+
+from catalog.api.utils.work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue():
+    return WorkQueue("test_work_queue", max_length=3)
+
+
+def test_enqueue_skips_pending_keys(queue, redis):
+    assert queue.enqueue(redis, [("a", "1"), ("b", "2"), ("a", "3")]) == 2
+    assert queue.enqueue(redis, [("b", "4"), ("c", "5")]) == 1
+
+    assert queue.dequeue(redis, batch_size=10, timeout=1) == ["1", "2", "5"]
+
+    # Pending keys can be queued again once cleared.
+    queue.clear_pending(redis, ["a"])
+    assert queue.enqueue(redis, [("a", "6"), ("b", "7")]) == 1
+
+
+def test_enqueue_drops_oldest_items_past_max_length(queue, redis):
+    queue.enqueue(redis, [(key, key) for key in "abcde"])
+
+    assert queue.dequeue(redis, batch_size=10, timeout=1) == ["c", "d", "e"]
+
+
+def test_dequeue_takes_oldest_items_in_batches(queue, redis):
+    queue.enqueue(redis, [("a", "1"), ("b", "2"), ("c", "3")])
+
+    assert queue.dequeue(redis, batch_size=2, timeout=1) == ["1", "2"]
+    assert queue.dequeue(redis, batch_size=2, timeout=1) == ["3"]
+
+
+def test_has_failed(queue, redis):
+    assert not queue.has_failed(redis, "a")
+
+    queue.mark_failed(redis, "a")
+
+    assert queue.has_failed(redis, "a")
+    assert redis.ttl(f"{queue.failed_prefix}a") == queue.failed_ttl
@@ -0,0 +1,95 @@
+from test.factory.faker import WaveformProvider
+from test.factory.models.audio import AudioAddOnFactory, AudioFactory
+from unittest import mock
+
+import django_redis
+import pytest
+
+from catalog.api.models.audio import AudioAddOn
+from catalog.api.utils import waveform_queue
+
+
+@pytest.fixture
+def async_waveforms(settings):
+    settings.ENABLE_ASYNC_WAVEFORMS = True
+    redis = django_redis.get_redis_connection("default")
+    redis.delete(waveform_queue.QUEUE_KEY)
+    yield redis
+    redis.delete(waveform_queue.QUEUE_KEY)
+
+
+@pytest.mark.django_db
+def test_waveform_returns_existing_peaks(api_client, async_waveforms):
+    add_on = AudioAddOnFactory.create()
+
+    res = api_client.get(f"/v1/audio/{add_on.audio_identifier}/waveform/")
+
+    assert res.status_code == 200
+    assert res.data["points"] == add_on.waveform_peaks
+    assert async_waveforms.llen(waveform_queue.QUEUE_KEY) == 0
+
+
+@pytest.mark.django_db
+def test_waveform_returns_empty_peaks(api_client, async_waveforms):
+    add_on = AudioAddOnFactory.create(waveform_peaks=[])
+
+    res = api_client.get(f"/v1/audio/{add_on.audio_identifier}/waveform/")
+
+    assert res.status_code == 200
+    assert res.data["points"] == []
+    assert async_waveforms.llen(waveform_queue.QUEUE_KEY) == 0
+
+
+@pytest.mark.django_db
+@mock.patch("catalog.api.models.audio.generate_peaks")
+def test_waveform_queues_generation_once(
+    generate_peaks_mock, api_client, async_waveforms, settings
+):
+    audio = AudioFactory.create()
+
+    for _ in range(2):
+        res = api_client.get(f"/v1/audio/{audio.identifier}/waveform/")
+        assert res.status_code == 202
+        assert res["Retry-After"] == str(settings.WAVEFORM_RETRY_AFTER)
+
+    generate_peaks_mock.assert_not_called()
+    assert async_waveforms.lrange(waveform_queue.QUEUE_KEY, 0, -1) == [
+        str(audio.identifier).encode()
+    ]
+
+
+@pytest.mark.django_db
+@mock.patch("catalog.api.models.audio.generate_peaks")
+def test_queued_waveform_is_generated_by_worker(
+    generate_peaks_mock, api_client, async_waveforms
+):
+    peaks = WaveformProvider.generate_waveform()
+    generate_peaks_mock.return_value = peaks
+    audio = AudioFactory.create()
+    api_client.get(f"/v1/audio/{audio.identifier}/waveform/")
+
+    assert waveform_queue.generate_queued_waveform(async_waveforms, timeout=1)
+
+    assert AudioAddOn.objects.get(audio_identifier=audio.identifier).waveform_peaks
+    res = api_client.get(f"/v1/audio/{audio.identifier}/waveform/")
+    assert res.status_code == 200
+    assert res.data["points"] == peaks
+    # The audio can be queued again, for example if its waveform is deleted.
+    assert waveform_queue.enqueue(async_waveforms, str(audio.identifier))
+
+
+@pytest.mark.django_db
+@mock.patch("catalog.api.models.audio.generate_peaks")
+def test_failed_waveform_is_not_queued_again(
+    generate_peaks_mock, api_client, async_waveforms
+):
+    generate_peaks_mock.side_effect = ValueError("Could not identify media extension")
+    audio = AudioFactory.create()
+    api_client.get(f"/v1/audio/{audio.identifier}/waveform/")
+
+    assert waveform_queue.generate_queued_waveform(async_waveforms, timeout=1)
+
+    res = api_client.get(f"/v1/audio/{audio.identifier}/waveform/")
+    assert res.status_code == 500
+    assert async_waveforms.llen(waveform_queue.QUEUE_KEY) == 0
+    async_waveforms.delete(f"{waveform_queue.FAILED_PREFIX}{audio.identifier}")
@@ -1,9 +1,17 @@
+import gzip
+import json
 from test.factory.models.audio import AudioFactory
 from test.factory.models.image import ImageFactory
-from unittest.mock import MagicMock, patch
+from test.factory.models.oauth2 import AccessTokenFactory
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from rest_framework.exceptions import Throttled
 
 import pytest
 import pytest_django.asserts
+from asgiref.sync import async_to_sync
+
+from catalog.api.views.image_views import AsyncImageViewSet
 
 
 @pytest.mark.django_db
@@ -54,3 +62,233 @@ def test_retrieve_query_count(api_client, media_type, media_factory):
         res = api_client.get(f"/v1/{media_type}/{media.identifier}/")
 
     assert res.status_code == 200
+
+
+@pytest.mark.django_db
+def test_list_with_cursor(api_client, django_user_model):
+    api_client.force_authenticate(user=django_user_model.objects.create(username="u"))
+    controller_ret = (
+        [MagicMock(identifier=str(ImageFactory.create().identifier))],  # results
+        1,  # num_results
+        "next-cursor",
+    )
+    with patch(
+        "catalog.api.views.media_views.search_controller",
+        search_with_cursor=MagicMock(return_value=controller_ret),
+    ), patch(
+        "catalog.api.serializers.media_serializers.search_controller",
+        get_sources=MagicMock(return_value={}),
+    ):
+        res = api_client.get("/v1/images/", {"cursor": ""})
+
+    assert res.status_code == 200
+    data = res.json()
+    assert data["next_cursor"] == "next-cursor"
+    assert "page" not in data
+    assert len(data["results"]) == 1
+
+
+@pytest.fixture
+def access_token():
+    # API keys authenticate an application, not a user.
+    return AccessTokenFactory.create(
+        application__authorization_grant_type="client-credentials"
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("accept_encoding", ("", "gzip"))
+def test_export_streams_ndjson(api_client, access_token, accept_encoding):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token.token}")
+    images = ImageFactory.create_batch(3)
+    batches = [
+        [MagicMock(identifier=str(image.identifier)) for image in images[:2]],
+        [MagicMock(identifier=str(images[2].identifier))],
+    ]
+    with patch(
+        "catalog.api.views.media_views.search_controller",
+        export=MagicMock(return_value=iter(batches)),
+    ):
+        res = api_client.get(
+            "/v1/images/export/", {"q": "cat"}, HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+
+    assert res.status_code == 200
+    assert res["Content-Type"] == "application/x-ndjson"
+    content = b"".join(res.streaming_content)
+    if accept_encoding:
+        assert res["Content-Encoding"] == "gzip"
+        content = gzip.decompress(content)
+    lines = content.decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [
+        str(image.identifier) for image in images
+    ]
+
+
+@pytest.mark.django_db
+def test_export_is_streamed_under_asgi(async_client, async_urls, access_token):
+    images = ImageFactory.create_batch(2)
+    batches = [[MagicMock(identifier=str(image.identifier))] for image in images]
+
+    async def get_chunks():
+        res = await async_client.get(
+            "/v1/images/export/",
+            {"q": "cat"},
+            headers={"Authorization": f"Bearer {access_token.token}"},
+        )
+        # Django sends async content as it is produced, but reads sync content
+        # into memory first.
+        assert res.is_async
+        return [chunk async for chunk in res.streaming_content]
+
+    with patch(
+        "catalog.api.views.media_views.search_controller",
+        export=MagicMock(return_value=iter(batches)),
+    ):
+        chunks = async_to_sync(get_chunks)()
+
+    # Each batch is a chunk of its own.
+    assert [json.loads(chunk)["id"] for chunk in chunks] == [
+        str(image.identifier) for image in images
+    ]
+
+
+@pytest.mark.django_db
+def test_export_requires_authentication(api_client):
+    res = api_client.get("/v1/images/export/")
+
+    assert res.status_code == 401
+
+
+@pytest.mark.django_db
+def test_related_passes_document_id_to_controller(api_client):
+    image = ImageFactory.create()
+    with patch(
+        "catalog.api.views.media_views.search_controller",
+        related_media=MagicMock(return_value=([], 0)),
+    ) as mock_controller:
+        res = api_client.get(f"/v1/images/{image.identifier}/related/")
+
+    assert res.status_code == 200
+    _, kwargs = mock_controller.related_media.call_args
+    assert kwargs["document_id"] == image.id
+
+
+@pytest.mark.django_db
+def test_related_unknown_identifier(api_client):
+    with patch("catalog.api.views.media_views.search_controller") as mock_controller:
+        res = api_client.get("/v1/images/4bbfe191-1cca-4b9e-aff0-1d3044ef3f2d/related/")
+
+    assert res.json()["detail"] == "Could not find items."
+    mock_controller.related_media.assert_not_called()
+
+
+@pytest.fixture
+def async_urls(settings):
+    settings.ROOT_URLCONF = "catalog.urls.asgi"
+
+
+def _async_get(async_client, path, data=None):
+    async def get():
+        return await async_client.get(path, data)
+
+    return async_to_sync(get)()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "media_type, media_factory",
+    [
+        ("images", ImageFactory),
+        ("audio", AudioFactory),
+    ],
+)
+def test_async_list(async_client, async_urls, media_type, media_factory):
+    media = media_factory.create()
+    controller_ret = ([MagicMock(identifier=str(media.identifier))], 1, 1)
+    with patch(
+        "catalog.api.views.media_views.search_controller",
+        asearch=AsyncMock(return_value=controller_ret),
+    ) as mock_controller, patch(
+        "catalog.api.serializers.media_serializers.search_controller",
+        get_sources=MagicMock(return_value={}),
+    ):
+        res = _async_get(async_client, f"/v1/{media_type}/", {"q": "cat"})
+
+    assert res.status_code == 200
+    assert res.json()["results"][0]["id"] == str(media.identifier)
+    mock_controller.search.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_async_related_passes_document_id_to_controller(async_client, async_urls):
+    image = ImageFactory.create()
+    with patch(
+        "catalog.api.views.media_views.search_controller",
+        arelated_media=AsyncMock(return_value=([], 0)),
+    ) as mock_controller:
+        res = _async_get(async_client, f"/v1/images/{image.identifier}/related/")
+
+    assert res.status_code == 200
+    _, kwargs = mock_controller.arelated_media.call_args
+    assert kwargs["document_id"] == image.id
+
+
+@pytest.mark.django_db
+def test_async_views_are_throttled(async_client, async_urls):
+    with patch(
+        "catalog.api.views.media_views.search_controller",
+        asearch=AsyncMock(return_value=([], 0, 0)),
+    ) as mock_controller, patch.object(
+        AsyncImageViewSet, "check_throttles", side_effect=Throttled(wait=10)
+    ):
+        res = _async_get(async_client, "/v1/images/")
+
+    assert res.status_code == 429
+    assert res["Retry-After"] == "10"
+    mock_controller.asearch.assert_not_called()
+
+
+@pytest.fixture
+def search_timing(settings):
+    settings.MIDDLEWARE = [
+        *settings.MIDDLEWARE,
+        "catalog.api.middleware.server_timing_middleware.server_timing_middleware",
+    ]
+    with patch("catalog.api.utils.timing.record") as mock_record:
+        yield mock_record
+
+
+@pytest.mark.django_db
+def test_list_reports_server_timing(api_client, search_timing):
+    with patch(
+        "catalog.api.views.media_views.search_controller",
+        search=MagicMock(return_value=([], 1, 0)),
+    ):
+        res = api_client.get("/v1/images/", {"q": "cat"})
+
+    stages = [metric.split(";")[0] for metric in res["Server-Timing"].split(", ")]
+    assert stages == ["validation", "hydration", "serialization", "total"]
+    view, timings = search_timing.call_args.args
+    assert view == "image-list"
+    assert set(timings.durations) == set(stages)
+
+
+@pytest.mark.django_db
+def test_async_list_reports_server_timing(async_client, async_urls, search_timing):
+    with patch(
+        "catalog.api.views.media_views.search_controller",
+        asearch=AsyncMock(return_value=([], 1, 0)),
+    ):
+        res = _async_get(async_client, "/v1/images/", {"q": "cat"})
+
+    assert res["Server-Timing"].startswith("validation;dur=")
+    search_timing.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_other_requests_are_not_timed(api_client, search_timing):
+    res = api_client.get("/healthcheck/")
+
+    assert "Server-Timing" not in res
+    search_timing.assert_not_called()
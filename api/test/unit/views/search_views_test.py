@@ -0,0 +1,104 @@
+from test.factory.models.audio import AudioFactory
+from test.factory.models.image import ImageFactory
+from unittest.mock import MagicMock, patch
+
+import django_redis
+import pytest
+
+from catalog.api.serializers.search_serializers import MAX_BATCH_SEARCHES
+from catalog.api.utils.throttle import BurstRateThrottle
+from catalog.api.views.search_views import BatchSearch
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_batch_search_returns_results_in_order(api_client):
+    image = ImageFactory.create()
+    audio = AudioFactory.create()
+    controller_ret = [
+        ([MagicMock(identifier=str(audio.identifier))], 1, 1),
+        ([MagicMock(identifier=str(image.identifier))], 1, 1),
+    ]
+    with patch(
+        "catalog.api.views.search_views.search_controller.search_many",
+        return_value=controller_ret,
+    ) as mock_search_many, patch(
+        "catalog.api.serializers.media_serializers.search_controller",
+        get_sources=MagicMock(return_value={}),
+    ):
+        res = api_client.post(
+            "/v1/search/batch/",
+            {
+                "searches": [
+                    {"media_type": "audio", "params": {"q": "birds"}},
+                    {"media_type": "image", "params": {"q": "cats", "page_size": 5}},
+                ]
+            },
+            format="json",
+        )
+
+    assert res.status_code == 200
+    audio_page, image_page = res.json()["results"]
+    assert [item["id"] for item in audio_page["results"]] == [str(audio.identifier)]
+    assert audio_page["page_size"] == 20
+    assert [item["id"] for item in image_page["results"]] == [str(image.identifier)]
+    assert image_page["page_size"] == 5
+
+    mock_search_many.assert_called_once()
+    specs = mock_search_many.call_args.args[0]
+    assert [spec.index for spec in specs] == ["audio", "image"]
+
+
+@pytest.mark.parametrize(
+    "searches",
+    (
+        pytest.param([], id="empty"),
+        pytest.param([{"media_type": "video"}], id="unknown_media_type"),
+        pytest.param(
+            [{"media_type": "image"}] * (MAX_BATCH_SEARCHES + 1), id="too_many"
+        ),
+        pytest.param(
+            [{"media_type": "image", "params": {"page_size": "many"}}],
+            id="invalid_params",
+        ),
+    ),
+)
+def test_batch_search_validates_searches(api_client, searches):
+    with patch("catalog.api.views.search_views.search_controller") as mock_controller:
+        res = api_client.post(
+            "/v1/search/batch/", {"searches": searches}, format="json"
+        )
+
+    assert res.status_code == 400
+    mock_controller.search_many.assert_not_called()
+
+
+def test_batch_search_counts_each_search_against_rate_limits(api_client):
+    ip = "10.0.0.8"
+    key = f"throttle_anon_burst_{ip}"
+    redis = django_redis.get_redis_connection("default")
+    redis.delete(key)
+    throttle_class = type("Burst", (BurstRateThrottle,), {"rate": "5/minute"})
+
+    def post_batch(size):
+        return api_client.post(
+            "/v1/search/batch/",
+            {"searches": [{"media_type": "image", "params": {"q": "cats"}}] * size},
+            format="json",
+            REMOTE_ADDR=ip,
+        )
+
+    with patch.object(BatchSearch, "throttle_classes", [throttle_class]), patch(
+        "catalog.api.views.search_views.search_controller.search_many",
+        side_effect=lambda specs, *_: [([], 0, 0)] * len(specs),
+    ):
+        res = post_batch(3)
+        assert res.status_code == 200
+        assert res["X-RateLimit-Available-anon_burst"] == "2"
+        # Only two searches are left in the quota.
+        assert post_batch(3).status_code == 429
+        res = post_batch(2)
+        assert res.status_code == 200
+        assert res["X-RateLimit-Available-anon_burst"] == "0"
+    redis.delete(key)
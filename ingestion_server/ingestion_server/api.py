@@ -93,6 +93,7 @@ class TaskResource(BaseTaskResource):
                 "force_delete": {"type": "boolean"},
                 "origin_index_suffix": {"type": "string"},
                 "destination_index_suffix": {"type": "string"},
+                "table_name": {"type": "string"},
             },
             "required": ["model", "action"],
             "allOf": [
@@ -106,6 +107,14 @@ class TaskResource(BaseTaskResource):
                     "if": {"properties": {"action": {"const": TaskTypes.PROMOTE.name}}},
                     "then": {"required": ["index_suffix", "alias"]},
                 },
+                {
+                    "if": {
+                        "properties": {
+                            "action": {"const": TaskTypes.PRECOMPUTE_RELATED.name}
+                        }
+                    },
+                    "then": {"required": ["index_suffix"]},
+                },
                 # TODO: delete eventually, rarely used
                 {
                     "if": {
@@ -105,6 +105,8 @@ def index_settings(table_name):
                 "type": "text",
             },
             "filetype": {"type": "keyword"},
+            # IDs of the related documents, stored by ``precompute_related``
+            "related": {"type": "keyword", "index": False, "doc_values": False},
             "created_on": {"type": "date"},
             "tags": {
                 "properties": {
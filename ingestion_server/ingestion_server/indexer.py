@@ -27,7 +27,8 @@ import psycopg2
 import requests
 from decouple import config
 from elasticsearch import Elasticsearch, helpers
-from elasticsearch_dsl import connections
+from elasticsearch_dsl import MultiSearch, Search, connections
+from elasticsearch_dsl.query import MoreLikeThis
 from psycopg2.sql import SQL, Identifier, Literal
 from requests import RequestException
 
@@ -52,6 +53,13 @@ DB_BUFFER_SIZE = config("DB_BUFFER_SIZE", default=100000, cast=int)
 
 SYNCER_POLL_INTERVAL = config("SYNCER_POLL_INTERVAL", default=60, cast=int)
 
+# The number of most viewed items for which to store the related media.
+RELATED_PRECOMPUTE_COUNT = config("RELATED_PRECOMPUTE_COUNT", default=10000, cast=int)
+# The number of related documents to store for each item.
+RELATED_SIZE = 20
+# The number of ``more_like_this`` queries to send to Elasticsearch at once.
+RELATED_BATCH_SIZE = 100
+
 # A comma separated list of tables in the database table to replicate to
 # Elasticsearch. Ex: image,docs
 REP_TABLES = config(
@@ -551,3 +559,82 @@ class TableIndexer:
         if self.progress is not None:
             self.progress.value = 100  # mark job as completed
         self.ping_callback()
+
+    def precompute_related(
+        self, model_name: str, index_suffix: str, table_name: str = None, **_
+    ):
+        """
+        Store the IDs of the related media of the most viewed items in the index.
+
+        The API serves the stored IDs instead of running a ``more_like_this``
+        query for these items. Run this after ``REINDEX`` and before the index is
+        promoted, so that the IDs are available as soon as it goes live.
+
+        :param model_name: the name of the media type
+        :param index_suffix: the suffix of the index to update
+        :param table_name: the name of the DB table the index was built from, if
+        different from model name, e.g. ``temp_import_image`` before promotion
+        """
+
+        if not table_name:
+            table_name = model_name
+        dest_index = f"{model_name}-{index_suffix}"
+
+        # View counts are only kept in the table of the live model.
+        query = SQL(
+            "SELECT indexed.id FROM {table} AS indexed "
+            "JOIN {model_name} AS live ON live.identifier = indexed.identifier "
+            "ORDER BY live.view_count DESC NULLS LAST "
+            "LIMIT {limit};"
+        ).format(
+            table=Identifier(table_name),
+            model_name=Identifier(model_name),
+            limit=Literal(RELATED_PRECOMPUTE_COUNT),
+        )
+        pg_conn = database_connect()
+        pg_conn.set_session(readonly=True)
+        with pg_conn.cursor() as cur:
+            cur.execute(query)
+            document_ids = [str(row[0]) for row in cur.fetchall()]
+        pg_conn.close()
+
+        log.info(
+            f"Precomputing related media for {len(document_ids)} documents "
+            f"of index {dest_index}."
+        )
+        for start in range(0, len(document_ids), RELATED_BATCH_SIZE):
+            batch = document_ids[start : start + RELATED_BATCH_SIZE]
+            multi_search = MultiSearch(index=dest_index)
+            for document_id in batch:
+                s = Search().query(
+                    MoreLikeThis(
+                        fields=["tags.name", "title", "creator"],
+                        like={"_index": dest_index, "_id": document_id},
+                        min_term_freq=1,
+                        max_query_terms=50,
+                    )
+                )
+                s = s.exclude("term", mature=True).source(False)[:RELATED_SIZE]
+                multi_search = multi_search.add(s)
+
+            # Skip the documents whose query failed, the API falls back to a
+            # live query for them.
+            responses = multi_search.execute(raise_on_error=False)
+            es_batch = [
+                {
+                    "_op_type": "update",
+                    "_index": dest_index,
+                    "_id": document_id,
+                    "doc": {"related": [hit.meta.id for hit in response]},
+                }
+                for document_id, response in zip(batch, responses)
+                if response is not None
+            ]
+            self._bulk_upload(es_batch)
+            if self.progress is not None:
+                self.progress.value = (start + len(batch)) / len(document_ids) * 100
+
+        self.es.indices.refresh(index=dest_index)
+        if self.progress is not None:
+            self.progress.value = 100  # mark job as completed
+        self.ping_callback()
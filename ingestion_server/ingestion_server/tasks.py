@@ -57,6 +57,10 @@ class TaskTypes(Enum):
     CREATE_AND_POPULATE_FILTERED_INDEX = auto()
     """create a filtered index based on existing alias index"""
 
+    PRECOMPUTE_RELATED = auto()
+    """store the related media of the most viewed items in a new index, to run
+    before ``POINT_ALIAS``"""
+
     def __str__(self):
         """
         Get the string representation of this enum.
@@ -0,0 +1,66 @@
+from unittest import mock
+
+import pytest
+
+from ingestion_server import indexer
+from ingestion_server.indexer import TableIndexer
+
+
+@pytest.fixture
+def es():
+    es = mock.MagicMock()
+    es.msearch.return_value = {
+        "responses": [
+            {"hits": {"total": {"value": 2}, "hits": [{"_id": "5"}, {"_id": "6"}]}},
+            {"error": {"type": "search_phase_execution_exception"}, "status": 400},
+        ]
+    }
+    return es
+
+
+@pytest.fixture
+def database_connect():
+    with mock.patch.object(indexer, "database_connect") as database_connect:
+        cursor = database_connect.return_value.cursor.return_value.__enter__()
+        cursor.fetchall.return_value = [(1,), (2,)]
+        yield database_connect
+
+
+def test_precompute_related_stores_ids_in_new_index(es, database_connect):
+    table_indexer = TableIndexer(es)
+
+    with mock.patch.object(table_indexer, "_bulk_upload") as bulk_upload:
+        table_indexer.precompute_related("image", "new", table_name="temp_import_image")
+
+    # The most viewed documents are read from the table the index was built from.
+    cursor = database_connect.return_value.cursor.return_value.__enter__()
+    query = str(cursor.execute.call_args.args[0])
+    assert "temp_import_image" in query
+    assert "view_count" in query
+
+    # Related media are searched for in the new index, not the live alias.
+    msearch = es.msearch.call_args.kwargs
+    assert msearch["index"] == ["image-new"]
+    queries = msearch["body"][1::2]
+    assert [
+        q["query"]["bool"]["must"][0]["more_like_this"]["like"] for q in queries
+    ] == [
+        {"_index": "image-new", "_id": "1"},
+        {"_index": "image-new", "_id": "2"},
+    ]
+
+    # The document whose query failed is skipped.
+    bulk_upload.assert_called_once_with(
+        [
+            {
+                "_op_type": "update",
+                "_index": "image-new",
+                "_id": "1",
+                "doc": {"related": ["5", "6"]},
+            }
+        ]
+    )
+    es.indices.refresh.assert_called_once_with(index="image-new")
+    # The IDs are stored before the index goes live.
+    es.indices.update_aliases.assert_not_called()
+    es.indices.put_alias.assert_not_called()